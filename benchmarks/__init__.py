@@ -0,0 +1 @@
+"""Reproducible throughput, latency and memory benchmarks; see __main__.py."""
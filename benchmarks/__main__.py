@@ -0,0 +1,34 @@
+"""
+Run the AgentEx benchmarks and emit the results as JSON.
+
+    python -m benchmarks                     # all suites, results on stdout
+    python -m benchmarks --quick -o out.json # small sizes, results written to out.json
+    python -m benchmarks --suite tasks
+"""
+import argparse
+import asyncio
+from agentex.logger.logger import get_logger
+from . import codec, memory, messaging, startup, tasks
+from .common import dump, report
+
+SUITES = {"messaging": messaging, "tasks": tasks, "memory": memory, "codec": codec, "startup": startup}
+
+
+async def main(selected, quick: bool):
+    results = []
+    for name in selected:
+        results.extend(await SUITES[name].run(quick=quick))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgentEx benchmarks")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="Suite to run (repeatable, default: all).")
+    parser.add_argument("--quick", action="store_true", help="Use small sizes, for smoke runs.")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    get_logger().set_log_level("error")  # Keep framework logging out of the measurements
+    selected = args.suite or list(SUITES)
+    dump(report(asyncio.run(main(selected, args.quick)), selected), args.output)
@@ -0,0 +1,24 @@
+"""Encode/decode throughput of the message codecs for small and large payloads."""
+import os
+from agentex.messages import EnvelopeCodec, TextCodec
+from .common import Timer, result
+
+
+def _measure(name: str, codec, message, rounds: int, size: int):
+    with Timer() as timer:
+        for _ in range(rounds):
+            codec.decode(codec.encode(message))
+    return result(f"codec.{name}", {"payload_bytes": size}, rounds, timer.elapsed, unit="messages",
+                  mb_per_sec=round(size * rounds / timer.elapsed / 1e6, 1))
+
+
+async def run(quick: bool = False):
+    results = []
+    for size in (64, 1024 * 1024):
+        rounds = (200 if quick else 2000) if size > 1024 else (10000 if quick else 200000)
+        text = "x" * size
+        binary = os.urandom(size)  # Incompressible, so the envelope codec does not compress it
+        results.append(_measure("text", TextCodec(), text, rounds, size))
+        results.append(_measure("envelope_text", EnvelopeCodec(), text, rounds, size))
+        results.append(_measure("envelope_bytes", EnvelopeCodec(), binary, rounds, size))
+    return results
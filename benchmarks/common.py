@@ -0,0 +1,73 @@
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a list of numbers."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def result(name: str, params: dict, operations: int, elapsed: float, latencies=None, unit="ops", **extra) -> dict:
+    """One benchmark measurement in the JSON result format."""
+    record = {
+        "name": name,
+        "params": params,
+        "operations": operations,
+        "seconds": round(elapsed, 6) if elapsed is not None else None,
+        f"{unit}_per_sec": round(operations / elapsed, 1) if elapsed else None,
+    }
+    if record["seconds"] is None:
+        del record["seconds"], record[f"{unit}_per_sec"]
+    if latencies:
+        record["latency_ms"] = {
+            "p50": round(percentile(latencies, 50) * 1000, 4),
+            "p99": round(percentile(latencies, 99) * 1000, 4),
+            "mean": round(statistics.fmean(latencies) * 1000, 4),
+        }
+    record.update(extra)
+    return record
+
+
+def report(results, selected) -> dict:
+    """Wrap results with enough context to compare runs over time."""
+    try:
+        from importlib.metadata import version
+        agentex_version = version("agentex")
+    except Exception:
+        agentex_version = None
+    return {
+        "schema": 1,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "agentex": agentex_version,
+        "suites": selected,
+        "results": results,
+    }
+
+
+def dump(data, path=None):
+    text = json.dumps(data, indent=2, sort_keys=False)
+    if path:
+        with open(path, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
@@ -0,0 +1,37 @@
+"""Memory held per queued task."""
+import gc
+import tracemalloc
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.task_manager import TaskManager
+from .common import result
+
+
+class _NoopTask(BaseTask):
+    __slots__ = ()
+
+    async def execute(self):
+        return None
+
+
+async def _measure(tasks: int, bulk: bool):
+    manager = TaskManager()
+    manager.register_task_type("noop", _NoopTask)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    if bulk:
+        await manager.add_tasks("noop", ({"n": n} for n in range(tasks)))
+    else:
+        for n in range(tasks):
+            await manager.add_task("noop", {"n": n})
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_task = (after - before) / tasks
+    name = "memory.backlog_task" if bulk else "memory.queued_task"
+    return result(name, {"tasks": tasks}, tasks, None, bytes_per_task=round(per_task, 1))
+
+
+async def run(quick: bool = False):
+    tasks = 10000 if quick else 200000
+    return [await _measure(tasks, bulk=False), await _measure(tasks, bulk=True)]
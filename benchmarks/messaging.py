@@ -0,0 +1,74 @@
+"""Messages/sec and delivery latency of Swarm.send_to_agent, send_to_group and broadcast."""
+import asyncio
+import time
+from agentex.agents.agent import Agent
+from agentex.rabbitmq.inmemory import InMemoryBroker
+from agentex.swarms.swarm import Swarm
+from .common import Timer, result
+
+
+class _Deliveries:
+    """Tracks when each message was sent and when every copy of it arrived."""
+
+    def __init__(self):
+        self.sent = {}
+        self.latencies = []
+        self.expected = 0
+        self.done = asyncio.Event()
+
+    async def on_message(self, message):
+        self.latencies.append(time.perf_counter() - self.sent[message])
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+
+
+def _make_swarm(backend: str):
+    if backend == "rabbitmq":
+        broker = InMemoryBroker()
+        config = {"rabbitmq_url": "memory://", "connection_factory": broker.connect, "prefetch_count": 1000}
+        return Swarm(name="bench", backend="rabbitmq", config=config)
+    return Swarm(name="bench", backend="local")
+
+
+async def _run_pattern(backend: str, pattern: str, agents: int, messages: int):
+    swarm = _make_swarm(backend)
+    await swarm.connect()
+    deliveries = _Deliveries()
+    members = [Agent(name=f"a{n}", swarm=swarm, groups=["bench"], on_message=deliveries.on_message)
+               for n in range(agents)]
+    bound = [asyncio.Event() for _ in members]
+    consumers = [asyncio.ensure_future(agent.consume_messages(ready=ready)) for agent, ready in zip(members, bound)]
+    await asyncio.wait_for(asyncio.gather(*(ready.wait() for ready in bound)), timeout=10)
+
+    fan_out = 1 if pattern == "send_to_agent" else agents
+    deliveries.expected = messages * fan_out
+    with Timer() as timer:
+        for n in range(messages):
+            message = str(n)
+            deliveries.sent[message] = time.perf_counter()
+            if pattern == "send_to_agent":
+                await swarm.send_to_agent(members[n % agents].name, message)
+            elif pattern == "send_to_group":
+                await swarm.send_to_group("bench", message)
+            else:
+                await swarm.broadcast(message)
+        await asyncio.wait_for(deliveries.done.wait(), timeout=120)
+
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    await swarm.close()
+    params = {"backend": backend, "agents": agents, "messages": messages}
+    return result(f"messaging.{pattern}", params, deliveries.expected, timer.elapsed,
+                  deliveries.latencies, unit="deliveries")
+
+
+async def run(quick: bool = False):
+    agents = 10 if quick else 100
+    messages = 200 if quick else 5000
+    results = []
+    for backend in ("local", "rabbitmq"):
+        for pattern in ("send_to_agent", "send_to_group", "broadcast"):
+            count = messages if pattern == "send_to_agent" else max(1, messages // 10)
+            results.append(await _run_pattern(backend, pattern, agents, count))
+    return results
@@ -0,0 +1,31 @@
+"""Wall time of a fresh interpreter importing agentex and building a local swarm, as a spawned worker would."""
+import statistics
+import subprocess
+import sys
+import time
+from .common import result
+
+_SCRIPTS = {
+    "python": "pass",
+    "import": "import agentex",
+    "local_swarm": "import agentex; agentex.Swarm('startup')",
+}
+
+
+def _measure(script: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(quick: bool = False):
+    runs = 3 if quick else 15
+    results = []
+    for name, script in _SCRIPTS.items():
+        samples = _measure(script, runs)
+        results.append(result("startup.interpreter", {"script": name, "runs": runs}, runs, sum(samples),
+                              unit="starts", median_ms=round(statistics.median(samples) * 1000, 2)))
+    return results
@@ -0,0 +1,58 @@
+"""Tasks/sec through the TaskManager for N agents x M capabilities, with pull workers or the push dispatcher."""
+import asyncio
+from agentex.agents.agent import Agent
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+from .common import Timer, result
+
+
+class _NoopTask(BaseTask):
+    async def execute(self):
+        return None
+
+
+class _IoTask(BaseTask):
+    async def execute(self):
+        await asyncio.sleep(0.001)  # Stand-in for an I/O-bound call
+        return None
+
+
+async def _run(agents: int, capabilities: int, tasks: int, concurrency: int, task_class, mode: str = "pull"):
+    swarm = Swarm(name="bench", backend="local")
+    kinds = [f"cap{n}" for n in range(capabilities)]
+    for kind in kinds:
+        swarm.task_manager.register_task_type(kind, task_class)
+    workers = [Agent(name=f"a{n}", swarm=swarm, capabilities=kinds, capacity=concurrency) for n in range(agents)]
+    completed = [swarm.metrics.counter("agentex_tasks_completed_total", task_type=kind) for kind in kinds]
+
+    with Timer() as timer:
+        if mode == "push":
+            swarm.start_dispatching()
+        else:
+            for worker in workers:
+                await worker.start_workers(concurrency=concurrency)
+        for n in range(tasks):
+            await swarm.task_manager.add_task(kinds[n % capabilities], {"n": n})
+        while sum(counter.value for counter in completed) < tasks:
+            await asyncio.sleep(0.001)
+        if mode == "push":
+            await swarm.stop_dispatching()
+        for worker in workers:
+            await worker.stop()
+
+    snapshot = swarm.metrics.snapshot()["metrics"]
+    waits = snapshot.get("agentex_task_wait_seconds", [])
+    params = {"agents": agents, "capabilities": capabilities, "tasks": tasks, "concurrency": concurrency,
+              "task": task_class.__name__.strip("_"), "mode": mode}
+    return result("tasks.throughput", params, tasks, timer.elapsed, unit="tasks",
+                  wait_p99_ms=round(max(sample["p99"] for sample in waits) * 1000, 4) if waits else None)
+
+
+async def run(quick: bool = False):
+    tasks = 2000 if quick else 50000
+    results = []
+    for mode in ("pull", "push"):
+        for agents, capabilities in ((1, 1), (10, 4), (50, 10)):
+            results.append(await _run(agents, capabilities, tasks, 1, _NoopTask, mode))
+        results.append(await _run(10, 4, tasks // 10, 50, _IoTask, mode))
+    return results
@@ -1,6 +1,14 @@
 import asyncio
+import time
+from agentex.logger.logger import get_logger
+from agentex.routing.topic_router import BROADCAST_KEY
+from agentex.tasks.scheduler import DeficitRoundRobin
+from agentex.tasks.status import TaskStatus
+
+logger = get_logger()
+
 class Agent:
-    def __init__(self, name: str, swarm, on_message=None, groups=None, capabilities=None):
+    def __init__(self, name: str, swarm, on_message=None, groups=None, capabilities=None, capacity: int = 1):
         """
         Initialize an agent.
         :param name: Name of the agent.
@@ -8,12 +16,21 @@ class Agent:
         :param on_message: Optional callback for incoming messages.
         :param groups: Optional list of groups to join at instantiation.
         :param capabilities: Optional list of capabilities (tags) for dynamic task assignment.
+        :param capacity: Tasks the swarm's dispatcher may push to this agent at once.
         """
         self.name = name
         self.swarm = swarm
         self.on_message = on_message
         self.groups = set(groups) if groups else set()
         self.capabilities = set(capabilities) if capabilities else set()
+        self._worker = None  # Background loop pulling tasks, see start_workers()
+        self._running = set()  # Tasks currently being executed by this agent
+        self.capacity = capacity
+        self.in_flight = 0  # Tasks pushed by the dispatcher and not finished yet
+        self.paused = False  # Backpressure: the dispatcher skips paused agents
+        self.scheduler = DeficitRoundRobin(self.swarm.task_manager.get_weight)  # Fair pick between capabilities
+
+        self.swarm.register_agent(self)
 
         # Join groups at instantiation
         for group in self.groups:
@@ -53,49 +70,177 @@ class Agent:
             self.capabilities.remove(capability)
             self.swarm.unregister_agent_capability(self, capability)
 
-    async def consume_messages(self):
-        """Start consuming messages from the agent's queue."""
+    def has_capacity(self) -> bool:
+        """Whether the dispatcher may push another task to this agent."""
+        return not self.paused and self.in_flight < self.capacity
+
+    def set_capacity(self, capacity: int):
+        """Change how many pushed tasks this agent runs at once, e.g. lower it while it is slow."""
+        if capacity < 0:
+            raise ValueError("capacity must not be negative.")
+        self.capacity = capacity
+        self.swarm.dispatcher.notify(self)
+
+    def pause(self):
+        """Stop receiving pushed tasks until resume(); tasks already running continue."""
+        self.paused = True
+        self.swarm.dispatcher.notify(self)
+
+    def resume(self):
+        self.paused = False
+        self.swarm.dispatcher.notify(self)
+
+    async def consume_messages(self, ready=None):
+        """
+        Start consuming messages from the agent's queue, which is also bound to the swarm's broadcasts.
+        :param ready: Optional asyncio.Event set once the queue is bound (see Swarm.consume_messages).
+        """
         async def handle_message(message):
             if self.on_message:
                 await self.on_message(message)
             else:
-                print(f"{self.name} received: {message}")
+                logger.info("%s received: %s", self.name, message)
 
-        await self.swarm.consume_messages(queue_name=f"agent.{self.name}", callback=handle_message)
+        await self.swarm.consume_messages(queue_name=f"agent.{self.name}", callback=handle_message, ready=ready,
+                                          bindings=(BROADCAST_KEY,))
     
+    async def consume_message_batches(self, handler=None, max_batch: int = 100, max_wait_ms: float = 10,
+                                      concurrency: int = 1, ready=None):
+        """
+        Consume the agent's queue in batches, e.g. for bulk writes or batched inference.
+        :param handler: Coroutine receiving a list of messages (default: on_message for each message in turn).
+        :param max_batch: Maximum number of messages per batch.
+        :param max_wait_ms: How long to wait after the first message for a batch to fill.
+        :param concurrency: Maximum number of batches handled at once.
+        :param ready: Optional asyncio.Event set once the queue is bound (see Swarm.consume_messages).
+        """
+        async def handle_messages(messages):
+            for message in messages:
+                if self.on_message:
+                    await self.on_message(message)
+                else:
+                    logger.info("%s received: %s", self.name, message)
+
+        await self.swarm.consume_batches(f"agent.{self.name}", handler or handle_messages, max_batch=max_batch,
+                                         max_wait_ms=max_wait_ms, concurrency=concurrency, ready=ready,
+                                         bindings=(BROADCAST_KEY,))
+
     async def request_task(self):
         """Request a task from the Swarm based on capabilities."""
-        for capability in self.capabilities:
-            task = await self.swarm.task_manager.get_task(capability)
-            if task:
-                print(f"{self.name} received task: {task}")
-                await self.execute_task(task)
-                return
+        task = await self.swarm.task_manager.next_task(self.capabilities, self.scheduler, wait=False, agent=self)
+        if task:
+            logger.debug("%s received task: %s", self.name, task, extra=task.log_fields())
+            await self.execute_task(task)
+            return
+
+        logger.debug("%s found no available tasks.", self.name)
+
+    async def start_workers(self, concurrency: int = 1):
+        """
+        Start continuously pulling tasks for this agent's capabilities in the background.
+        The loop blocks on the task queues while idle and runs up to `concurrency` tasks at once.
+        :param concurrency: Maximum number of tasks executed concurrently by this agent.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        if self._worker is not None and not self._worker.done():
+            raise RuntimeError(f"Agent '{self.name}' is already running workers.")
+        self._worker = asyncio.ensure_future(self._work_loop(concurrency))
 
-        print(f"{self.name} found no available tasks.")
+    async def run(self, concurrency: int = 1):
+        """
+        Run the worker loop until stop() is called.
+        :param concurrency: Maximum number of tasks executed concurrently by this agent.
+        """
+        await self.start_workers(concurrency)
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            if not self._worker.cancelled():
+                raise  # run() itself was cancelled, not the worker loop
+
+    async def stop(self, drain: bool = True):
+        """
+        Stop pulling new tasks.
+        :param drain: Wait for in-flight tasks to finish if True, cancel them otherwise.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        running = list(self._running)
+        if not drain:
+            for task in running:
+                task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def _work_loop(self, concurrency: int):
+        """Acquire a free slot, wait for the next task and run it without blocking the loop."""
+        slots = asyncio.Semaphore(concurrency)
+
+        def on_done(running):
+            self._running.discard(running)
+            slots.release()
+
+        while True:
+            await slots.acquire()
+            try:
+                task = await self.swarm.task_manager.next_task(self.capabilities, self.scheduler, agent=self)
+            except BaseException:
+                slots.release()
+                raise
+            running = asyncio.ensure_future(self.execute_task(task))
+            self._running.add(running)
+            running.add_done_callback(on_done)
 
     async def execute_task(self, task):
         """
         Execute the task and handle success or failure.
         :param task: The Task object to execute.
         """
+        task_manager = self.swarm.task_manager
+        task_metrics = task_manager.task_metrics
+        hooks = self.swarm.hooks
+        observed = hooks.executing
+        if observed:
+            hooks.before_execute(self, task)
+        started = time.monotonic()
         try:
             await task.mark_in_progress()  # Start the task
 
-            # Execute the task and capture the result
-            result = await task.execute()
+            # Execute the task (on the loop or in the swarm's executor pools) and capture the result;
+            # the attempt is subject to the task type's timeout and may be cancelled or hedged.
+            try:
+                result = await task_manager.run(task, self.swarm.executor.run(task), self)
+            except asyncio.CancelledError:
+                if task.status != TaskStatus.IN_PROGRESS:
+                    return  # Cancelled through the TaskManager, or its speculative copy finished first
+                raise
+            if task.status != TaskStatus.IN_PROGRESS:
+                return  # Finished by its speculative copy in the meantime
 
             # Pass the result to mark_completed()
             await task.mark_completed(result)
-            print(f"{self.name} successfully completed task {task.task_id}: {result}")
+            task_manager.task_done(task)
+            task_metrics.observe_run(task.task_type, time.monotonic() - started, succeeded=True)
+            if logger.is_enabled_for("debug"):
+                logger.debug("%s successfully completed task %s: %r", self.name, task.task_id, result,
+                             extra=task.log_fields())
 
         except Exception as e:
-            print(f"{self.name} encountered an error while processing task {task.task_id}: {str(e)}")
-            if task.retries > 0:
-                task.retries -= 1
-                print(f"Retrying task {task.task_id} (remaining retries: {task.retries})")
-                await self.execute_task(task)  # Retry the task
+            task_metrics.observe_run(task.task_type, time.monotonic() - started, succeeded=False)
+            logger.warning("%s encountered an error while processing task %s: %s", self.name, task.task_id, e,
+                           extra=task.log_fields())
+            # Hand the task back to the TaskManager; this agent is free for other work meanwhile.
+            delay = await task_manager.retry_task(task, e)
+            if delay is not None:
+                logger.info("Retrying task %s in %.2fs (remaining retries: %d)", task.task_id, delay, task.retries,
+                            extra=task.log_fields())
             else:
-                await task.mark_failed(str(e))
-                print(f"Task {task.task_id} failed permanently.")
+                logger.error("Task %s failed permanently.", task.task_id, extra=task.log_fields())
+        finally:
+            if observed:
+                hooks.after_execute(self, task, time.monotonic() - started)
 
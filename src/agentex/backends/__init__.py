@@ -1,2 +1,17 @@
-from .local_backend import LocalMessageBackend
-from .rabbitmq_backend import RabbitMQBackend
\ No newline at end of file
+import importlib
+from .registry import available_backends, create_backend, get_backend, register_backend
+
+# Backend classes are imported on first access, so importing agentex does not load their dependencies.
+_LAZY = {
+    "LocalMessageBackend": ".local_backend",
+    "RabbitMQBackend": ".rabbitmq_backend",
+    "MultiprocessBackend": ".multiprocess_backend",
+    "SharedRegistry": ".multiprocess_backend",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
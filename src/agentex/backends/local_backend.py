@@ -1,20 +1,155 @@
-import asyncio
+from agentex.metrics.registry import default_registry
+from agentex.queues.batching import consume_batches
+from agentex.queues.bounded_queue import DROP_OLDEST, BoundedQueue
+from agentex.routing.topic_router import BROADCAST_KEY, TopicRouter
 
 class LocalMessageBackend:
-    def __init__(self):
+    """
+    In-process backend that behaves like a topic exchange.
+    Every queue is bound to its own name and may be bound to extra '*'/'#' patterns; a published
+    message is put, as the same object, into every queue whose binding matches the routing key.
+    """
+
+    def __init__(self, default_queue_options=None, metrics=None, codec=None, unrouted_limit: int = 1000):
+        """
+        :param default_queue_options: BoundedQueue options (maxsize, overflow, watermarks...) applied to
+                                      every queue not configured through configure_queue().
+        :param metrics: MetricsRegistry receiving queue depths and message counts (default: the global one).
+        :param codec: Optional Codec applied on publish and consume, e.g. to check that messages survive the
+                      wire format of another backend. By default messages are passed by reference, uncopied.
+        :param unrouted_limit: Messages kept per routing key that no queue is bound to yet, for a consumer
+                               that has not started; the oldest are dropped beyond it (0 drops them all).
+        """
         self.queues = {}
+        self.router = TopicRouter()  # Binding patterns -> queue names
+        self.default_queue_options = dict(default_queue_options or {})
+        self.queue_options = {}  # Per queue BoundedQueue options
+        self.codec = codec
+        self.unrouted_limit = unrouted_limit
+        self.unrouted_dropped = 0  # Messages for unbound keys dropped because unrouted_limit is 0
+        self._unrouted = set()  # Queues created by publish() for unbound keys, capped until declared
+        self.metrics = metrics or default_registry
+        self._published = self.metrics.counter("agentex_messages_published_total", "Messages published.",
+                                               backend="local")
+        self._consumed = self.metrics.counter("agentex_messages_consumed_total", "Messages handed to consumers.",
+                                              backend="local")
+        self.metrics.register_collector(self._collect_metrics, {
+            "agentex_message_queue_depth": "Messages waiting per local queue.",
+        })
+
+    @classmethod
+    def from_config(cls, config=None, metrics=None, codec=None):
+        """Build the backend for Swarm(backend="local", config=...); config holds constructor keyword arguments."""
+        return cls(metrics=metrics, codec=codec, **(config or {}))
 
     async def connect(self):
         pass  # No setup required for local backend
 
-    async def publish(self, routing_key: str, message: str):
-        if routing_key not in self.queues:
-            self.queues[routing_key] = asyncio.Queue()
-        await self.queues[routing_key].put(message)
+    async def close(self):
+        pass  # Nothing to release
+
+    def configure_queue(self, queue_name: str, **options):
+        """
+        Set the capacity, overflow policy and watermark callbacks of the queue for one routing key.
+        Accepts the keyword arguments of BoundedQueue.
+        """
+        self.queue_options[queue_name] = options
+        self._unrouted.discard(queue_name)
+        if queue_name in self.queues:
+            self.queues[queue_name].configure(**options)
+
+    def _collect_metrics(self):
+        for queue_name, queue in self.queues.items():
+            yield "agentex_message_queue_depth", {"queue": queue_name}, queue.depth
 
-    async def consume(self, queue_name: str, callback):
+    def queue_depth(self, queue_name: str) -> int:
+        """Number of messages waiting in a queue."""
+        queue = self.queues.get(queue_name)
+        return queue.depth if queue is not None else 0
+
+    def queue_depths(self) -> dict:
+        """Number of waiting messages for every queue."""
+        return {queue_name: queue.depth for queue_name, queue in self.queues.items()}
+
+    def declare_queue(self, queue_name: str):
+        """Create a queue bound to its own name, if it does not exist yet."""
+        options = self.queue_options.get(queue_name, self.default_queue_options)
         if queue_name not in self.queues:
-            self.queues[queue_name] = asyncio.Queue()
+            self.queues[queue_name] = BoundedQueue(**options, name=queue_name)
+            self.router.bind(queue_name, queue_name)
+        elif queue_name in self._unrouted:
+            self._unrouted.discard(queue_name)
+            self.queues[queue_name].configure(**options)  # Lift the unrouted cap
+        return self.queues[queue_name]
+
+    def bind(self, queue_name: str, pattern: str):
+        """Also deliver messages whose routing key matches `pattern` to `queue_name`."""
+        self.declare_queue(queue_name)
+        self.router.bind(pattern, queue_name)
+
+    def unbind(self, queue_name: str, pattern: str):
+        self.router.unbind(pattern, queue_name)
+
+    async def publish(self, routing_key: str, message):
+        if self.codec is not None:
+            message = self.codec.encode(message)
+        queue_names = self.router.route(routing_key)
+        if not queue_names:
+            if routing_key == BROADCAST_KEY:
+                return  # No agent is consuming; broadcasts are not kept for later ones
+            # Nobody is bound yet: keep a bounded number of messages for the queue named after the key.
+            if not self.unrouted_limit:
+                self.unrouted_dropped += 1
+                return
+            queue_names = [routing_key]
+            self.queues[routing_key] = BoundedQueue(self.unrouted_limit, DROP_OLDEST, name=routing_key)
+            self.router.bind(routing_key, routing_key)
+            self._unrouted.add(routing_key)
+        for queue_name in queue_names:
+            await self.queues[queue_name].put(message)
+        self._published.inc()
+
+    async def publish_many(self, messages):
+        """Publish (routing_key, message) pairs; there are no round trips to pipeline locally."""
+        for routing_key, message in messages:
+            await self.publish(routing_key, message)
+
+    async def consume(self, queue_name: str, callback, bindings=None, ready=None):
+        """
+        Consume a queue. A queue name containing wildcards (e.g. 'agent.*') subscribes to that pattern.
+        :param bindings: Optional extra patterns to bind the queue to.
+        :param ready: Optional asyncio.Event set once the queue is bound, i.e. messages published from
+                      then on are delivered to it.
+        """
+        queue = self.declare_queue(queue_name)
+        for pattern in bindings or ():
+            self.bind(queue_name, pattern)
+        if ready is not None:
+            ready.set()
+        decode = self.codec.decode if self.codec is not None else None
         while True:
-            message = await self.queues[queue_name].get()
-            await callback(message)
\ No newline at end of file
+            message = await queue.get()
+            self._consumed.inc()
+            await callback(message if decode is None else decode(message))
+
+    async def consume_batch(self, queue_name: str, handler, max_batch: int = 100, max_wait_ms: float = 10,
+                            concurrency: int = 1, bindings=None, ready=None):
+        """
+        Consume a queue in batches: `await handler(messages)` receives lists of up to max_batch messages,
+        handed over when full or max_wait_ms after the first message arrived.
+        :param concurrency: Maximum number of batches handled at once.
+        :param bindings: Optional extra patterns to bind the queue to.
+        :param ready: Optional asyncio.Event set once the queue is bound (see consume()).
+        """
+        queue = self.declare_queue(queue_name)
+        for pattern in bindings or ():
+            self.bind(queue_name, pattern)
+        if ready is not None:
+            ready.set()
+        decode = self.codec.decode if self.codec is not None else None
+
+        async def handle(batch):
+            self._consumed.inc(len(batch))
+            await handler(batch if decode is None else [decode(message) for message in batch])
+
+        await consume_batches(queue, handle, max_batch, max_wait_ms / 1000, concurrency)
@@ -0,0 +1,427 @@
+import asyncio
+import multiprocessing
+import pickle
+import queue
+import threading
+from collections import defaultdict, deque
+from agentex.logger.logger import get_logger
+from agentex.messages.codec import EnvelopeCodec
+from agentex.routing.topic_router import BROADCAST_KEY, TopicRouter
+from .local_backend import LocalMessageBackend
+
+logger = get_logger()
+
+LOCAL = "local"  # Router target standing for the hub process's own queues
+
+
+class SharedRegistry:
+    """
+    Agent names per (kind, key), e.g. ("group", "analysts") or ("capability", "summarize"), mirrored
+    in every process of a MultiprocessBackend. Changes made in one process reach the others
+    asynchronously, in order.
+    """
+
+    def __init__(self, on_change=None):
+        """
+        :param on_change: Called with (op, kind, key, name) for changes made in this process.
+        """
+        self._members = defaultdict(set)
+        self.on_change = on_change
+
+    def members(self, kind: str, key: str = "") -> set:
+        return set(self._members.get((kind, key), ()))
+
+    def add(self, kind: str, key: str, name: str):
+        self.apply("add", kind, key, name)
+        if self.on_change is not None:
+            self.on_change("add", kind, key, name)
+
+    def remove(self, kind: str, key: str, name: str):
+        self.apply("remove", kind, key, name)
+        if self.on_change is not None:
+            self.on_change("remove", kind, key, name)
+
+    def apply(self, op: str, kind: str, key: str, name: str):
+        """Apply a change without reporting it, e.g. one received from another process."""
+        if op == "add":
+            self._members[(kind, key)].add(name)
+        else:
+            names = self._members.get((kind, key))
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._members[(kind, key)]
+
+    def snapshot(self):
+        return [("add", kind, key, name) for (kind, key), names in self._members.items() for name in names]
+
+
+class _Link:
+    """
+    One end of the pipe between a worker process and the hub.
+    Frames are written by a background thread so a full pipe never blocks the event loop.
+    """
+
+    def __init__(self, conn, peer: str):
+        self.conn = conn
+        self.peer = peer
+        self.outbox = []  # Ops waiting for the next flush
+        self.patterns = set()  # Binding patterns of the peer (hub side)
+        self._frames = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name=f"agentex-link-{peer}", daemon=True)
+        self._writer.start()
+
+    def flush(self):
+        if self.outbox:
+            self._frames.put(pickle.dumps(self.outbox, pickle.HIGHEST_PROTOCOL))
+            self.outbox = []
+
+    def _write_loop(self):
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                return
+            try:
+                self.conn.send_bytes(frame)
+            except OSError:
+                return  # The peer is gone
+
+    async def close(self):
+        """Write out pending frames, then close the pipe."""
+        self.flush()
+        self._frames.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._writer.join)
+        self.conn.close()
+
+
+class MultiprocessBackend:
+    """
+    Backend spreading a swarm over several processes on one host, without a broker.
+    The process that creates it is the hub: it owns the topic routing table and forwards messages
+    between worker processes started with spawn(). Every process delivers to its own queues through
+    a LocalMessageBackend, so publish() and consume() keep the local backend's contract; messages
+    crossing processes are encoded with a codec and sent over pipes in batches, one frame per link
+    and event loop iteration (or per batch_size messages). Queue names are per process. Group,
+    capability and agent membership is shared through `registry`, so Swarm.send_to_group(),
+    send_to_capability() and broadcast() reach agents in every process.
+    """
+
+    def __init__(self, default_queue_options=None, metrics=None, codec=None, batch_size: int = 256,
+                 mp_context: str = "spawn", unrouted_limit: int = 1000, inbox_size: int = 1024):
+        """
+        :param default_queue_options: BoundedQueue options for this process's queues (see LocalMessageBackend).
+        :param metrics: MetricsRegistry receiving queue depths and message counts (default: the global one).
+        :param codec: Codec for messages crossing processes (default: EnvelopeCodec).
+        :param batch_size: Ops buffered for one link before a frame is written without waiting for the
+                           end of the loop iteration.
+        :param mp_context: multiprocessing start method for spawn(); "spawn" is safe with running threads.
+        :param unrouted_limit: Messages the hub keeps per routing key that no process is bound to yet;
+                               the oldest are dropped beyond it (0 drops them all).
+        :param inbox_size: Messages from other processes waiting for this process's queues beyond which
+                           the pipes are no longer read, until half of them were delivered. With full
+                           "block" queues, senders are then held back by the pipes instead of memory growing.
+        """
+        self.local = LocalMessageBackend(default_queue_options=default_queue_options, metrics=metrics,
+                                         unrouted_limit=unrouted_limit)
+        self.codec = codec or EnvelopeCodec()
+        self.batch_size = batch_size
+        self.mp_context = mp_context
+        self.registry = SharedRegistry(self._on_registry_change)
+        self.processes = []
+        self.is_hub = True
+        self._links = []  # Hub: one per worker process. Worker: the link to the hub.
+        self._router = TopicRouter()  # Hub: binding patterns -> LOCAL or worker links
+        self._bound = defaultdict(int)  # Patterns bound by this process's queues, with use counts
+        self.unrouted_limit = unrouted_limit
+        self.unrouted_dropped = 0  # Hub: messages for unbound keys dropped because of unrouted_limit
+        self._unrouted = {}  # Hub: routing key -> deque of encoded messages for keys nobody has bound yet
+        self.inbox_size = inbox_size
+        self._inbox = None  # Encoded (routing_key, data) received for this process's queues
+        self._reading = False  # Whether the pipes are watched for incoming frames
+        self._pump = None
+        self._flush_scheduled = False
+        self._options = {"default_queue_options": default_queue_options, "codec": self.codec,
+                         "batch_size": batch_size, "unrouted_limit": unrouted_limit, "inbox_size": inbox_size}
+
+    async def connect(self):
+        if self._pump is not None:
+            return
+        self._inbox = asyncio.Queue()  # Bounded by pausing the pipes, as a frame is queued in one go
+        self._pump = asyncio.ensure_future(self._deliver_inbox())
+        self._resume_reading()
+        self._flush()
+
+    async def close(self):
+        """Flush and close the pipes. On the hub, call join() first to let workers finish."""
+        if self._pump is None:
+            return
+        loop = asyncio.get_running_loop()
+        self._pump.cancel()
+        self._pump = None
+        self._pause_reading()
+        links, self._links = self._links, []
+        await asyncio.gather(*(link.close() for link in links))
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+
+    @classmethod
+    def from_config(cls, config=None, metrics=None, codec=None):
+        """Build the backend for Swarm(backend="multiprocess", config=...); config holds constructor arguments."""
+        return cls(metrics=metrics, codec=codec, **(config or {}))
+
+    def spawn(self, main, *args):
+        """
+        Start a worker process running `await main(backend, *args)` with its own event loop and a
+        MultiprocessBackend linked to this one. `main` must be a module-level coroutine function and
+        the arguments picklable. Returns the multiprocessing.Process.
+        """
+        if not self.is_hub:
+            raise ValueError("Only the hub process can spawn workers.")
+        context = multiprocessing.get_context(self.mp_context)
+        hub_end, worker_end = context.Pipe()
+        process = context.Process(target=_run_worker, args=(worker_end, main, args, self._options), daemon=True)
+        process.start()
+        worker_end.close()
+        self.processes.append(process)
+
+        link = _Link(hub_end, peer=f"{process.pid}")
+        link.outbox.extend(("registry",) + change for change in self.registry.snapshot())
+        self._links.append(link)
+        if self._reading:
+            asyncio.get_running_loop().add_reader(hub_end.fileno(), self._on_readable, link)
+        self._schedule_flush()
+        return process
+
+    async def join(self, timeout: float = None):
+        """Wait for the worker processes to exit."""
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, timeout)
+
+    def _attach(self, conn):
+        """Make this backend a worker linked to the hub through `conn`."""
+        self.is_hub = False
+        self._links = [_Link(conn, peer="hub")]
+
+    # Local queues, as in LocalMessageBackend
+
+    def configure_queue(self, queue_name: str, **options):
+        self.local.configure_queue(queue_name, **options)
+
+    def queue_depth(self, queue_name: str) -> int:
+        return self.local.queue_depth(queue_name)
+
+    def queue_depths(self) -> dict:
+        return self.local.queue_depths()
+
+    def bind(self, queue_name: str, pattern: str):
+        """Also deliver messages whose routing key matches `pattern`, from any process, to `queue_name`."""
+        self.local.bind(queue_name, pattern)
+        self._bind(pattern)
+
+    def unbind(self, queue_name: str, pattern: str):
+        self.local.unbind(queue_name, pattern)
+        self._unbind(pattern)
+
+    async def publish(self, routing_key: str, message):
+        if not self.is_hub:
+            self._send(self._links[0], ("publish", routing_key, self.codec.encode(message)))
+            return
+        targets = self._router.route(routing_key)
+        if not targets:
+            self._hold(routing_key, self.codec.encode(message))
+            return
+        data = None
+        for target in targets:
+            if target is LOCAL:
+                await self.local.publish(routing_key, message)
+            else:
+                if data is None:
+                    data = self.codec.encode(message)
+                self._send(target, ("deliver", routing_key, data))
+
+    async def publish_many(self, messages):
+        """Publish (routing_key, message) pairs; remote deliveries share frames."""
+        for routing_key, message in messages:
+            await self.publish(routing_key, message)
+
+    async def consume(self, queue_name: str, callback, bindings=None, ready=None):
+        """
+        Consume a queue of this process. A queue name containing wildcards (e.g. 'agent.*') subscribes
+        to that pattern; messages published in any process are delivered.
+        :param bindings: Optional extra patterns to bind the queue to.
+        :param ready: Optional asyncio.Event set once the queue is bound in this process.
+        """
+        for pattern in (queue_name, *(bindings or ())):
+            self._bind(pattern)
+        await self.local.consume(queue_name, callback, bindings, ready)
+
+    async def consume_batch(self, queue_name: str, handler, max_batch: int = 100, max_wait_ms: float = 10,
+                            concurrency: int = 1, bindings=None, ready=None):
+        """Consume a queue of this process in batches; see LocalMessageBackend.consume_batch()."""
+        for pattern in (queue_name, *(bindings or ())):
+            self._bind(pattern)
+        await self.local.consume_batch(queue_name, handler, max_batch, max_wait_ms, concurrency, bindings, ready)
+
+    # Routing
+
+    def _bind(self, pattern: str):
+        self._bound[pattern] += 1
+        if self._bound[pattern] > 1:
+            return  # The hub already routes this pattern here
+        if not self.is_hub:
+            self._send(self._links[0], ("bind", pattern))
+        else:
+            self._hub_bind(pattern, LOCAL)
+
+    def _unbind(self, pattern: str):
+        if not self._bound[pattern]:
+            return
+        self._bound[pattern] -= 1
+        if self._bound[pattern]:
+            return
+        del self._bound[pattern]
+        if not self.is_hub:
+            self._send(self._links[0], ("unbind", pattern))
+        else:
+            self._router.unbind(pattern, LOCAL)
+
+    def _hub_bind(self, pattern: str, target):
+        self._router.bind(pattern, target)
+        if target is not LOCAL:
+            target.patterns.add(pattern)
+        if self._unrouted:
+            matcher = TopicRouter()
+            matcher.bind(pattern, True)
+            for routing_key in [key for key in self._unrouted if matcher.route(key)]:
+                for data in self._unrouted.pop(routing_key):
+                    self._route(routing_key, data)
+
+    def _hold(self, routing_key: str, data: bytes):
+        """Hub: keep a message for a key nobody is bound to yet, up to unrouted_limit per key."""
+        if routing_key == BROADCAST_KEY:
+            return  # Only agents consuming already receive a broadcast
+        held = self._unrouted.get(routing_key)
+        if held is None:
+            if not self.unrouted_limit:
+                self.unrouted_dropped += 1
+                return
+            held = self._unrouted[routing_key] = deque(maxlen=self.unrouted_limit)
+        if len(held) == held.maxlen:
+            self.unrouted_dropped += 1
+        held.append(data)
+
+    def _route(self, routing_key: str, data: bytes):
+        """Hub: forward an encoded message to every process with a matching binding."""
+        targets = self._router.route(routing_key)
+        if not targets:
+            self._hold(routing_key, data)
+            return
+        for target in targets:
+            if target is LOCAL:
+                self._inbox.put_nowait((routing_key, data))
+            else:
+                self._send(target, ("deliver", routing_key, data))
+
+    def _on_registry_change(self, op: str, kind: str, key: str, name: str):
+        for link in self._links:
+            self._send(link, ("registry", op, kind, key, name))
+
+    # Pipes
+
+    def _send(self, link, op):
+        link.outbox.append(op)
+        if len(link.outbox) >= self.batch_size:
+            link.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Flushed by connect()
+        self._flush_scheduled = True
+        loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        for link in self._links:
+            link.flush()
+
+    def _on_readable(self, link):
+        try:
+            while self._reading and link.conn.poll():
+                self._handle(link, pickle.loads(link.conn.recv_bytes()))
+                if self._inbox.qsize() >= self.inbox_size:
+                    self._pause_reading()  # Leave further frames in the pipes until the inbox drains
+        except (EOFError, OSError):
+            self._drop(link)
+
+    def _pause_reading(self):
+        if self._reading:
+            self._reading = False
+            loop = asyncio.get_running_loop()
+            for link in self._links:
+                loop.remove_reader(link.conn.fileno())
+
+    def _resume_reading(self):
+        if not self._reading:
+            self._reading = True
+            loop = asyncio.get_running_loop()
+            for link in self._links:
+                loop.add_reader(link.conn.fileno(), self._on_readable, link)
+
+    def _handle(self, link, ops):
+        for op in ops:
+            kind = op[0]
+            if kind == "deliver":
+                self._inbox.put_nowait((op[1], op[2]))
+            elif kind == "publish":
+                self._route(op[1], op[2])
+            elif kind == "bind":
+                self._hub_bind(op[1], link)
+            elif kind == "unbind":
+                self._router.unbind(op[1], link)
+                link.patterns.discard(op[1])
+            elif kind == "registry":
+                self.registry.apply(*op[1:])
+                for other in self._links:
+                    if other is not link:
+                        self._send(other, op)
+
+    def _drop(self, link):
+        """The peer closed its end: forget its bindings."""
+        logger.debug("Link to %s closed.", link.peer)
+        asyncio.get_running_loop().remove_reader(link.conn.fileno())
+        for pattern in link.patterns:
+            self._router.unbind(pattern, link)
+        self._links.remove(link)
+        asyncio.ensure_future(link.close())
+
+    async def _deliver_inbox(self):
+        decode = self.codec.decode
+        while True:
+            routing_key, data = await self._inbox.get()
+            await self.local.publish(routing_key, decode(data))
+            if not self._reading and self._inbox.qsize() <= self.inbox_size // 2:
+                self._resume_reading()
+
+
+def _run_worker(conn, main, args, options):
+    asyncio.run(_worker(conn, main, args, options))
+
+
+async def _worker(conn, main, args, options):
+    backend = MultiprocessBackend(**options)
+    backend._attach(conn)
+    await backend.connect()
+    try:
+        await main(backend, *args)
+    finally:
+        await backend.close()
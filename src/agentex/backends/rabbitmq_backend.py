@@ -1,20 +1,283 @@
+import asyncio
+from bisect import insort
+from agentex.messages.codec import TextCodec
+from agentex.metrics.registry import default_registry
+from agentex.queues.batching import consume_batches
+from agentex.queues.bounded_queue import BoundedQueue
 from agentex.rabbitmq.message_broker import MessageBroker
+from agentex.routing.hash_ring import HashRing
+from agentex.routing.topic_router import BROADCAST_KEY
 
 class RabbitMQBackend:
-    def __init__(self, rabbitmq_url: str):
-        self.broker = MessageBroker(rabbitmq_url)
+    def __init__(self, rabbitmq_url=None, config=None, metrics=None, codec=None):
+        """
+        Initialize the RabbitMQ backend.
+        :param rabbitmq_url: AMQP URL of the RabbitMQ server, or a list of URLs to shard across (may also be
+                             given as config["rabbitmq_url"] or config["rabbitmq_urls"]).
+        :param config: Optional dict with the keys rabbitmq_url, rabbitmq_urls, exchange_name (default "swarm"),
+                       channel_pool_size, prefetch_count, queue_options, connection_factory and virtual_nodes.
+        :param metrics: MetricsRegistry receiving message counts (default: the global one).
+        :param codec: Codec turning messages into AMQP bodies and back (default: TextCodec, the plain UTF-8
+                      string format other producers and consumers on the exchange may rely on). May also be
+                      given as config["codec"]; pass EnvelopeCodec() to send envelopes, bytes and JSON bodies.
+
+        With several brokers, every routing key (and the queue bound to it) lives on the broker chosen by
+        consistent hashing, so adding or removing a broker only moves about 1/N of the queues. Consumers
+        of wildcard patterns ("*" or "#") subscribe on every broker, and messages for the broadcast key
+        (which agent queues are bound to on their own broker) are published on every broker.
+        """
+        config = config or {}
+        urls = rabbitmq_url or config.get("rabbitmq_urls") or config["rabbitmq_url"]
+        urls = [urls] if isinstance(urls, str) else list(urls)
+        if not urls:
+            raise ValueError("At least one RabbitMQ URL is required.")
+        self.config = config
+        self.exchange_name = config.get("exchange_name", "swarm")
+        self.brokers = {url: self._make_broker(url) for url in urls}
+        self.ring = HashRing(urls, replicas=config.get("virtual_nodes", 128))
+        self.broker = self.brokers[urls[0]]  # The only broker unless sharded
+        self.codec = codec or config.get("codec") or TextCodec()
+        self.metrics = metrics or default_registry
+        self._subscriptions = {}  # queue name -> one [handler_for(url), prefetch, bindings, URLs subscribed on] per consumer
+        self._published = self.metrics.counter("agentex_messages_published_total", "Messages published.",
+                                               backend="rabbitmq")
+        self._consumed = self.metrics.counter("agentex_messages_consumed_total", "Messages handed to consumers.",
+                                              backend="rabbitmq")
+
+    @classmethod
+    def from_config(cls, config=None, metrics=None, codec=None):
+        """Build the backend for Swarm(backend="rabbitmq", config=...)."""
+        return cls(config=config, metrics=metrics, codec=codec)
+
+    def _make_broker(self, url: str):
+        config = self.config
+        return MessageBroker(
+            url,
+            channel_pool_size=config.get("channel_pool_size", 4),
+            prefetch_count=config.get("prefetch_count", 10),
+            queue_options=config.get("queue_options"),
+            connection_factory=config.get("connection_factory"),
+        )
+
+    def broker_for(self, routing_key: str):
+        """The broker holding a routing key and the queue bound to it."""
+        return self.brokers[self.ring.node_for(routing_key)]
 
     async def connect(self):
-        await self.broker.connect()
+        await asyncio.gather(*(broker.connect() for broker in self.brokers.values()))
+
+    async def close(self):
+        await asyncio.gather(*(broker.close() for broker in self.brokers.values()))
+
+    async def publish(self, routing_key: str, message):
+        if routing_key == BROADCAST_KEY and len(self.brokers) > 1:
+            await self.publish_many([(routing_key, message)])
+            return
+        await self.broker_for(routing_key).publish(self.exchange_name, routing_key, self.codec.encode(message),
+                                                   content_type=self.codec.content_type)
+        self._published.inc()
+
+    async def publish_many(self, messages):
+        """Publish (routing_key, message) pairs in one pipelined batch per broker, all brokers at once."""
+        encode = self.codec.encode
+        if len(self.brokers) == 1:
+            shards = {self.broker: [(routing_key, encode(message)) for routing_key, message in messages]}
+        else:
+            shards = {}
+            node_for = self.ring.node_for
+            for routing_key, message in messages:
+                if routing_key == BROADCAST_KEY:
+                    data = encode(message)
+                    for url in self.brokers:
+                        shards.setdefault(url, []).append((routing_key, data))
+                else:
+                    shards.setdefault(node_for(routing_key), []).append((routing_key, encode(message)))
+            shards = {self.brokers[url]: batch for url, batch in shards.items()}
+        await asyncio.gather(*(
+            broker.publish_many(self.exchange_name, batch, content_type=self.codec.content_type)
+            for broker, batch in shards.items()
+        ))
+        self._published.inc(sum(len(batch) for batch in shards.values()))
 
-    async def publish(self, routing_key: str, message: str):
-        await self.broker.publish("swarm", routing_key, message)
+    async def consume(self, queue_name: str, callback, prefetch_count: int = None, ready=None, bindings=None):
+        """
+        Consume messages from RabbitMQ; the callback receives each message as decoded by the codec.
+        Returns once the queue is declared and bound on its broker(s), setting the optional asyncio.Event
+        `ready` at that point.
+        :param bindings: Optional extra routing key patterns to bind the queue to, on the broker(s) it lives on.
+        """
+        decode = self.codec.decode
 
-    async def consume(self, queue_name: str, callback):
-        """Consume messages from RabbitMQ."""
         async def message_handler(message):
             async with message.process():
-                await callback(message.body.decode())
+                self._consumed.inc()
+                await callback(decode(message.body))
+
+        await self._subscribe(queue_name, lambda url: message_handler, prefetch_count, bindings)
+        if ready is not None:
+            ready.set()
+
+    def _shards_for(self, queue_name: str):
+        if "*" in queue_name or "#" in queue_name:
+            return list(self.ring.nodes)  # Matching keys may hash to any broker
+        return [self.ring.node_for(queue_name)]
+
+    async def _subscribe(self, queue_name: str, handler_for, prefetch_count, bindings=None):
+        subscription = [handler_for, prefetch_count, tuple(bindings or ()), set()]
+        self._subscriptions.setdefault(queue_name, []).append(subscription)
+        await self._subscribe_on(queue_name, subscription, self._shards_for(queue_name))
+
+    async def _subscribe_on(self, queue_name: str, subscription, urls):
+        handler_for, prefetch_count, bindings, subscribed = subscription
+        urls = [url for url in urls if url not in subscribed]
+        subscribed.update(urls)
+        await asyncio.gather(*(
+            self.brokers[url].consume(queue_name, handler_for(url), exchange_name=self.exchange_name,
+                                      prefetch_count=prefetch_count, bindings=bindings)
+            for url in urls
+        ))
+
+    async def add_broker(self, url: str) -> list:
+        """Connect to another broker, add it to the ring and rebalance; returns the queues that moved."""
+        if url in self.brokers:
+            raise ValueError(f"Broker '{url}' is already part of the backend.")
+        broker = self._make_broker(url)
+        await broker.connect()
+        self.brokers[url] = broker
+        self.ring.add(url)
+        return await self.rebalance()
+
+    async def remove_broker(self, url: str) -> list:
+        """
+        Take a broker off the ring, rebalance and close it; returns the queues that moved.
+        Messages still queued on it stay there (durable queues) until it is added again.
+        """
+        if url not in self.brokers:
+            raise ValueError(f"Broker '{url}' is not part of the backend.")
+        if len(self.brokers) == 1:
+            raise ValueError("Cannot remove the last broker.")
+        self.ring.remove(url)
+        moved = await self.rebalance()
+        broker = self.brokers.pop(url)
+        if broker is self.broker:
+            self.broker = self.brokers[self.ring.nodes[0]]
+        for subscriptions in self._subscriptions.values():
+            for *_, subscribed in subscriptions:
+                subscribed.discard(url)
+        await broker.close()
+        return moved
+
+    async def rebalance(self) -> list:
+        """
+        Subscribe every consumer on the broker its queue maps to now, e.g. after the ring changed.
+        Subscriptions on the previous broker stay open so messages already queued there are drained.
+        Returns the names of the queues that got a new broker.
+        """
+        moved = []
+        for queue_name, subscriptions in self._subscriptions.items():
+            shards = self._shards_for(queue_name)
+            for subscription in subscriptions:
+                urls = [url for url in shards if url not in subscription[3]]
+                if urls:
+                    await self._subscribe_on(queue_name, subscription, urls)
+                    if queue_name not in moved:
+                        moved.append(queue_name)
+        return moved
+
+    async def consume_batch(self, queue_name: str, handler, max_batch: int = 100, max_wait_ms: float = 10,
+                            concurrency: int = 1, ready=None, bindings=None):
+        """
+        Consume messages in batches: `await handler(messages)` receives lists of up to max_batch decoded
+        messages, handed over when full or max_wait_ms after the first one arrived. The consumer's
+        prefetch is max_batch * concurrency, so every concurrent batch can fill up. Successful batches
+        are acknowledged with one multiple-ack per contiguous run of finished deliveries; the messages
+        of a failed batch are rejected.
+        :param concurrency: Maximum number of batches handled at once.
+        :param ready: Optional asyncio.Event set once the queue is bound on its broker(s).
+        :param bindings: Optional extra routing key patterns to bind the queue to.
+        """
+        deliveries = BoundedQueue(name=queue_name)  # Bounded by the prefetch count of each broker
+        decode = self.codec.decode
+
+        def on_message_for(url):
+            acks = None  # Tracker of the channel deliveries from this broker currently arrive on
+
+            async def on_message(message):
+                nonlocal acks
+                # Delivery tags are per channel and restart when a robust connection restores it
+                if acks is None or acks.channel is not message.channel:
+                    if acks is not None:
+                        acks.close()
+                    acks = _AckTracker(message.channel)
+                acks.track(message)
+                deliveries.put_nowait((acks, message))
+
+            return on_message
+
+        async def handle(batch):
+            try:
+                await handler([decode(message.body) for _, message in batch])
+            except Exception:
+                for acks, message in batch:
+                    if not acks.closed:
+                        await message.reject(requeue=False)
+                await self._settle(batch, acked=False)
+                raise
+            self._consumed.inc(len(batch))
+            await self._settle(batch)
+
+        await self._subscribe(queue_name, on_message_for, max_batch * concurrency, bindings)
+        if ready is not None:
+            ready.set()
+        await consume_batches(deliveries, handle, max_batch, max_wait_ms / 1000, concurrency)
+
+    @staticmethod
+    async def _settle(batch, acked: bool = True):
+        by_tracker = {}
+        for acks, message in batch:
+            by_tracker.setdefault(acks, []).append(message)
+        for acks, messages in by_tracker.items():
+            await acks.settle(messages, acked)
+
+
+class _AckTracker:
+    """
+    Acknowledges the deliveries of one channel in order, with one multiple-ack per contiguous run of
+    finished ones. Once the channel is gone its tags are void: the broker redelivers the unacknowledged
+    messages on the channel replacing it, which gets a tracker of its own.
+    """
+
+    def __init__(self, channel=None):
+        self.channel = channel
+        self.closed = False
+        self._pending = []  # Delivery tags not settled yet, ascending
+        self._finished = {}  # Delivery tag -> message to ack, or None if it was rejected
+        self._lock = asyncio.Lock()  # Keeps acks in tag order when batches finish concurrently
+
+    def track(self, message):
+        insort(self._pending, message.delivery_tag)
 
-        await self.broker.consume(queue_name, message_handler)
+    def close(self):
+        """The channel was closed or replaced: forget its pending tags."""
+        self.closed = True
+        self._pending.clear()
+        self._finished.clear()
 
+    async def settle(self, messages, acked: bool = True):
+        if self.closed:
+            return
+        for message in messages:
+            self._finished[message.delivery_tag] = message if acked else None
+        async with self._lock:
+            last = None
+            while self._pending and self._pending[0] in self._finished:
+                message = self._finished.pop(self._pending.pop(0))
+                if message is not None:
+                    last = message
+            if last is not None:
+                try:
+                    await last.ack(multiple=True)
+                except Exception:
+                    if not getattr(self.channel, "is_closed", False):
+                        raise
+                    self.close()  # Closed before a message of the new channel told us
@@ -0,0 +1,66 @@
+import importlib
+
+ENTRY_POINT_GROUP = "agentex.backends"
+
+# Built-in backends, imported only when a swarm uses them. Third-party backends are registered with
+# register_backend() or advertised under the "agentex.backends" entry point group.
+_BACKENDS = {
+    "local": "agentex.backends.local_backend:LocalMessageBackend",
+    "rabbitmq": "agentex.backends.rabbitmq_backend:RabbitMQBackend",
+    "multiprocess": "agentex.backends.multiprocess_backend:MultiprocessBackend",
+}
+
+# Extras providing the optional dependencies of the built-in backends
+_EXTRAS = {"rabbitmq": "rabbitmq"}
+
+
+def register_backend(name: str, factory):
+    """
+    Make a backend available as Swarm(backend=name).
+    :param factory: A backend class with a from_config(config, metrics=None, codec=None) classmethod, any
+                    callable with that signature, or a "module:attribute" string naming one, imported on
+                    first use.
+    """
+    _BACKENDS[name] = factory
+
+
+def available_backends() -> list:
+    """Names of the registered and entry point backends, without importing them."""
+    return sorted({*_BACKENDS, *(entry_point.name for entry_point in _entry_points())})
+
+
+def get_backend(name: str):
+    """The backend factory registered under a name, importing it (and its dependencies) now."""
+    factory = _BACKENDS.get(name)
+    if factory is None:
+        for entry_point in _entry_points():
+            if entry_point.name == name:
+                factory = _BACKENDS[name] = entry_point.load()
+                break
+        else:
+            raise ValueError(f"Unknown backend: {name}. Available backends: {', '.join(available_backends())}.")
+    if isinstance(factory, str):
+        module_name, _, attribute = factory.partition(":")
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            extra = _EXTRAS.get(name)
+            hint = f" Install it with: pip install 'agentex[{extra}]'" if extra else ""
+            raise ImportError(f"The '{name}' backend needs a missing dependency ({e.name}).{hint}") from e
+        factory = _BACKENDS[name] = getattr(module, attribute)
+    return factory
+
+
+def create_backend(name: str, config=None, metrics=None, codec=None):
+    """Build the backend registered under a name from its configuration."""
+    factory = get_backend(name)
+    return getattr(factory, "from_config", factory)(config, metrics=metrics, codec=codec)
+
+
+def _entry_points():
+    from importlib import metadata  # Only read when a backend is not registered by name
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=ENTRY_POINT_GROUP)
+    return entry_points.get(ENTRY_POINT_GROUP, ())
@@ -0,0 +1,2 @@
+from .hooks import Hooks
+from .monitors import LoopLagMonitor, SlowCallbackDetector, current_task
@@ -0,0 +1,77 @@
+import time
+from agentex.logger.logger import get_logger
+
+logger = get_logger()
+
+EVENTS = ("before_execute", "after_execute", "before_message", "after_message")
+
+
+class Hooks:
+    """
+    Callbacks run around task execution and message handling, e.g. to start and end tracing spans or
+    to switch a sampling profiler on for one task type. Every swarm has one (Swarm.hooks):
+
+        swarm.hooks.add("before_execute", lambda agent, task: spans.start(task.id, task.task_type))
+        swarm.hooks.add("after_execute", lambda agent, task, seconds: spans.end(task.id, task.status))
+
+    before_execute(agent, task) and after_execute(agent, task, seconds) run around Agent.execute_task;
+    task.status tells the outcome. before_message(queue_name, message) and after_message(queue_name,
+    message, seconds) run around the callbacks of Swarm.consume_messages() (message is the list of
+    messages for Swarm.consume_batches()) and apply to consumers started after the hook was added.
+    Hooks are synchronous and run on the event loop; errors they raise are logged and ignored.
+    Without hooks, the cost is one attribute check per task.
+    """
+
+    def __init__(self):
+        self._hooks = {event: [] for event in EVENTS}
+        self.executing = False  # Whether any execute hook is registered
+        self.messaging = False  # Whether any message hook is registered
+
+    def add(self, event: str, hook):
+        """Register a hook for an event and return it."""
+        if event not in self._hooks:
+            raise ValueError(f"Unknown hook event '{event}'. Expected one of {EVENTS}.")
+        self._hooks[event].append(hook)
+        self._refresh()
+        return hook
+
+    def remove(self, event: str, hook):
+        if event not in self._hooks:
+            raise ValueError(f"Unknown hook event '{event}'. Expected one of {EVENTS}.")
+        self._hooks[event].remove(hook)
+        self._refresh()
+
+    def _refresh(self):
+        self.executing = bool(self._hooks["before_execute"] or self._hooks["after_execute"])
+        self.messaging = bool(self._hooks["before_message"] or self._hooks["after_message"])
+
+    def _run(self, event: str, *args):
+        for hook in self._hooks[event]:
+            try:
+                hook(*args)
+            except Exception as e:
+                logger.error("The %s hook %r failed: %s", event, hook, e, exc_info=True)
+
+    def before_execute(self, agent, task):
+        self._run("before_execute", agent, task)
+
+    def after_execute(self, agent, task, seconds: float):
+        self._run("after_execute", agent, task, seconds)
+
+    def before_message(self, queue_name: str, message):
+        self._run("before_message", queue_name, message)
+
+    def after_message(self, queue_name: str, message, seconds: float):
+        self._run("after_message", queue_name, message, seconds)
+
+    def observe(self, queue_name: str, callback):
+        """Wrap a message callback so the message hooks run around it."""
+        async def observed(message):
+            self.before_message(queue_name, message)
+            started = time.perf_counter()
+            try:
+                await callback(message)
+            finally:
+                self.after_message(queue_name, message, time.perf_counter() - started)
+
+        return observed
@@ -0,0 +1,186 @@
+import asyncio
+import contextvars
+import time
+from asyncio import events
+from collections import defaultdict
+from agentex.logger.logger import get_logger
+from agentex.metrics.registry import default_registry
+
+logger = get_logger()
+
+# The task whose execution a piece of code belongs to, set while SlowCallbackDetector is running
+_current_task = contextvars.ContextVar("agentex_current_task", default=None)
+
+_detectors = []  # Running SlowCallbackDetectors
+_original_run = None  # asyncio Handle._run while it is patched
+_entered = None  # Last task entered during the current callback, for tasks finishing within one callback
+
+
+def current_task():
+    """The task being executed in the current context, while a SlowCallbackDetector runs; otherwise None."""
+    return _current_task.get()
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a timer scheduled every `interval` seconds. The lag is the
+    time the loop spent on other callbacks, i.e. how long every agent and consumer was blocked.
+    Lags are recorded in the agentex_loop_lag_seconds histogram; lags of at least `threshold` are
+    logged and passed to on_lag(seconds).
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, metrics=None, on_lag=None):
+        """
+        :param interval: Seconds between two measurements.
+        :param threshold: Lag in seconds counted as a stall.
+        :param metrics: MetricsRegistry receiving the lag histogram (default: the global one).
+        :param on_lag: Optional callback receiving the lag in seconds of every stall.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+        self.interval = interval
+        self.threshold = threshold
+        self.on_lag = on_lag
+        self.metrics = metrics or default_registry
+        self.stalls = 0  # Measurements of at least threshold seconds
+        self.max_lag = 0.0
+        self._lag = self.metrics.histogram("agentex_loop_lag_seconds", "Delay of the event loop running a timer.")
+        self._timer = None
+        self._due = None
+
+    @property
+    def running(self) -> bool:
+        return self._timer is not None
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("The loop lag monitor is already running.")
+        self._schedule(asyncio.get_running_loop())
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule(self, loop):
+        self._due = loop.time() + self.interval
+        self._timer = loop.call_at(self._due, self._tick, loop)
+
+    def _tick(self, loop):
+        lag = max(0.0, loop.time() - self._due)
+        self._lag.observe(lag)
+        if lag > self.max_lag:
+            self.max_lag = lag
+        if lag >= self.threshold:
+            self.stalls += 1
+            logger.warning("Event loop blocked for %.3fs.", lag)
+            if self.on_lag is not None:
+                self.on_lag(lag)
+        self._schedule(loop)
+
+
+class SlowCallbackDetector:
+    """
+    Times every callback the event loop runs and attributes the ones taking at least `threshold`
+    seconds to the task they ran for (task type and id), or to the callback itself outside tasks.
+    This is what asyncio's debug mode reports, without its other overhead and with task attribution.
+    While running, it times every callback (two clock reads each); stop it to remove all overhead.
+    Only the standard asyncio event loop is instrumented.
+
+        detector = SlowCallbackDetector(swarm.hooks, metrics=swarm.metrics)
+        detector.start()
+        ...
+        detector.top()  # [(task_type, blocked seconds, slow callbacks), ...]
+    """
+
+    def __init__(self, hooks, threshold: float = 0.05, metrics=None, on_slow=None):
+        """
+        :param hooks: The Hooks of the swarm whose task executions are attributed (Swarm.hooks).
+        :param threshold: Seconds a callback must run to be reported.
+        :param metrics: MetricsRegistry receiving agentex_slow_callback_seconds per task type.
+        :param on_slow: Optional callback receiving (seconds, task or None, description) of every slow callback.
+        """
+        self.hooks = hooks
+        self.threshold = threshold
+        self.on_slow = on_slow
+        self.metrics = metrics or default_registry
+        self.blocked = defaultdict(float)  # task type ("" outside tasks) -> seconds spent in slow callbacks
+        self.counts = defaultdict(int)  # task type -> number of slow callbacks
+        self._histograms = {}
+
+    @property
+    def running(self) -> bool:
+        return self in _detectors
+
+    def start(self):
+        global _original_run
+        if self.running:
+            raise RuntimeError("The slow callback detector is already running.")
+        if _original_run is None:
+            _original_run = events.Handle._run
+            events.Handle._run = _timed_run
+        _detectors.append(self)
+        self.hooks.add("before_execute", self._enter)
+        self.hooks.add("after_execute", self._exit)
+
+    def stop(self):
+        global _original_run
+        if not self.running:
+            return
+        _detectors.remove(self)
+        self.hooks.remove("before_execute", self._enter)
+        self.hooks.remove("after_execute", self._exit)
+        if not _detectors:
+            events.Handle._run = _original_run
+            _original_run = None
+
+    def top(self, n: int = 10):
+        """The task types that blocked the loop longest: (task_type, seconds, slow callbacks), worst first."""
+        worst = sorted(self.blocked.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(task_type, seconds, self.counts[task_type]) for task_type, seconds in worst]
+
+    @staticmethod
+    def _enter(agent, task):
+        global _entered
+        _current_task.set(task)
+        _entered = task
+
+    @staticmethod
+    def _exit(agent, task, seconds):
+        _current_task.set(None)
+
+    def _record(self, handle, seconds: float, entered):
+        context = getattr(handle, "_context", None)
+        task = context.get(_current_task) if context is not None else None
+        if task is None:
+            task = entered
+        task_type = task.task_type if task is not None else ""
+        self.blocked[task_type] += seconds
+        self.counts[task_type] += 1
+        histogram = self._histograms.get(task_type)
+        if histogram is None:
+            histogram = self._histograms[task_type] = self.metrics.histogram(
+                "agentex_slow_callback_seconds", "Event loop callbacks running longer than the threshold.",
+                task_type=task_type)
+        histogram.observe(seconds)
+        if task is not None:
+            description = f"task {task.task_id} ({task.task_type})"
+            logger.warning("Event loop blocked for %.3fs by %s.", seconds, description, extra=task.log_fields())
+        else:
+            description = repr(handle)
+            logger.warning("Event loop blocked for %.3fs by %s.", seconds, description)
+        if self.on_slow is not None:
+            self.on_slow(seconds, task, description)
+
+
+def _timed_run(handle):
+    global _entered
+    _entered = None
+    started = time.perf_counter()
+    try:
+        _original_run(handle)
+    finally:
+        elapsed = time.perf_counter() - started
+        for detector in _detectors:
+            if elapsed >= detector.threshold:
+                detector._record(handle, elapsed, _entered)
@@ -0,0 +1 @@
+from .logger import LoggerWrapper, get_logger
\ No newline at end of file
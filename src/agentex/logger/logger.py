@@ -1,19 +1,61 @@
-from exlog import ExLog  # Import ExLog as a mandatory dependency
+import atexit
 import logging  # For fallback if user prefers standard logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Level names accepted by the logging methods, mapped straight to standard logging levels.
+_STANDARD_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING,
+                    "error": logging.ERROR, "critical": logging.CRITICAL}
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Hands log records to a queue drained by a background thread, so the caller (typically the
+    event loop) never blocks on stream or file I/O; the listener starts with the first record.
+    As with QueueHandler, the arguments and any traceback are merged into the message before the
+    record is queued, since they may change once the logging call returns; the handler's formatter
+    and the I/O run on the listener thread.
+    """
+
+    def __init__(self, handler):
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(self.queue, handler, respect_handler_level=True)
+        self._started = False
+        atexit.register(self.stop)  # Flush pending records on exit
+
+    def emit(self, record):
+        if not self._started:
+            self._started = True
+            self.listener.start()
+        super().emit(record)
+
+    def stop(self):
+        """Write out the queued records and stop the listener thread; the next record starts it again."""
+        if self._started:
+            self._started = False
+            self.listener.stop()
+
 
 class LoggerWrapper:
     """
     A unified logging class that allows the user to choose between ExLog and standard logging.
     """
 
-    def __init__(self, log_level=1, use_exlog=True):
+    def __init__(self, log_level=1, use_exlog=True, name="AgentExLogger", background=False):
         """
         Initialize the logger with the specified log level and logging backend.
+        :param name: Name of the standard logger (ignored with ExLog).
+        :param background: With standard logging, write records from a background thread
+                           (see BackgroundQueueHandler) instead of the calling thread. The logger then
+                           does not propagate to the root logger's handlers.
         """
         self.log_level = self._convert_log_level(log_level)
         self.use_exlog = use_exlog
+        self.name = name
+        self.background = background
 
         if self.use_exlog:
+            from exlog import ExLog  # Imported only when ExLog output is requested
             self.logger = ExLog(log_level=self.log_level)
         else:
             self.logger = self._setup_standard_logger(self.log_level)
@@ -38,18 +80,27 @@ class LoggerWrapper:
         """
         Set up a standard Python logger.
         """
-        logger = logging.getLogger("AgentExLogger")
+        logger = logging.getLogger(self.name)
         if log_level == 0:
             logger.disabled = True  # Disable all logging output
         else:
             logger.setLevel(self._map_log_level(log_level))
-            if not logger.hasHandlers():
-                handler = logging.StreamHandler()
-                formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-                handler.setFormatter(formatter)
-                logger.addHandler(handler)
+            if self.background:
+                # Only the queue handler may run on the caller's thread: records must not also reach
+                # handlers of the root logger (e.g. from logging.basicConfig()) through propagation.
+                logger.propagate = False
+                if not any(isinstance(handler, BackgroundQueueHandler) for handler in logger.handlers):
+                    logger.addHandler(BackgroundQueueHandler(self._stream_handler()))
+            elif not logger.hasHandlers():
+                logger.addHandler(self._stream_handler())
         return logger
 
+    @staticmethod
+    def _stream_handler():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        return handler
+
     def _map_log_level(self, log_level):
         """
         Map ExLog-style log levels to standard Python logging levels.
@@ -76,40 +127,59 @@ class LoggerWrapper:
             log_method = getattr(self.logger, level, self.logger.info)
             log_method(message)
 
-    def log(self, message, level="info", **kwargs):
+    def is_enabled_for(self, level="info"):
         """
-        Unified logging method for ExLog and standard logging.
+        Cheap check of whether a message at this level would be emitted.
+        Use it to skip building expensive log arguments on hot paths.
         """
         if self.log_level == 0:
-            return  # Silent mode, do not log anything
+            return False
+        if self.use_exlog:
+            return self._convert_log_level(level) >= self.log_level
+        standard_level = _STANDARD_LEVELS.get(level)
+        if standard_level is None:
+            standard_level = self._map_log_level(self._convert_log_level(level))
+        return self.logger.isEnabledFor(standard_level)
+
+    def log(self, message, level="info", *args, **kwargs):
+        """
+        Unified logging method for ExLog and standard logging.
+        Extra positional arguments are %-formatted into the message only if it is emitted.
+        With standard logging, extra={...} attaches structured fields (e.g. task_id) to the record.
+        """
+        if not self.is_enabled_for(level):
+            return  # Skip formatting entirely
 
         if self.use_exlog:
-            # Call ExLog's dprint with all arguments
-            self.logger.dprint(message, level=level, **kwargs)
+            # Call ExLog's dprint with all arguments; it has no structured fields
+            kwargs.pop("extra", None)
+            self.logger.dprint(message % args if args else message, level=level, **kwargs)
         else:
             # Standard logging: dynamically call the method (e.g., .info(), .debug())
             log_method = getattr(self.logger, level.lower(), self.logger.info)
-            log_method(message)
+            log_method(message, *args, **{key: kwargs[key] for key in self._STANDARD_KWARGS if key in kwargs})
+
+    _STANDARD_KWARGS = ("extra", "exc_info", "stack_info")
 
-    def info(self, message, **kwargs):
+    def info(self, message, *args, **kwargs):
         """Standard logging: info-level log or ExLog equivalent."""
-        self.log(message, level="info", **kwargs)
+        self.log(message, "info", *args, **kwargs)
 
-    def debug(self, message, **kwargs):
+    def debug(self, message, *args, **kwargs):
         """Standard logging: debug-level log or ExLog equivalent."""
-        self.log(message, level="debug", **kwargs)
+        self.log(message, "debug", *args, **kwargs)
 
-    def warning(self, message, **kwargs):
+    def warning(self, message, *args, **kwargs):
         """Standard logging: warning-level log or ExLog equivalent."""
-        self.log(message, level="warning", **kwargs)
+        self.log(message, "warning", *args, **kwargs)
 
-    def error(self, message, **kwargs):
+    def error(self, message, *args, **kwargs):
         """Standard logging: error-level log or ExLog equivalent."""
-        self.log(message, level="error", **kwargs)
+        self.log(message, "error", *args, **kwargs)
 
-    def critical(self, message, **kwargs):
+    def critical(self, message, *args, **kwargs):
         """Standard logging: critical-level log or ExLog equivalent."""
-        self.log(message, level="critical", **kwargs)
+        self.log(message, "critical", *args, **kwargs)
 
     def set_log_level(self, log_level):
         """
@@ -124,6 +194,20 @@ class LoggerWrapper:
                 self.logger.setLevel(self._map_log_level(self.log_level))
 
 
+_framework_logger = None
+
+
+def get_logger():
+    """
+    The LoggerWrapper used by AgentEx internals: standard logging under the name "agentex",
+    level info, written to stderr by a background thread whatever the root logger is configured with.
+    Change its level with get_logger().set_log_level().
+    """
+    global _framework_logger
+    if _framework_logger is None:
+        _framework_logger = LoggerWrapper(log_level="info", use_exlog=False, name="agentex", background=True)
+    return _framework_logger
+
 
 # Usage Example: Using LoggerWrapper like standard logging without needing to do logger.logger.method()
 # logger = LoggerWrapper(log_level="info", use_exlog=False)  # Uses standard logging
@@ -0,0 +1,2 @@
+from .envelope import Envelope
+from .codec import Codec, EnvelopeCodec, TextCodec
\ No newline at end of file
@@ -0,0 +1,141 @@
+import json
+import struct
+import zlib
+from .envelope import Envelope
+
+# Body kinds, stored in the two low bits of the flags byte.
+BINARY = 0
+TEXT = 1
+JSON = 2
+
+COMPRESSED = 0x04  # The body is zlib-compressed
+ENVELOPE = 0x08  # The publisher sent an Envelope, so the consumer receives one
+
+MAGIC = b"AX"
+VERSION = 1
+# magic, version, flags, timestamp, task_id, message type length, headers length
+HEADER = struct.Struct("!2sBBdQHI")
+PROBE_SIZE = 4096
+# Headers of bare (non-Envelope) messages only depend on the flags, so they are packed once.
+_BARE_HEADERS = [HEADER.pack(MAGIC, VERSION, flags, 0.0, 0, 0, 0) for flags in range(8)]
+
+
+class Codec:
+    """Turns messages into bytes for a backend and back. Subclasses implement encode() and decode()."""
+
+    content_type = "application/octet-stream"
+
+    def encode(self, message) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data):
+        raise NotImplementedError
+
+
+class TextCodec(Codec):
+    """The original wire format: messages are UTF-8 strings."""
+
+    content_type = "text/plain"
+
+    def encode(self, message) -> bytes:
+        return message.encode() if isinstance(message, str) else bytes(message)
+
+    def decode(self, data) -> str:
+        return str(data, "utf-8")
+
+
+class EnvelopeCodec(Codec):
+    """
+    Compact binary envelope: a fixed 26-byte header, the message type, optional JSON headers and the body.
+    str, bytes-like and JSON-serializable bodies are accepted and come back as the same kind of value;
+    bytes-like bodies are neither encoded nor copied on the way out (beyond framing) and are returned
+    as a memoryview into the received frame. Data without the envelope header is decoded as UTF-8
+    text, so messages from publishers using TextCodec can still be consumed.
+    """
+
+    content_type = "application/x-agentex-envelope"
+
+    def __init__(self, compress_threshold: int = 16384, compress_level: int = 1):
+        """
+        :param compress_threshold: Bodies of at least this many bytes are zlib-compressed when that makes
+                                   them smaller. None disables compression.
+        :param compress_level: zlib level; 1 favours speed over ratio.
+        """
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def encode(self, message) -> bytes:
+        if isinstance(message, Envelope):
+            envelope, flags, body = message, ENVELOPE, message.body
+        else:
+            envelope, flags, body = None, 0, message
+
+        if isinstance(body, str):
+            body = body.encode()
+            size = len(body)
+            flags |= TEXT
+        elif isinstance(body, (bytes, bytearray)):
+            size = len(body)
+        elif isinstance(body, memoryview):
+            size = body.nbytes
+        else:
+            body = json.dumps(body, separators=(",", ":")).encode()
+            size = len(body)
+            flags |= JSON
+
+        if self.compress_threshold is not None and size >= self.compress_threshold and self._compressible(body):
+            compressed = zlib.compress(body, self.compress_level)
+            if len(compressed) < size:
+                body = compressed
+                flags |= COMPRESSED
+
+        if envelope is None:
+            return b"".join((_BARE_HEADERS[flags], body))
+        message_type = envelope.message_type.encode()
+        headers = json.dumps(envelope.headers, separators=(",", ":")).encode() if envelope.headers else b""
+        header = HEADER.pack(MAGIC, VERSION, flags, envelope.timestamp, envelope.task_id,
+                             len(message_type), len(headers))
+        return b"".join((header, message_type, headers, body))
+
+    def _compressible(self, body) -> bool:
+        """Compress a 4 KiB sample first, so incompressible bodies (media, ciphertext) skip zlib entirely."""
+        sample = memoryview(body).cast("B")[:PROBE_SIZE]
+        return len(zlib.compress(sample, self.compress_level)) < len(sample) * 0.9
+
+    def decode(self, data):
+        if len(data) < HEADER.size or data[:2] != MAGIC:
+            return str(data, "utf-8")
+        magic, version, flags, timestamp, task_id, type_length, headers_length = HEADER.unpack_from(data)
+        if flags & ENVELOPE:
+            valid = HEADER.size + type_length + headers_length <= len(data)
+        else:
+            valid = data[:HEADER.size] == _BARE_HEADERS[flags & 0x07]
+        if version != VERSION or flags & ~0x0F or flags & 0x03 == 0x03 or not valid:
+            # Text from a TextCodec publisher that happens to start with the magic bytes
+            try:
+                return str(data, "utf-8")
+            except UnicodeDecodeError:
+                raise ValueError(f"Malformed or unsupported envelope (version {version}).") from None
+
+        view = memoryview(data)
+        offset = HEADER.size
+        if not flags & ENVELOPE:
+            return self._decode_body(view[offset:], flags)
+        message_type = str(view[offset:offset + type_length], "utf-8")
+        offset += type_length
+        headers = json.loads(str(view[offset:offset + headers_length], "utf-8")) if headers_length else {}
+        offset += headers_length
+
+        body = self._decode_body(view[offset:], flags)
+        return Envelope(body, message_type=message_type, task_id=task_id, timestamp=timestamp, headers=headers)
+
+    @staticmethod
+    def _decode_body(body, flags: int):
+        if flags & COMPRESSED:
+            body = zlib.decompress(body)
+        kind = flags & 0x03
+        if kind == TEXT:
+            return str(body, "utf-8")
+        if kind == JSON:
+            return json.loads(str(body, "utf-8"))
+        return body
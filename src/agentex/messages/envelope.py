@@ -0,0 +1,35 @@
+import time
+
+
+class Envelope:
+    """
+    A message body together with the headers AgentEx routes on.
+    Publishing an Envelope (rather than a bare body) delivers an Envelope to the consumer, so the
+    receiving side can read the message type, task id, send time and extra headers.
+    """
+
+    __slots__ = ("body", "message_type", "task_id", "timestamp", "headers")
+
+    def __init__(self, body, message_type: str = "message", task_id: int = 0, timestamp: float = None,
+                 headers=None):
+        """
+        :param body: str, bytes, bytearray, memoryview or any JSON-serializable value.
+        :param message_type: Application defined kind of message (e.g. "task", "result").
+        :param task_id: Integer id of the task the message belongs to, 0 if none.
+        :param timestamp: Send time in seconds since the epoch (default: now).
+        :param headers: Optional dict of extra JSON-serializable headers.
+        """
+        self.body = body
+        self.message_type = message_type
+        self.task_id = task_id
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.headers = headers or {}
+
+    def __eq__(self, other):
+        if not isinstance(other, Envelope):
+            return NotImplemented
+        return (self.message_type, self.task_id, self.timestamp, self.headers) == \
+            (other.message_type, other.task_id, other.timestamp, other.headers) and self.body == other.body
+
+    def __repr__(self):
+        return f"Envelope(message_type={self.message_type!r}, task_id={self.task_id}, body={self.body!r})"
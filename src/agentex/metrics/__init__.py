@@ -0,0 +1,2 @@
+from .registry import MetricsRegistry, Counter, Histogram, TaskMetrics, default_registry
+from .exporter import render_prometheus, serve_metrics
\ No newline at end of file
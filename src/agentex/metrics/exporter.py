@@ -0,0 +1,48 @@
+def _format_labels(labels: dict, extra=None) -> str:
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+
+def render_prometheus(registry) -> str:
+    """Render a MetricsRegistry in the Prometheus text exposition format."""
+    lines = []
+    described = set()
+    for name, kind, help, labels, metric in registry.collect():
+        if name not in described:
+            described.add(name)
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            cumulative = 0
+            for bound, bucket_count in zip(metric.buckets, metric.counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, {'le': repr(float(bound))})} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {metric.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+        else:
+            value = metric.value if kind == "counter" else metric
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(registry, host: str = "0.0.0.0", port: int = 9100, path: str = "/metrics"):
+    """
+    Serve the registry over HTTP for Prometheus scraping, using aiohttp.
+    Returns the aiohttp AppRunner; call `await runner.cleanup()` to stop serving.
+    """
+    from aiohttp import web  # Only needed when the exporter is used
+
+    async def handle(request):
+        return web.Response(text=render_prometheus(registry), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get(path, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
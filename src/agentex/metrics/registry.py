@@ -0,0 +1,219 @@
+import time
+import weakref
+from bisect import bisect_left
+
+# Latency buckets in seconds, from sub-millisecond queue hops to minute-long tasks.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    """A monotonically increasing count."""
+    __slots__ = ("value",)
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    """Counts observations into fixed buckets; recording is one bisect and three additions."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+    kind = "histogram"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        """Estimate a quantile (0..1) by linear interpolation inside the bucket that contains it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower  # Beyond the largest bucket
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Holds the counters and histograms recorded by the framework, plus gauge collectors that are
+    only evaluated when metrics are read (queue depths cost nothing between reads).
+    Components look a metric up once and keep the returned object, so recording is a plain
+    attribute update.
+    """
+
+    def __init__(self):
+        self._metrics = {}  # name -> {labels tuple: Counter | Histogram}
+        self._help = {}
+        self._collectors = []  # References to callables yielding (name, labels dict, value) gauge samples
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get(name, help, labels, Counter)
+
+    def histogram(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS, **labels) -> Histogram:
+        return self._get(name, help, labels, lambda: Histogram(buckets))
+
+    def register_collector(self, collector, help=None):
+        """
+        Add a gauge source evaluated on every read.
+        :param collector: Callable returning an iterable of (name, labels dict, value). Bound methods are
+                          held weakly, so registering does not keep their object alive.
+        :param help: Optional {name: help text} for the gauges it yields.
+        """
+        if hasattr(collector, "__self__"):
+            self._collectors.append(weakref.WeakMethod(collector))
+        else:
+            self._collectors.append(lambda: collector)
+        self._help.update(help or {})
+
+    def _get(self, name, help, labels, factory):
+        series = self._metrics.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        metric = series.get(key)
+        if metric is None:
+            metric = series[key] = factory()
+            if help:
+                self._help[name] = help
+        return metric
+
+    def collect(self):
+        """
+        Yield (name, kind, help, labels dict, metric or gauge value) for every series, grouped by name.
+        Gauge samples that several collectors yield with the same name and labels (e.g. the queue depths
+        of two TaskManagers sharing the registry) are summed into one series, as their counters are.
+        """
+        for name, series in self._metrics.items():
+            for key, metric in series.items():
+                yield name, metric.kind, self._help.get(name, ""), dict(key), metric
+        self._collectors = [ref for ref in self._collectors if ref() is not None]
+        gauges = {}  # name -> {labels tuple: value}
+        for ref in self._collectors:
+            for name, labels, value in ref()():
+                series = gauges.setdefault(name, {})
+                key = tuple(sorted(labels.items()))
+                series[key] = series.get(key, 0) + value
+        for name, series in gauges.items():
+            for key, value in series.items():
+                yield name, "gauge", self._help.get(name, ""), dict(key), value
+
+    def snapshot(self) -> dict:
+        """
+        Current values as plain data: {"time": ..., "metrics": {name: [sample, ...]}}.
+        Histogram samples include count, sum and p50/p95/p99 estimates in seconds.
+        """
+        metrics = {}
+        for name, kind, _, labels, metric in self.collect():
+            sample = {"labels": labels}
+            if kind == "histogram":
+                sample.update(count=metric.count, sum=metric.sum, p50=metric.quantile(0.5),
+                              p95=metric.quantile(0.95), p99=metric.quantile(0.99))
+            else:
+                sample["value"] = metric.value if kind == "counter" else metric
+            metrics.setdefault(name, []).append(sample)
+        return {"time": time.monotonic(), "metrics": metrics}
+
+    @staticmethod
+    def rates(before: dict, after: dict) -> dict:
+        """
+        Per-second rates of the counters between two snapshots, e.g. publish and consume rates:
+        {name: [{"labels": ..., "rate": ...}, ...]}.
+        """
+        elapsed = after["time"] - before["time"]
+        previous = {
+            (name, tuple(sorted(sample["labels"].items()))): sample["value"]
+            for name, samples in before["metrics"].items() for sample in samples if "value" in sample
+        }
+        rates = {}
+        for name, samples in after["metrics"].items():
+            for sample in samples:
+                key = (name, tuple(sorted(sample["labels"].items())))
+                if key in previous and elapsed > 0:
+                    rates.setdefault(name, []).append(
+                        {"labels": sample["labels"], "rate": (sample["value"] - previous[key]) / elapsed})
+        return rates
+
+
+class TaskMetrics:
+    """Per task type latency histograms and outcome counters, cached so each record is one lookup."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._series = {}  # (name, task_type) -> metric
+
+    def _metric(self, factory, name: str, help: str, task_type: str):
+        metric = self._series.get((name, task_type))
+        if metric is None:
+            metric = self._series[(name, task_type)] = factory(name, help, task_type=task_type)
+        return metric
+
+    def observe_wait(self, task_type: str, seconds: float):
+        self._metric(self.registry.histogram, "agentex_task_wait_seconds",
+                     "Time from enqueue to start of a task.", task_type).observe(seconds)
+
+    def observe_run(self, task_type: str, seconds: float, succeeded: bool):
+        self._metric(self.registry.histogram, "agentex_task_run_seconds",
+                     "Time from start to finish of a task attempt.", task_type).observe(seconds)
+        if succeeded:
+            self._metric(self.registry.counter, "agentex_tasks_completed_total",
+                         "Tasks completed successfully.", task_type).inc()
+        else:
+            self._metric(self.registry.counter, "agentex_task_failures_total",
+                         "Failed task attempts.", task_type).inc()
+
+    def run_quantile(self, task_type: str, q: float, min_samples: int = 20):
+        """Estimated quantile of a task type's attempt durations, or None before min_samples attempts."""
+        histogram = self._series.get(("agentex_task_run_seconds", task_type))
+        if histogram is None or histogram.count < min_samples:
+            return None
+        return histogram.quantile(q)
+
+    def count_timeout(self, task_type: str):
+        self._metric(self.registry.counter, "agentex_task_timeouts_total",
+                     "Task attempts stopped after exceeding their timeout.", task_type).inc()
+
+    def count_hedge(self, task_type: str, won: bool = False):
+        if won:
+            self._metric(self.registry.counter, "agentex_task_hedges_won_total",
+                         "Tasks finished by their speculative copy.", task_type).inc()
+        else:
+            self._metric(self.registry.counter, "agentex_task_hedges_total",
+                         "Speculative copies started for slow tasks.", task_type).inc()
+
+    def count_retry(self, task_type: str):
+        self._metric(self.registry.counter, "agentex_task_retries_total",
+                     "Failed tasks re-enqueued for another attempt.", task_type).inc()
+
+    def count_dead_letter(self, task_type: str):
+        self._metric(self.registry.counter, "agentex_tasks_dead_lettered_total",
+                     "Tasks moved to the dead-letter queue.", task_type).inc()
+
+    def count_expired(self, task_type: str):
+        self._metric(self.registry.counter, "agentex_tasks_expired_total",
+                     "Tasks whose deadline passed while queued.", task_type).inc()
+
+    def count_cache_hit(self, task_type: str, coalesced: bool):
+        if coalesced:
+            self._metric(self.registry.counter, "agentex_tasks_coalesced_total",
+                         "Submissions joined to an equal task already queued or running.", task_type).inc()
+        else:
+            self._metric(self.registry.counter, "agentex_task_cache_hits_total",
+                         "Submissions answered from the result cache.", task_type).inc()
+
+
+default_registry = MetricsRegistry()
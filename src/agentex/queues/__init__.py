@@ -0,0 +1,2 @@
+from .bounded_queue import BoundedQueue, BLOCK, REJECT, DROP_OLDEST
+from .batching import consume_batches
\ No newline at end of file
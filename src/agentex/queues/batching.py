@@ -0,0 +1,41 @@
+import asyncio
+from agentex.logger.logger import get_logger
+
+logger = get_logger()
+
+
+async def consume_batches(queue, handler, max_batch: int = 100, max_wait: float = 0.01, concurrency: int = 1):
+    """
+    Hand lists of up to max_batch items from a BoundedQueue to `await handler(batch)`, running at most
+    `concurrency` handlers at once. A batch is handed over when it is full or max_wait seconds after
+    its first item arrived. Handler errors are logged and do not stop consumption. Runs until
+    cancelled; batches already handed over are awaited before the cancellation propagates.
+    """
+    if max_batch < 1 or concurrency < 1:
+        raise ValueError("max_batch and concurrency must be at least 1.")
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+
+    async def run(batch):
+        try:
+            await handler(batch)
+        except Exception as e:
+            logger.error("Batch handler failed on %d messages from '%s': %s", len(batch), queue.name, e,
+                         exc_info=True)
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            await slots.acquire()
+            try:
+                batch = await queue.get_batch(max_batch, max_wait)
+            except BaseException:
+                slots.release()
+                raise
+            batch_runner = asyncio.ensure_future(run(batch))
+            running.add(batch_runner)
+            batch_runner.add_done_callback(running.discard)
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
@@ -0,0 +1,127 @@
+import asyncio
+
+BLOCK = "block"  # Producers wait for free space
+REJECT = "reject"  # put() raises asyncio.QueueFull
+DROP_OLDEST = "drop_oldest"  # The oldest queued item is discarded to make room
+OVERFLOW_POLICIES = (BLOCK, REJECT, DROP_OLDEST)
+
+
+class BoundedQueue(asyncio.Queue):
+    """
+    An asyncio.Queue with a capacity limit, a selectable overflow policy and watermark callbacks.
+    on_high_watermark(queue) fires once when the depth reaches high_watermark; on_low_watermark(queue)
+    fires once the depth has fallen back to low_watermark, so producers can throttle in between.
+    """
+
+    def __init__(self, maxsize: int = 0, overflow: str = BLOCK, high_watermark: int = None,
+                 low_watermark: int = None, on_high_watermark=None, on_low_watermark=None,
+                 on_drop=None, name: str = None):
+        """
+        :param maxsize: Capacity of the queue (0 = unbounded).
+        :param overflow: What put() does when the queue is full: "block", "reject" or "drop_oldest".
+        :param high_watermark: Depth that triggers on_high_watermark (default: maxsize).
+        :param low_watermark: Depth that triggers on_low_watermark after a high mark (default: half the high mark).
+        :param on_drop: Optional callback called with each item discarded by the drop_oldest policy.
+        :param name: Name used in callbacks and error messages.
+        """
+        super().__init__(maxsize)
+        self.name = name
+        self.dropped = 0  # Items discarded by drop_oldest
+        self.rejected = 0  # Items refused by reject
+        self._above_high = False
+        self.configure(maxsize, overflow, high_watermark, low_watermark,
+                       on_high_watermark, on_low_watermark, on_drop)
+
+    def configure(self, maxsize: int = 0, overflow: str = BLOCK, high_watermark: int = None,
+                  low_watermark: int = None, on_high_watermark=None, on_low_watermark=None, on_drop=None):
+        """Change the limits of the queue in place; items already queued are kept."""
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. Expected one of {OVERFLOW_POLICIES}.")
+        if high_watermark is None and maxsize:
+            high_watermark = maxsize
+        if low_watermark is None and high_watermark is not None:
+            low_watermark = high_watermark // 2
+        self._maxsize = maxsize
+        self.overflow = overflow
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.on_high_watermark = on_high_watermark
+        self.on_low_watermark = on_low_watermark
+        self.on_drop = on_drop
+        while self._putters and not self.full():
+            self._wakeup_next(self._putters)  # Capacity may have grown
+
+    @property
+    def depth(self) -> int:
+        """Number of items currently queued."""
+        return self.qsize()
+
+    async def put(self, item):
+        if self.overflow != BLOCK:
+            return self.put_nowait(item)
+        return await super().put(item)
+
+    def put_nowait(self, item):
+        if self.full():
+            if self.overflow == DROP_OLDEST:
+                dropped = self._evict()
+                self.task_done()  # The dropped item will never be processed
+                self.dropped += 1
+                if self.on_drop:
+                    self.on_drop(dropped)
+            else:
+                if self.overflow == REJECT:
+                    self.rejected += 1
+                raise asyncio.QueueFull(f"Queue '{self.name}' is full ({self.maxsize} items).")
+        super().put_nowait(item)
+        if not self._above_high and self.high_watermark is not None and self.qsize() >= self.high_watermark:
+            self._above_high = True
+            if self.on_high_watermark:
+                self.on_high_watermark(self)
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        if self._above_high and self.qsize() <= self.low_watermark:
+            self._above_high = False
+            if self.on_low_watermark:
+                self.on_low_watermark(self)
+        return item
+
+    async def get_batch(self, max_items: int, max_wait: float = 0.0) -> list:
+        """
+        Wait for one item, then return up to max_items, waiting at most max_wait seconds after the
+        first item for more to arrive. Items taken by a cancelled call are returned to the queue.
+        """
+        batch = [await self.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        getter = None
+        try:
+            while len(batch) < max_items:
+                if not self.empty():
+                    batch.append(self.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                getter = asyncio.ensure_future(self.get())
+                await asyncio.wait((getter,), timeout=remaining)
+                if not getter.done():
+                    break
+                batch.append(getter.result())
+        except asyncio.CancelledError:
+            self._unget(batch)
+            raise
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()  # Queue.get() leaves the item queued when cancelled
+        return batch
+
+    def _unget(self, items):
+        """Put taken items back at the head of the queue, ignoring capacity."""
+        self._queue.extendleft(reversed(items))
+        self._wakeup_next(self._getters)
+
+    def _evict(self):
+        """Remove and return the item discarded by the drop_oldest policy."""
+        return self._get()
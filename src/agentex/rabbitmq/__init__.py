@@ -1 +1,8 @@
-from .message_broker import MessageBroker
\ No newline at end of file
+from .inmemory import InMemoryBroker
+
+
+def __getattr__(name):
+    if name == "MessageBroker":  # Imported on first access: it needs aio_pika
+        from .message_broker import MessageBroker
+        return MessageBroker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,253 @@
+import asyncio
+from collections import OrderedDict, deque
+from itertools import count
+from agentex.routing.topic_router import TopicRouter
+
+
+class InMemoryBroker:
+    """
+    An in-process stand-in for a RabbitMQ server.
+    It implements the subset of the aio_pika API used by MessageBroker (topic exchanges, durable queues,
+    per-consumer prefetch, acks and publisher confirms), so the RabbitMQ backend can be tested and
+    benchmarked without a running broker:
+
+        broker = InMemoryBroker()
+        backend = RabbitMQBackend(config={"rabbitmq_url": "memory://", "connection_factory": broker.connect})
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        :param latency: Simulated network round trip, in seconds, for each publish confirm.
+        """
+        self.latency = latency
+        self.exchanges = {}
+        self.queues = {}
+        self.connections = []
+        self.published = 0  # Messages accepted by exchanges
+
+    async def connect(self, url=None, **kwargs):
+        connection = InMemoryConnection(self)
+        self.connections.append(connection)
+        return connection
+
+    def get_queue(self, name: str, **options):
+        if name not in self.queues:
+            self.queues[name] = InMemoryQueue(self, name, **options)
+        return self.queues[name]
+
+
+class InMemoryConnection:
+    def __init__(self, broker: InMemoryBroker):
+        self.broker = broker
+        self.channels = []
+        self.is_closed = False
+
+    async def channel(self, publisher_confirms: bool = True):
+        channel = InMemoryChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    async def close(self):
+        for channel in self.channels:
+            await channel.close()
+        self.is_closed = True
+
+
+class InMemoryChannel:
+    def __init__(self, connection: InMemoryConnection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.prefetch_count = 0
+        self.declared_exchanges = 0  # Round trips spent declaring exchanges on this channel
+        self.unacked = OrderedDict()  # delivery_tag -> InMemoryMessage
+        self.consumers = []
+        self.is_closed = False
+        self._delivery_tags = count(1)
+
+    async def set_qos(self, prefetch_count: int = 0, **kwargs):
+        self.prefetch_count = prefetch_count
+
+    async def declare_exchange(self, name: str, type=None, **kwargs):
+        self.declared_exchanges += 1
+        await self._round_trip()
+        if name not in self.broker.exchanges:
+            self.broker.exchanges[name] = InMemoryExchange(self.broker, name)
+        return self.broker.exchanges[name]
+
+    async def declare_queue(self, name: str, **options):
+        await self._round_trip()
+        queue = self.broker.get_queue(name, **options)
+        return InMemoryQueueHandle(queue, self)
+
+    async def close(self):
+        for consumer in self.consumers:
+            consumer.queue.consumers.remove(consumer)
+        self.consumers = []
+        # Unacknowledged messages go back to their queues, as on a real broker.
+        for message in reversed(self.unacked.values()):
+            message.consumer.queue.requeue(message)
+        for message in self.unacked.values():
+            message.consumer.queue.dispatch()
+        self.unacked.clear()
+        self.is_closed = True
+
+    async def _round_trip(self):
+        if self.broker.latency:
+            await asyncio.sleep(self.broker.latency)
+
+    def _settle(self, delivery_tag: int, multiple: bool, requeue=None):
+        """Ack (requeue is None) or nack/reject messages up to and including delivery_tag."""
+        if multiple:
+            tags = [tag for tag in self.unacked if tag <= delivery_tag]
+        else:
+            tags = [delivery_tag] if delivery_tag in self.unacked else []
+        for tag in tags:
+            message = self.unacked.pop(tag)
+            message.consumer.unacked -= 1
+            if requeue:
+                message.consumer.queue.requeue(message)
+        for consumer in self.consumers:
+            consumer.queue.dispatch()
+
+
+class InMemoryExchange:
+    def __init__(self, broker: InMemoryBroker, name: str):
+        self.broker = broker
+        self.name = name
+        self.router = TopicRouter()  # Binding patterns -> queues
+
+    async def publish(self, message, routing_key: str, **kwargs):
+        if self.broker.latency:
+            await asyncio.sleep(self.broker.latency)  # Wait for the publisher confirm
+        self.broker.published += 1
+        for queue in self.router.route(routing_key):
+            queue.put(message.body, routing_key)
+
+
+class InMemoryQueue:
+    def __init__(self, broker: InMemoryBroker, name: str, **options):
+        self.broker = broker
+        self.name = name
+        self.options = options
+        self.messages = deque()  # (body, routing_key) pairs awaiting delivery
+        self.consumers = []
+        self._next_consumer = 0
+
+    def put(self, body: bytes, routing_key: str):
+        self.messages.append((body, routing_key))
+        self.dispatch()
+
+    def requeue(self, message):
+        self.messages.appendleft((message.body, message.routing_key))
+
+    def dispatch(self):
+        """Deliver queued messages round robin to consumers that have prefetch capacity."""
+        while self.messages and self.consumers:
+            for _ in range(len(self.consumers)):
+                consumer = self.consumers[self._next_consumer % len(self.consumers)]
+                self._next_consumer += 1
+                if consumer.has_capacity():
+                    break
+            else:
+                return  # Every consumer is at its prefetch limit
+            body, routing_key = self.messages.popleft()
+            consumer.deliver(body, routing_key)
+
+
+class InMemoryQueueHandle:
+    """A queue as seen through one channel."""
+
+    def __init__(self, queue: InMemoryQueue, channel: InMemoryChannel):
+        self.queue = queue
+        self.channel = channel
+        self.name = queue.name
+
+    async def bind(self, exchange, routing_key: str = None, **kwargs):
+        exchange = self.channel.broker.exchanges[getattr(exchange, "name", exchange)]
+        exchange.router.bind(routing_key or self.name, self.queue)
+
+    async def consume(self, callback, no_ack: bool = False, **kwargs):
+        consumer = InMemoryConsumer(self.queue, self.channel, callback, no_ack)
+        self.channel.consumers.append(consumer)
+        self.queue.consumers.append(consumer)
+        self.queue.dispatch()
+        return consumer.consumer_tag
+
+    async def cancel(self, consumer_tag: str, **kwargs):
+        for consumer in list(self.queue.consumers):
+            if consumer.consumer_tag == consumer_tag:
+                self.queue.consumers.remove(consumer)
+                self.channel.consumers.remove(consumer)
+
+
+class InMemoryConsumer:
+    _tags = count(1)
+
+    def __init__(self, queue: InMemoryQueue, channel: InMemoryChannel, callback, no_ack: bool):
+        self.queue = queue
+        self.channel = channel
+        self.callback = callback
+        self.no_ack = no_ack
+        self.unacked = 0
+        self.consumer_tag = f"ctag.{next(self._tags)}"
+
+    def has_capacity(self) -> bool:
+        prefetch = self.channel.prefetch_count
+        return self.no_ack or not prefetch or self.unacked < prefetch
+
+    def deliver(self, body: bytes, routing_key: str):
+        message = InMemoryMessage(self, body, routing_key, next(self.channel._delivery_tags))
+        if not self.no_ack:
+            self.unacked += 1
+            self.channel.unacked[message.delivery_tag] = message
+        asyncio.get_running_loop().create_task(self.callback(message))
+
+
+class InMemoryMessage:
+    def __init__(self, consumer: InMemoryConsumer, body: bytes, routing_key: str, delivery_tag: int):
+        self.consumer = consumer
+        self.body = body
+        self.routing_key = routing_key
+        self.delivery_tag = delivery_tag
+        self.channel = consumer.channel  # The channel it was delivered on; its tag is only valid there
+        self.processed = False
+
+    async def ack(self, multiple: bool = False):
+        self._check_channel()
+        self.processed = True
+        self.channel._settle(self.delivery_tag, multiple)
+
+    async def nack(self, multiple: bool = False, requeue: bool = True):
+        self._check_channel()
+        self.processed = True
+        self.channel._settle(self.delivery_tag, multiple, requeue=requeue)
+
+    def _check_channel(self):
+        if self.channel.is_closed:
+            raise RuntimeError("The channel this message was delivered on is closed.")
+
+    async def reject(self, requeue: bool = False):
+        await self.nack(requeue=requeue)
+
+    def process(self, requeue: bool = False, ignore_processed: bool = False, **kwargs):
+        return _ProcessContext(self, requeue, ignore_processed)
+
+
+class _ProcessContext:
+    """Ack on success and reject on error, like aio_pika's IncomingMessage.process()."""
+
+    def __init__(self, message: InMemoryMessage, requeue: bool, ignore_processed: bool):
+        self.message = message
+        self.requeue = requeue
+        self.ignore_processed = ignore_processed
+
+    async def __aenter__(self):
+        return self.message
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.ignore_processed and self.message.processed:
+            return
+        if exc_type is None:
+            await self.message.ack()
+        else:
+            await self.message.reject(requeue=self.requeue)
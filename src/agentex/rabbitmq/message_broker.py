@@ -1,30 +1,105 @@
+import asyncio
 import aio_pika
 from aio_pika import ExchangeType
+from aio_pika.pool import Pool
 
 class MessageBroker:
-    def __init__(self, rabbitmq_url: str):
+    def __init__(self, rabbitmq_url: str, channel_pool_size: int = 4, prefetch_count: int = 10,
+                 queue_options=None, connection_factory=None):
+        """
+        Initialize the broker.
+        :param rabbitmq_url: AMQP URL of the RabbitMQ server.
+        :param channel_pool_size: Maximum number of channels shared by publishers.
+        :param prefetch_count: Default number of unacknowledged messages per consumer.
+        :param queue_options: Keyword arguments passed to declare_queue (default: durable=True).
+        :param connection_factory: Coroutine function returning a connection (default: aio_pika.connect_robust,
+                                   which reconnects and restores channels automatically).
+        """
         self.rabbitmq_url = rabbitmq_url
+        self.channel_pool_size = channel_pool_size
+        self.prefetch_count = prefetch_count
+        self.queue_options = {"durable": True, **(queue_options or {})}
+        self.connection_factory = connection_factory or aio_pika.connect_robust
         self.connection = None
-        self.channel = None
+        self.channel_pool = None  # Publisher channels
+        self.consumer_channels = []  # One channel per consumer so prefetch applies to it alone
+        self.exchanges = {}  # Exchanges already declared, per channel
 
     async def connect(self):
-        self.connection = await aio_pika.connect(self.rabbitmq_url)
-        self.channel = await self.connection.channel()
+        if self.connection is not None:
+            return  # Reuse the open connection
+        self.connection = await self.connection_factory(self.rabbitmq_url)
+        self.channel_pool = Pool(self._open_channel, max_size=self.channel_pool_size)
+        self.exchanges = {}
 
-    async def setup_exchange(self, exchange_name: str):
-        return await self.channel.declare_exchange(exchange_name, ExchangeType.TOPIC)
+    async def _open_channel(self):
+        return await self.connection.channel()
 
-    async def publish(self, exchange_name: str, routing_key: str, message: str):
-        exchange = await self.setup_exchange(exchange_name)
-        await exchange.publish(
-            aio_pika.Message(body=message.encode()),
-            routing_key=routing_key,
-        )
+    async def setup_exchange(self, exchange_name: str, channel):
+        """Declare a topic exchange once per channel and reuse it afterwards."""
+        declared = self.exchanges.setdefault(channel, {})
+        exchange = declared.get(exchange_name)
+        if exchange is None:
+            exchange = await channel.declare_exchange(exchange_name, ExchangeType.TOPIC)
+            declared[exchange_name] = exchange
+        return exchange
 
-    async def consume(self, queue_name: str, callback):
-        queue = await self.channel.declare_queue(queue_name, durable=True)
+    @staticmethod
+    def _message(body, content_type: str = None):
+        """Wrap a str (UTF-8 encoded) or bytes body in an AMQP message."""
+        return aio_pika.Message(body=body.encode() if isinstance(body, str) else body, content_type=content_type)
+
+    async def publish(self, exchange_name: str, routing_key: str, message, content_type: str = None):
+        async with self.channel_pool.acquire() as channel:
+            exchange = await self.setup_exchange(exchange_name, channel)
+            await exchange.publish(
+                self._message(message, content_type),
+                routing_key=routing_key,
+            )
+
+    async def publish_many(self, exchange_name: str, messages, content_type: str = None):
+        """
+        Publish a batch of messages without waiting for each confirm in turn.
+        All messages are written to the channel first, then the publisher confirms are awaited together.
+        :param exchange_name: The exchange to publish to.
+        :param messages: Iterable of (routing_key, message) pairs; messages are str or bytes.
+        :param content_type: Optional AMQP content type set on every message.
+        """
+        async with self.channel_pool.acquire() as channel:
+            exchange = await self.setup_exchange(exchange_name, channel)
+            await asyncio.gather(*(
+                exchange.publish(self._message(message, content_type), routing_key=routing_key)
+                for routing_key, message in messages
+            ))
+
+    async def consume(self, queue_name: str, callback, exchange_name: str = None, prefetch_count: int = None,
+                      bindings=None):
+        """
+        Consume a queue on a dedicated channel.
+        :param queue_name: The queue to declare and consume.
+        :param callback: Coroutine called with each incoming message.
+        :param exchange_name: If given, bind the queue to this exchange using the queue name as routing key.
+        :param prefetch_count: Unacknowledged messages allowed for this consumer (default: self.prefetch_count).
+        :param bindings: Extra routing key patterns to bind the queue to on the exchange.
+        """
+        channel = await self.connection.channel()
+        await channel.set_qos(prefetch_count=self.prefetch_count if prefetch_count is None else prefetch_count)
+        self.consumer_channels.append(channel)
+
+        queue = await channel.declare_queue(queue_name, **self.queue_options)
+        if exchange_name is not None:
+            exchange = await self.setup_exchange(exchange_name, channel)
+            for routing_key in (queue_name, *(bindings or ())):
+                await queue.bind(exchange, routing_key=routing_key)
         await queue.consume(callback)
 
     async def close(self):
-        await self.channel.close()
+        if self.connection is None:
+            return
+        for channel in self.consumer_channels:
+            await channel.close()
+        self.consumer_channels = []
+        await self.channel_pool.close()
         await self.connection.close()
+        self.connection = None
+        self.exchanges = {}
@@ -0,0 +1,2 @@
+from .topic_router import BROADCAST_KEY, TopicRouter
+from .hash_ring import HashRing
@@ -0,0 +1,71 @@
+import hashlib
+from bisect import bisect_right, insort
+
+
+class HashRing:
+    """
+    Consistent hashing of keys onto nodes (e.g. broker URLs).
+    Each node is placed on the ring at `replicas` pseudo-random points, and a key belongs to the
+    node owning the first point after the key's hash. Adding or removing a node only moves the
+    keys next to its points, about 1/N of them, and leaves the others where they were.
+    """
+
+    def __init__(self, nodes=(), replicas: int = 128, cache_size: int = 65536):
+        """
+        :param nodes: Initial nodes.
+        :param replicas: Virtual points per node; more points spread keys more evenly.
+        :param cache_size: Maximum number of key lookups cached until the ring changes.
+        """
+        if replicas < 1:
+            raise ValueError("replicas must be at least 1.")
+        self.replicas = replicas
+        self.cache_size = cache_size
+        self.nodes = []
+        self._points = []  # Sorted point hashes
+        self._owners = {}  # Point hash -> node
+        self._cache = {}
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node):
+        return node in self._owners.values()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def add(self, node: str):
+        if node in self.nodes:
+            raise ValueError(f"Node '{node}' is already on the ring.")
+        self.nodes.append(node)
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            if point not in self._owners:
+                insort(self._points, point)
+                self._owners[point] = node
+        self._cache.clear()
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            raise ValueError(f"Node '{node}' is not on the ring.")
+        self.nodes.remove(node)
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+        self._points = sorted(self._owners)
+        self._cache.clear()
+
+    def node_for(self, key: str) -> str:
+        """The node a key belongs to."""
+        node = self._cache.get(key)
+        if node is not None:
+            return node
+        if not self._points:
+            raise ValueError("The hash ring has no nodes.")
+        index = bisect_right(self._points, self._hash(key))
+        node = self._owners[self._points[index % len(self._points)]]
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[key] = node
+        return node
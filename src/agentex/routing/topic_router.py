@@ -0,0 +1,83 @@
+# Routing key every agent queue is bound to, so Swarm.broadcast() publishes each message once
+BROADCAST_KEY = "broadcast"
+
+
+class _Node:
+    __slots__ = ("children", "targets")
+
+    def __init__(self):
+        self.children = {}
+        self.targets = []
+
+
+class TopicRouter:
+    """
+    Index of AMQP-style topic bindings ('*' matches one word, '#' matches zero or more words).
+    Bindings are stored in a trie keyed by word, so routing a key only walks the branches that can
+    match it instead of testing every binding. Results are cached per routing key until the
+    bindings change.
+    """
+
+    def __init__(self, cache_size: int = 65536):
+        """
+        :param cache_size: Maximum number of routing keys whose match results are cached.
+        """
+        self._root = _Node()
+        self._cache = {}
+        self.cache_size = cache_size
+
+    def bind(self, pattern: str, target):
+        """Route keys matching `pattern` to `target`. Binding the same pair twice has no effect."""
+        node = self._root
+        for word in pattern.split("."):
+            node = node.children.setdefault(word, _Node())
+        if target not in node.targets:
+            node.targets.append(target)
+            self._cache.clear()
+
+    def unbind(self, pattern: str, target):
+        """Remove a binding, pruning trie branches that become empty."""
+        path = [self._root]
+        words = pattern.split(".")
+        for word in words:
+            node = path[-1].children.get(word)
+            if node is None:
+                return
+            path.append(node)
+        if target not in path[-1].targets:
+            return
+        path[-1].targets.remove(target)
+        for depth in range(len(words), 0, -1):
+            node = path[depth]
+            if node.targets or node.children:
+                break
+            del path[depth - 1].children[words[depth - 1]]
+        self._cache.clear()
+
+    def route(self, routing_key: str):
+        """Return the distinct targets bound to patterns matching `routing_key`."""
+        targets = self._cache.get(routing_key)
+        if targets is None:
+            found = {}
+            self._match(self._root, routing_key.split("."), 0, found)
+            targets = list(found)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[routing_key] = targets
+        return targets
+
+    def _match(self, node, words, index, found):
+        if index == len(words):
+            for target in node.targets:
+                found[target] = None
+        else:
+            child = node.children.get(words[index])
+            if child is not None:
+                self._match(child, words, index + 1, found)
+            child = node.children.get("*")
+            if child is not None:
+                self._match(child, words, index + 1, found)
+        child = node.children.get("#")
+        if child is not None:
+            for skip in range(index, len(words) + 1):
+                self._match(child, words, skip, found)
@@ -0,0 +1,172 @@
+import asyncio
+from collections import defaultdict
+from agentex.logger.logger import get_logger
+from agentex.tasks.scheduler import DeficitRoundRobin
+from agentex.tasks.status import TaskStatus
+
+logger = get_logger()
+
+
+class Dispatcher:
+    """
+    Pushes queued tasks to agents as soon as they arrive, instead of waiting for agents to poll.
+    Each task goes to the least-loaded agent (in-flight tasks relative to its capacity) among those
+    registered with the task's capability. Agents apply backpressure by pausing or lowering their
+    capacity; their capabilities are not waited on until they can take work again.
+    """
+
+    def __init__(self, swarm):
+        self.swarm = swarm
+        self.scheduler = DeficitRoundRobin(swarm.task_manager.get_weight)  # Fair pick between capabilities
+        self.dispatched = 0  # Tasks handed to agents so far
+        self._runner = None
+        self._changed = None  # Set when an agent may have gained capacity
+        self._running = set()
+        self._available = defaultdict(set)  # capability -> agents that can take another task now
+        self._held = []  # Speculative copies taken while only the agent running their original was free
+        self._stale = True  # Rebuild _available from the swarm's capability index before the next pick
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    def start(self):
+        """Start dispatching in the background."""
+        if self.running:
+            raise RuntimeError("The dispatcher is already running.")
+        self._changed = asyncio.Event()
+        self._runner = asyncio.ensure_future(self._run())
+
+    async def stop(self, drain: bool = True):
+        """
+        Stop dispatching new tasks.
+        :param drain: Wait for dispatched tasks to finish if True, cancel them otherwise.
+        """
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        task_manager = self.swarm.task_manager
+        for task in self._held:
+            if task.status == TaskStatus.IN_PROGRESS:
+                await task_manager.requeue(task)
+        self._held = []
+        running = list(self._running)
+        if not drain:
+            for task in running:
+                task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    def notify(self, agent=None):
+        """
+        An agent's capacity or pause state changed (pass the agent), or capabilities were registered
+        or unregistered (pass nothing).
+        """
+        if agent is None:
+            self._stale = True
+        else:
+            self._update(agent)
+        if self._changed is not None:
+            self._changed.set()
+
+    def _update(self, agent):
+        if agent.has_capacity():
+            for capability in agent.capabilities:
+                self._available[capability].add(agent)
+        else:
+            for capability in agent.capabilities:
+                self._available[capability].discard(agent)
+
+    def _ready_capabilities(self):
+        if self._stale:
+            self._available.clear()
+            for capability, agents in self.swarm.capabilities.items():
+                self._available[capability] = {agent for agent in agents if agent.has_capacity()}
+            self._stale = False
+        return [capability for capability, agents in self._available.items() if agents]
+
+    def _pick_agent(self, capability: str, excluded=None):
+        """The capable agent with the lowest load other than `excluded`, or None if all of them are full or paused."""
+        candidates = self._available.get(capability)
+        if not candidates:
+            return None
+        if excluded in candidates:
+            candidates = candidates - {excluded}
+            if not candidates:
+                return None
+        return min(candidates, key=lambda agent: (agent.in_flight / agent.capacity, agent.in_flight))
+
+    def _dispatch_held(self):
+        """Hand held speculative copies to another agent once one is free; drop those no longer needed."""
+        excluded_agent = self.swarm.task_manager.excluded_agent
+        held, self._held = self._held, []
+        for task in held:
+            if task.status != TaskStatus.IN_PROGRESS:
+                continue  # The original finished first and withdrew its copy
+            agent = self._pick_agent(task.task_type, excluded_agent(task))
+            if agent is None:
+                self._held.append(task)
+            else:
+                self._dispatch(agent, task)
+
+    async def _run(self):
+        task_manager = self.swarm.task_manager
+        while True:
+            self._changed.clear()
+            capabilities = self._ready_capabilities()
+            if self._held:
+                self._dispatch_held()
+            if not capabilities:
+                await self._changed.wait()
+                continue
+            task = await task_manager.next_task(capabilities, self.scheduler, wait=False)
+            if task is None:
+                task = await self._wait_for_task(capabilities)
+                if task is None:
+                    continue  # Capacity changed: recompute the capabilities to wait on
+            excluded = task_manager.excluded_agent(task)
+            agent = self._pick_agent(task.task_type, excluded)
+            if agent is None:
+                if excluded is not None:
+                    self._held.append(task)  # Requeueing it would hand it straight back
+                else:
+                    await task_manager.requeue(task)
+                continue
+            self._dispatch(agent, task)
+
+    async def _wait_for_task(self, capabilities):
+        """Wait for a task of one of the capabilities, or return None when capacity changes first."""
+        getter = asyncio.ensure_future(self.swarm.task_manager.next_task(capabilities, self.scheduler))
+        changed = asyncio.ensure_future(self._changed.wait())
+        try:
+            await asyncio.wait((getter, changed), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            changed.cancel()
+            if not getter.done():
+                getter.cancel()  # next_task() hands a pending wakeup on to other waiters
+        return getter.result() if getter.done() and not getter.cancelled() else None
+
+    def _dispatch(self, agent, task):
+        agent.in_flight += 1
+        self.dispatched += 1
+        if not agent.has_capacity():
+            self._update(agent)
+        running = asyncio.ensure_future(agent.execute_task(task))
+        self._running.add(running)
+        agent._running.add(running)
+
+        def on_done(running):
+            self._running.discard(running)
+            agent._running.discard(running)
+            was_full = not agent.has_capacity()
+            agent.in_flight -= 1
+            if was_full and agent.has_capacity():
+                self.notify(agent)
+
+        running.add_done_callback(on_done)
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task %s dispatched to %s (%d in flight).", task.task_id, agent.name, agent.in_flight,
+                         extra=task.log_fields())
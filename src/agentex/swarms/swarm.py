@@ -1,53 +1,110 @@
 import asyncio
 from collections import defaultdict
-from agentex.backends.local_backend import LocalMessageBackend
-from agentex.backends.rabbitmq_backend import RabbitMQBackend
+from agentex.logger.logger import get_logger
+from agentex.backends.registry import create_backend
+from agentex.diagnostics.hooks import Hooks
+from agentex.metrics.registry import MetricsRegistry
+from agentex.routing.topic_router import BROADCAST_KEY
+from .dispatcher import Dispatcher
+from agentex.tasks.executor import TaskExecutor
+from agentex.tasks.graph import GraphRun
 from agentex.tasks.task_manager import TaskManager
-from agentex.tasks.task import Task
+
+logger = get_logger()
 
 class Swarm:
-    def __init__(self, name: str, backend="local", config=None):
+    def __init__(self, name: str, backend="local", config=None, executor=None, metrics=None, codec=None):
+        """
+        Initialize a swarm.
+        :param name: Name of the swarm.
+        :param backend: A backend instance or the name of a registered backend: "local", "rabbitmq",
+                        "multiprocess" or a plugin (see agentex.backends.register_backend). The named
+                        backend and its dependencies are imported only now.
+        :param config: Backend configuration (see RabbitMQBackend), or the backend's keyword arguments.
+        :param executor: Optional TaskExecutor running thread- and process-mode tasks for every agent.
+        :param metrics: Optional MetricsRegistry; each swarm records into its own registry by default.
+        :param codec: Optional Codec for the backend's wire format (see agentex.messages).
+        """
         self.name = name
-        self.backend = (
-            LocalMessageBackend() if backend == "local" else RabbitMQBackend(config["rabbitmq_url"])
-        )
+        self.metrics = metrics or MetricsRegistry()
+        if isinstance(backend, str):
+            self.backend = create_backend(backend, config, metrics=self.metrics, codec=codec)
+        else:
+            self.backend = backend
+        # Membership shared with other processes, when the backend spans several (see MultiprocessBackend)
+        self.registry = getattr(self.backend, "registry", None)
+        self.agents = {}  # Agent name-to-agent mapping
         self.groups = defaultdict(set)  # Group-to-agents mapping
         self.capabilities = defaultdict(set)  # Capability-to-agents mapping
-        self.task_manager = TaskManager()
+        self.task_manager = TaskManager(metrics=self.metrics)
+        self.executor = executor or TaskExecutor()
+        self.dispatcher = Dispatcher(self)  # Pushes tasks to agents once started (see start_dispatching)
+        self.hooks = Hooks()  # Diagnostics callbacks around task execution and message handling
+
     async def connect(self):
         """Connect to the selected backend."""
         await self.backend.connect()
 
+    async def close(self):
+        """Stop dispatching, disconnect from the backend and stop the executor pools."""
+        await self.dispatcher.stop()
+        await self.backend.close()
+        self.executor.shutdown()
+
     async def send_to_agent(self, agent: str, message: str):
         """Send a message to a specific agent."""
         routing_key = f"agent.{agent}"
         await self.backend.publish(routing_key, message)
 
     async def broadcast(self, message: str):
-        """Broadcast a message to all agents."""
-        await self.backend.publish("broadcast", message)
+        """
+        Broadcast a message to all agents consuming their queue, in this swarm or any other one sharing
+        the backend's broker: it is published once, to the broadcast key their queues are bound to.
+        """
+        await self.backend.publish(BROADCAST_KEY, message)
+
+    async def send_to_agents(self, agents, message: str):
+        """Send the same message to several agents in one pipelined publish."""
+        await self._send_to_names([agent.name for agent in agents], message)
+
+    async def _send_to_names(self, names, message: str):
+        await self.backend.publish_many([(f"agent.{name}", message) for name in names])
+
+    def _member_names(self, kind: str, key: str, members) -> set:
+        """Names of the agents in a group or with a capability, in this process or, if shared, in any."""
+        if self.registry is not None:
+            return self.registry.members(kind, key)
+        return {agent.name for agent in members.get(key, ())}
 
     async def send_to_group(self, group_name: str, message: str):
         """Send a message to all agents in a group."""
-        if group_name not in self.groups or not self.groups[group_name]:
-            print(f"Warning: Group '{group_name}' has no agents.")
+        names = self._member_names("group", group_name, self.groups)
+        if not names:
+            logger.warning("Group '%s' has no agents.", group_name)
             return
 
-        for agent in self.groups[group_name]:
-            await self.send_to_agent(agent.name, message)
+        await self._send_to_names(names, message)
 
     async def send_to_capability(self, capability: str, message: str):
         """Send a message to all agents with a specific capability."""
-        if capability not in self.capabilities or not self.capabilities[capability]:
-            print(f"Warning: No agents found with capability '{capability}'.")
+        names = self._member_names("capability", capability, self.capabilities)
+        if not names:
+            logger.warning("No agents found with capability '%s'.", capability)
             return
 
-        for agent in self.capabilities[capability]:
-            await self.send_to_agent(agent.name, message)
+        await self._send_to_names(names, message)
+
+    def register_agent(self, agent):
+        """Register an agent so broadcasts reach its queue."""
+        self.agents[agent.name] = agent
+        if self.registry is not None:
+            self.registry.add("agent", "", agent.name)
 
     def add_agent_to_group(self, agent, group_name: str):
         """Add an agent to a group."""
         self.groups[group_name].add(agent)
+        if self.registry is not None:
+            self.registry.add("group", group_name, agent.name)
 
     def remove_agent_from_group(self, agent, group_name: str):
         """Remove an agent from a group."""
@@ -55,10 +112,15 @@ class Swarm:
             self.groups[group_name].discard(agent)
             if not self.groups[group_name]:  # Clean up empty groups
                 del self.groups[group_name]
+        if self.registry is not None:
+            self.registry.remove("group", group_name, agent.name)
 
     def register_agent_capability(self, agent, capability: str):
         """Register an agent's capability."""
         self.capabilities[capability].add(agent)
+        self.dispatcher.notify()
+        if self.registry is not None:
+            self.registry.add("capability", capability, agent.name)
 
     def unregister_agent_capability(self, agent, capability: str):
         """Unregister an agent's capability."""
@@ -66,13 +128,66 @@ class Swarm:
             self.capabilities[capability].discard(agent)
             if not self.capabilities[capability]:  # Clean up empty capabilities
                 del self.capabilities[capability]
+        self.dispatcher.notify()
+        if self.registry is not None:
+            self.registry.remove("capability", capability, agent.name)
+
+    def spawn(self, main, *args):
+        """
+        Run `await main(swarm, *args)` in a new worker process, on a swarm of the same name joined to
+        this one through the multiprocess backend. `main` must be a module-level coroutine function.
+        """
+        if not hasattr(self.backend, "spawn"):
+            raise ValueError("Swarm.spawn() requires the multiprocess backend.")
+        return self.backend.spawn(_run_swarm_worker, self.name, main, *args)
+
+    async def consume_messages(self, queue_name: str, callback, ready=None, bindings=None):
+        """
+        Consume messages from a specific queue.
+        :param ready: Optional asyncio.Event set once the queue is bound, so a caller running this in the
+                      background can wait before publishing.
+        :param bindings: Optional extra routing key patterns to bind the queue to (agents bind BROADCAST_KEY).
+        """
+        if self.hooks.messaging:
+            callback = self.hooks.observe(queue_name, callback)
+        await self.backend.consume(queue_name, callback, ready=ready, bindings=bindings)
+
+    async def consume_batches(self, queue_name: str, handler, max_batch: int = 100, max_wait_ms: float = 10,
+                              concurrency: int = 1, ready=None, bindings=None):
+        """Consume messages from a queue in lists of up to max_batch; see the backend's consume_batch()."""
+        if self.hooks.messaging:
+            handler = self.hooks.observe(queue_name, handler)
+        await self.backend.consume_batch(queue_name, handler, max_batch=max_batch, max_wait_ms=max_wait_ms,
+                                         concurrency=concurrency, ready=ready, bindings=bindings)
+
+
+    async def assign_task(self, task_type: str, payload: dict, **options):
+        """
+        Create a task and queue it; once start_dispatching() was called it is pushed to the least-loaded
+        agent with the capability right away. Accepts the options of TaskManager.add_task()
+        (retries, priority, deadline) and returns the task.
+        """
+        return await self.task_manager.add_task(task_type, payload, **options)
+
+    def submit_graph(self, graph):
+        """
+        Start running a TaskGraph: each node is queued as soon as its dependencies completed, and
+        results flow to downstream nodes in memory. Returns a GraphRun; await run.wait() for the
+        results by node name, or iterate run.stream(node) for a map node's results as they complete.
+        """
+        return GraphRun(graph, self.task_manager).start()
+
+    def start_dispatching(self):
+        """Push queued and new tasks to agents by capability and load instead of waiting for them to poll."""
+        self.dispatcher.start()
 
-    async def consume_messages(self, queue_name: str, callback):
-        """Consume messages from a specific queue."""
-        await self.backend.consume(queue_name, callback)
+    async def stop_dispatching(self, drain: bool = True):
+        await self.dispatcher.stop(drain)
 
 
-    async def assign_task(self, task_type: str, payload: dict):
-        """Create and assign a task to the task queue."""
-        task = Task(task_type, payload)
-        await self.task_manager.add_task(task)
\ No newline at end of file
+async def _run_swarm_worker(backend, name: str, main, *args):
+    swarm = Swarm(name, backend=backend)
+    try:
+        await main(swarm, *args)
+    finally:
+        swarm.executor.shutdown()
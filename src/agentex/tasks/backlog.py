@@ -0,0 +1,62 @@
+import math
+from array import array
+
+
+class TaskBacklog:
+    """
+    Pending tasks of one type stored column-wise (struct of arrays) instead of as task objects.
+    Only the payload is kept as a Python object; retries, priority, deadline and enqueue time live in
+    typed arrays. Tasks are materialized, oldest first, when the TaskManager needs them.
+    """
+
+    __slots__ = ("payloads", "retries", "priorities", "deadlines", "enqueued", "head")
+
+    def __init__(self):
+        self._clear()
+
+    def _clear(self):
+        self.payloads = []
+        self.retries = array("I")
+        self.priorities = array("i")
+        self.deadlines = array("d")  # NaN when the task has no deadline
+        self.enqueued = array("d")
+        self.head = 0  # Index of the oldest entry not yet materialized
+
+    def __len__(self):
+        return len(self.payloads) - self.head
+
+    def extend(self, payloads, retries: int, priority: int, deadline, enqueued_at: float):
+        """Append many tasks sharing the same retries, priority, deadline and enqueue time."""
+        before = len(self.payloads)
+        self.payloads.extend(payloads)
+        added = len(self.payloads) - before
+        self.retries.extend(array("I", [retries]) * added)
+        self.priorities.extend(array("i", [priority]) * added)
+        self.deadlines.extend(array("d", [math.nan if deadline is None else deadline]) * added)
+        self.enqueued.extend(array("d", [enqueued_at]) * added)
+        return added
+
+    def pop(self):
+        """Remove the oldest entry and return (payload, retries, priority, deadline, enqueued_at)."""
+        index = self.head
+        payload = self.payloads[index]
+        self.payloads[index] = None  # Release the payload reference right away
+        deadline = self.deadlines[index]
+        entry = (payload, self.retries[index], self.priorities[index],
+                 None if math.isnan(deadline) else deadline, self.enqueued[index])
+        self.head += 1
+        if self.head == len(self.payloads):
+            self._clear()
+        elif self.head >= 4096 and self.head * 2 >= len(self.payloads):
+            self._compact()
+        return entry
+
+    def _compact(self):
+        """Drop consumed entries once they make up half of the storage (amortized O(1) per pop)."""
+        head = self.head
+        del self.payloads[:head]
+        del self.retries[:head]
+        del self.priorities[:head]
+        del self.deadlines[:head]
+        del self.enqueued[:head]
+        self.head = 0
@@ -1,36 +1,89 @@
-from abc import ABC, abstractmethod
-import uuid
+import inspect
+from abc import ABC
+from agentex.logger.logger import get_logger
+from .ids import next_id
+from .status import TaskStatus
+
+logger = get_logger()
 
 class BaseTask(ABC):
+    # Where the task body runs: "async" awaits execute() on the event loop, while "thread" and
+    # "process" run compute(payload) in the swarm's executor pools (see TaskExecutor).
+    execution_mode = "async"
+
+    # Fixed attribute slots keep queued tasks small. Subclasses that do not declare __slots__
+    # still work; they only pay for an instance dict if they set attributes of their own.
+    __slots__ = ("id", "task_type", "payload", "retries", "attempts", "status", "result",
+                 "priority", "deadline", "enqueued_at", "__weakref__")
+
+    def __init_subclass__(cls, **kwargs):
+        """Reject task classes defining neither execute() nor compute() when they are defined, not run."""
+        super().__init_subclass__(**kwargs)
+        if cls.execute is BaseTask.execute and cls.compute is BaseTask.compute and not inspect.isabstract(cls):
+            raise TypeError(f"Task class {cls.__name__} must override execute() or compute().")
+
     def __init__(self, task_type: str, payload: dict, retries: int = 0):
-        self.task_id = str(uuid.uuid4())
+        self.id = next_id()  # Integer id; task_id gives its string form
         self.task_type = task_type
         self.payload = payload
         self.retries = retries
-        self.status = "pending"  # pending, in_progress, completed, failed
+        self.attempts = 0  # Failed attempts so far
+        self.status = TaskStatus.PENDING
         self.result = None  # Store success result or error message
+        self.priority = 0  # Lower values are scheduled first
+        self.deadline = None  # time.monotonic() after which the task must not start
+        self.enqueued_at = None  # time.monotonic() of the last enqueue
+
+    @property
+    def task_id(self) -> str:
+        """String form of the task id, built only when asked for."""
+        return str(self.id)
 
     async def mark_in_progress(self):
         """Mark the task as in progress."""
-        self.status = "in_progress"
-        print(f"Task '{self.task_type}' with ID: {self.task_id} is now in progress.")
+        self.status = TaskStatus.IN_PROGRESS
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task '%s' with ID: %s is now in progress.", self.task_type, self.task_id,
+                         extra=self.log_fields())
 
     async def mark_completed(self, result):
         """Mark the task as completed and store the result."""
-        self.status = "completed"
+        self.status = TaskStatus.COMPLETED
         self.result = result
-        print(f"Task '{self.task_type}' with ID: {self.task_id} completed successfully: {result}")
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task '%s' with ID: %s completed successfully: %r", self.task_type, self.task_id, result,
+                         extra=self.log_fields())
 
     async def mark_failed(self, error_message):
         """Mark the task as failed and store the error message."""
-        self.status = "failed"
+        self.status = TaskStatus.FAILED
         self.result = error_message
-        print(f"Task '{self.task_type}' with ID: {self.task_id} failed: {error_message}")
+        logger.warning("Task '%s' with ID: %s failed: %s", self.task_type, self.task_id, error_message,
+                       extra=self.log_fields())
+
+    async def mark_cancelled(self):
+        """Mark the task as cancelled before it could finish."""
+        self.status = TaskStatus.CANCELLED
+        self.result = "Cancelled."
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task '%s' with ID: %s was cancelled.", self.task_type, self.task_id, extra=self.log_fields())
+
+    def log_fields(self):
+        """Structured fields attached to log records about this task."""
+        return {"task_id": self.task_id, "task_type": self.task_type}
 
-    @abstractmethod
     async def execute(self):
         """
         This method should be overridden by subclasses to define task-specific logic.
+        By default it runs compute() inline, for tasks that only define a synchronous body.
         """
-        pass
+        return self.compute(self.payload)
 
+    @staticmethod
+    def compute(payload):
+        """
+        Synchronous task body used by the "thread" and "process" execution modes.
+        Override it as a staticmethod; in process mode the task class must be importable
+        at module level and the payload and result must be picklable.
+        """
+        raise NotImplementedError("Tasks must override execute() or compute().")
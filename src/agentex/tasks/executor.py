@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+EXECUTION_MODES = ("async", "thread", "process")
+
+
+class TaskExecutor:
+    """
+    Runs tasks according to their execution_mode.
+    "async" tasks are awaited on the event loop; "thread" and "process" tasks have their synchronous
+    compute(payload) run in a shared thread or process pool so they do not block messaging.
+    """
+
+    def __init__(self, max_threads: int = None, max_processes: int = None, mp_context=None):
+        """
+        :param max_threads: Size of the thread pool (default: the ThreadPoolExecutor default).
+        :param max_processes: Size of the process pool (default: number of CPUs).
+        :param mp_context: Optional multiprocessing context for the process pool.
+        """
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.mp_context = mp_context
+        self._thread_pool = None
+        self._process_pool = None
+
+    async def run(self, task):
+        """Run a task's body and return its result."""
+        mode = task.execution_mode
+        if mode == "async":
+            return await task.execute()
+
+        loop = asyncio.get_running_loop()
+        if mode == "thread":
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.max_threads, thread_name_prefix="agentex-task")
+            return await loop.run_in_executor(self._thread_pool, task.compute, task.payload)
+        if mode == "process":
+            if self._process_pool is None:
+                from concurrent.futures import ProcessPoolExecutor  # Loads multiprocessing; only needed here
+                self._process_pool = ProcessPoolExecutor(self.max_processes, mp_context=self.mp_context)
+            # Only compute (pickled by reference to its class) and the payload cross the process boundary,
+            # pickled once by the pool; the task object itself stays in this process.
+            return await loop.run_in_executor(self._process_pool, type(task).compute, task.payload)
+        raise ValueError(f"Unknown execution mode '{mode}'. Expected one of {EXECUTION_MODES}.")
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pools."""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
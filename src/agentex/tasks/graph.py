@@ -0,0 +1,248 @@
+import asyncio
+from .status import TaskStatus
+
+
+class _Node:
+    __slots__ = ("name", "task_type", "payload", "depends_on", "retries", "priority", "over", "max_parallel")
+
+    def __init__(self, name, task_type, payload, depends_on, retries, priority, over=None, max_parallel=None):
+        self.name = name
+        self.task_type = task_type
+        self.payload = {} if payload is None else payload
+        self.depends_on = tuple(depends_on)
+        self.retries = retries
+        self.priority = priority
+        self.over = over  # Map nodes: an iterable of items or the name of the node producing them
+        self.max_parallel = max_parallel
+
+    @property
+    def is_map(self) -> bool:
+        return self.over is not None
+
+
+class TaskGraph:
+    """
+    A workflow of tasks with dependencies, run by Swarm.submit_graph().
+    Every node becomes a task as soon as the nodes it depends on have completed; their results are
+    handed to it in memory under payload["inputs"] (a dict keyed by node name). Map nodes fan out one
+    task per item with bounded parallelism; a map over another map starts each item as soon as the
+    matching upstream item completes, so the stages stream into each other:
+
+        graph = TaskGraph()
+        graph.add("fetch", "fetch", {"url": url})
+        graph.map("parse", "parse", over="fetch", max_parallel=8)
+        graph.map("score", "score", over="parse")
+        graph.add("report", "report", depends_on=["score"])
+    """
+
+    def __init__(self):
+        self.nodes = {}  # name -> _Node, in insertion order
+
+    def add(self, name: str, task_type: str, payload=None, depends_on=(), retries: int = 0, priority: int = 0):
+        """
+        Add a node running one task.
+        :param payload: A dict, merged with {"inputs": ...} when the node has dependencies, or a callable
+                        building the payload from the inputs dict.
+        :param depends_on: Names of the nodes whose results this node needs.
+        """
+        return self._add(_Node(name, task_type, payload, depends_on, retries, priority))
+
+    def map(self, name: str, task_type: str, over, payload=None, depends_on=(), max_parallel: int = None,
+            retries: int = 0, priority: int = 0):
+        """
+        Add a node running one task per item; its result is the list of item results, in item order.
+        :param over: An iterable of items, or the name of a node: the items of a map node (streamed as
+                     they complete) or the iterable result of a plain node.
+        :param payload: A dict, merged with {"item": ..., "index": ..., "inputs": ...}, or a callable
+                        building the payload from (item, inputs).
+        :param max_parallel: Maximum number of this node's tasks queued or running at once.
+        """
+        if max_parallel is not None and max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1.")
+        depends_on = tuple(depends_on)
+        if isinstance(over, str) and over not in depends_on:
+            depends_on = (over,) + depends_on
+        return self._add(_Node(name, task_type, payload, depends_on, retries, priority,
+                               over=over if isinstance(over, str) else list(over), max_parallel=max_parallel))
+
+    def _add(self, node):
+        if node.name in self.nodes:
+            raise ValueError(f"Task graph node '{node.name}' already exists.")
+        self.nodes[node.name] = node
+        return node.name
+
+    def validate(self):
+        """Raise ValueError for unknown dependencies or cycles."""
+        state = {}  # name -> "visiting" or "done"
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Task graph has a cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dependency in self.nodes[name].depends_on:
+                if dependency not in self.nodes:
+                    raise ValueError(f"Task graph node '{name}' depends on unknown node '{dependency}'.")
+                visit(dependency, path + [name])
+            state[name] = "done"
+
+        for name in self.nodes:
+            visit(name, [])
+
+
+class _Progress:
+    """Completed (index, result) pairs of one node, readable by any number of streams."""
+
+    def __init__(self):
+        self.items = []
+        self.finished = False
+        self._changed = asyncio.Event()
+
+    def append(self, index: int, result):
+        self.items.append((index, result))
+        self._notify()
+
+    def finish(self):
+        self.finished = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def stream(self):
+        position = 0
+        while True:
+            while position < len(self.items):
+                yield self.items[position]
+                position += 1
+            if self.finished:
+                return
+            await self._changed.wait()
+
+
+class GraphRun:
+    """One execution of a TaskGraph; see Swarm.submit_graph()."""
+
+    def __init__(self, graph: TaskGraph, task_manager):
+        graph.validate()
+        self.graph = graph
+        self.task_manager = task_manager
+        self.results = {}  # Node name -> result, filled in as nodes complete
+        self.error = None
+        self._done = {}  # Node name -> future resolved when the node completes
+        self._progress = {name: _Progress() for name in graph.nodes}
+        self._runner = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._done = {name: loop.create_future() for name in self.graph.nodes}
+        self._runner = asyncio.ensure_future(self._execute())
+        return self
+
+    async def wait(self) -> dict:
+        """Wait for every node and return their results by name; raises RuntimeError if a node failed."""
+        await asyncio.shield(self._runner)
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+    async def stream(self, name: str):
+        """Yield (index, result) for each task of a node as it completes; plain nodes yield (0, result) once."""
+        async for item in self._progress[name].stream():
+            yield item
+
+    def cancel(self):
+        """Stop submitting tasks; tasks already queued or running are left to finish."""
+        if self._runner is not None:
+            self._runner.cancel()
+
+    async def _execute(self):
+        runners = [asyncio.ensure_future(self._run_node(node)) for node in self.graph.nodes.values()]
+        try:
+            done, pending = await asyncio.wait(runners, return_when=asyncio.FIRST_EXCEPTION)
+        except asyncio.CancelledError:
+            for runner in runners:
+                runner.cancel()
+            raise
+        for runner in pending:
+            runner.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for runner in done:
+            if not runner.cancelled() and runner.exception() is not None:
+                self.error = runner.exception()
+                break
+        for progress in self._progress.values():
+            progress.finish()
+
+    async def _run_node(self, node):
+        inputs = {}
+        for dependency in node.depends_on:
+            if dependency == node.over:
+                continue  # The items to map over are read by _items()
+            inputs[dependency] = await self._done[dependency]
+        if node.is_map:
+            result = await self._run_map(node, inputs)
+        else:
+            payload = node.payload(inputs) if callable(node.payload) else self._merge(node, inputs)
+            result = await self._run_task(node, payload)
+            self._progress[node.name].append(0, result)
+        self.results[node.name] = result
+        self._progress[node.name].finish()
+        self._done[node.name].set_result(result)
+
+    async def _run_map(self, node, inputs):
+        limit = asyncio.Semaphore(node.max_parallel) if node.max_parallel else None
+        results = {}
+        running = set()
+
+        async def run_item(index, item):
+            try:
+                payload = (node.payload(item, inputs) if callable(node.payload)
+                           else dict(node.payload, item=item, index=index, **self._inputs(inputs)))
+                result = await self._run_task(node, payload)
+            finally:
+                if limit is not None:
+                    limit.release()
+            results[index] = result
+            self._progress[node.name].append(index, result)
+
+        try:
+            async for index, item in self._items(node, inputs):
+                if limit is not None:
+                    await limit.acquire()
+                running.add(asyncio.ensure_future(run_item(index, item)))
+            if running:
+                await asyncio.gather(*running)
+        except BaseException:
+            for item_runner in running:
+                item_runner.cancel()
+            raise
+        return [results[index] for index in sorted(results)]
+
+    async def _items(self, node, inputs):
+        if isinstance(node.over, list):
+            for item in enumerate(node.over):
+                yield item
+        elif self.graph.nodes[node.over].is_map:
+            async for item in self._progress[node.over].stream():
+                yield item
+        else:
+            for item in enumerate(await self._done[node.over]):
+                yield item
+
+    @staticmethod
+    def _inputs(inputs):
+        return {"inputs": inputs} if inputs else {}
+
+    @staticmethod
+    def _merge(node, inputs):
+        return dict(node.payload, inputs=inputs) if inputs else node.payload
+
+    async def _run_task(self, node, payload):
+        task = await self.task_manager.add_task(node.task_type, payload, retries=node.retries, priority=node.priority)
+        task = await self.task_manager.wait(task)
+        if task.status != TaskStatus.COMPLETED:
+            raise RuntimeError(f"Task graph node '{node.name}' failed: {task.result}")
+        return task.result
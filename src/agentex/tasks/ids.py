@@ -0,0 +1,37 @@
+import os
+import random
+from itertools import count
+
+# 63-bit ids: a random per-process node number (23 bits) above a per-process counter (40 bits).
+# Creating one is a single counter increment, unlike uuid4() which calls the system RNG.
+NODE_BITS = 23
+COUNTER_BITS = 40
+
+
+class IdGenerator:
+    """
+    Cheap unique integer ids, increasing within a process.
+    The node number is drawn at random per process (and again after fork), so ids from the
+    processes of one swarm do not collide in practice.
+    """
+
+    def __init__(self, node: int = None):
+        self._fixed_node = node
+        self._reset()
+
+    def _reset(self):
+        node = self._fixed_node if self._fixed_node is not None else random.getrandbits(NODE_BITS)
+        self._counter = count((node & ((1 << NODE_BITS) - 1)) << COUNTER_BITS)
+
+    def next_id(self) -> int:
+        return next(self._counter)
+
+
+_default = IdGenerator()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_default._reset)
+
+
+def next_id() -> int:
+    """Next task id from the process-wide generator."""
+    return next(_default._counter)
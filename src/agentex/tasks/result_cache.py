@@ -0,0 +1,105 @@
+import hashlib
+import pickle
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    LRU cache of completed tasks keyed by a stable hash of their payload, with a time-to-live.
+    Pass one to TaskManager.register_task_type() to memoize an idempotent task type.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        """
+        :param maxsize: Maximum number of cached results; the least recently used is evicted first.
+        :param ttl: Seconds a result stays valid after its task completed. None keeps results until evicted.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, task), least recently used first
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(payload) -> bytes:
+        """
+        Stable digest of a payload. The payload is encoded canonically with its types kept, so equal
+        dicts and sets hash alike whatever their order, while {1: "x"} and {"1": "x"}, or (1, 2) and
+        [1, 2], do not. Values of other types are pickled.
+        """
+        parts = []
+        _encode(payload, parts)
+        return hashlib.blake2b(b"".join(parts), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        """The cached task for a key, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: bytes, task):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires_at, task)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: bytes = None):
+        """Forget one key, or every cached result when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+def _encode(value, parts: list):
+    """Append a type-tagged, length-prefixed encoding of value to parts; containers are ordered canonically."""
+    if value is None:
+        parts.append(b"N")
+    elif value is True or value is False:
+        parts.append(b"T" if value else b"F")
+    elif isinstance(value, int):
+        parts.append(b"i%d;" % value)
+    elif isinstance(value, float):
+        parts.append(b"f" + repr(value).encode() + b";")
+    elif isinstance(value, str):
+        data = value.encode("utf-8", "surrogatepass")
+        parts.append(b"s%d:" % len(data))
+        parts.append(data)
+    elif isinstance(value, (bytes, bytearray)):
+        parts.append(b"b%d:" % len(value))
+        parts.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        parts.append(b"%s%d:" % (b"l" if isinstance(value, list) else b"t", len(value)))
+        for item in value:
+            _encode(item, parts)
+    elif isinstance(value, dict):
+        entries = []
+        for item_key, item in value.items():
+            entry = []
+            _encode(item_key, entry)
+            _encode(item, entry)
+            entries.append(b"".join(entry))
+        parts.append(b"d%d:" % len(entries))
+        parts.extend(sorted(entries))
+    elif isinstance(value, (set, frozenset)):
+        items = []
+        for item in value:
+            encoded = []
+            _encode(item, encoded)
+            items.append(b"".join(encoded))
+        parts.append(b"%s%d:" % (b"S" if isinstance(value, set) else b"z", len(items)))
+        parts.extend(sorted(items))
+    else:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        parts.append(b"p%d:" % len(data))
+        parts.append(data)
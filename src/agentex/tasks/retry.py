@@ -0,0 +1,84 @@
+import asyncio
+import heapq
+import random
+from itertools import count
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter between attempts of a failed task."""
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 30.0, multiplier: float = 2.0,
+                 jitter: bool = True):
+        """
+        :param base_delay: Delay before the first retry, in seconds.
+        :param max_delay: Upper bound of any delay, in seconds.
+        :param multiplier: Growth factor of the delay per attempt.
+        :param jitter: Randomize each delay between half and all of its value, so tasks that failed
+                       together do not retry together.
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (starting at 1)."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+
+class DelayQueue:
+    """
+    Holds items until they are due, then hands them to on_due(item).
+    All items share one heap and a single loop timer armed for the earliest one, instead of
+    one sleeping coroutine per item.
+    """
+
+    def __init__(self, on_due):
+        self.on_due = on_due
+        self._heap = []
+        self._order = count()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, delay: float, item):
+        loop = asyncio.get_running_loop()
+        entry = (loop.time() + delay, next(self._order), item)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._arm(loop)
+
+    def items(self):
+        """Items still waiting, soonest first."""
+        return [item for _, _, item in sorted(self._heap)]
+
+    def remove(self, item) -> bool:
+        """Stop waiting for an item; returns False if it is not waiting."""
+        for index, entry in enumerate(self._heap):
+            if entry[2] is item:
+                was_first = index == 0
+                self._heap.pop(index)
+                heapq.heapify(self._heap)
+                if was_first:
+                    self._arm(asyncio.get_running_loop())
+                return True
+        return False
+
+    def _arm(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._heap:
+            self._timer = loop.call_at(self._heap[0][0], self._fire, loop)
+
+    def _fire(self, loop):
+        self._timer = None
+        now = loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item = heapq.heappop(self._heap)
+            self.on_due(item)
+        self._arm(loop)
@@ -0,0 +1,45 @@
+class DeficitRoundRobin:
+    """
+    Weighted fair choice between the capabilities of one agent (deficit round robin, unit cost per task).
+    Each visit to a capability that has queued tasks credits it with its weight, and it is served while
+    that credit lasts. Over time capabilities are served in proportion to their weights, so a busy
+    capability cannot starve the others.
+    """
+
+    def __init__(self, weight=None):
+        """
+        :param weight: Function returning the (positive) weight of a capability; all weigh 1 by default.
+        """
+        self.weight = weight or (lambda capability: 1)
+        self._ring = []
+        self._position = 0
+        self._deficits = {}
+        self._credited = False
+
+    def pick(self, ready):
+        """
+        Choose which capability to serve next.
+        :param ready: Capabilities that currently have at least one queued task (must not be empty).
+        """
+        ready = set(ready)
+        for capability in sorted(ready.difference(self._deficits)):
+            self._ring.append(capability)
+            self._deficits[capability] = 0
+
+        while True:
+            capability = self._ring[self._position]
+            if capability not in ready:
+                self._deficits[capability] = 0  # Idle capabilities do not bank credit
+                self._advance()
+                continue
+            if not self._credited:
+                self._deficits[capability] += self.weight(capability)
+                self._credited = True
+            if self._deficits[capability] >= 1:
+                self._deficits[capability] -= 1
+                return capability
+            self._advance()
+
+    def _advance(self):
+        self._position = (self._position + 1) % len(self._ring)
+        self._credited = False
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class TaskStatus(str, Enum):
+    """Lifecycle state of a task. Members compare equal to their string values."""
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __str__(self):
+        return self.value
@@ -1,24 +1,32 @@
-import uuid
+from .ids import next_id
+from .status import TaskStatus
 
 class Task:
+    __slots__ = ("id", "task_type", "payload", "status")
+
     def __init__(self, task_type: str, payload: dict):
         """
         Initialize a Task object.
         :param task_type: The type of task (e.g., 'data_processing', 'analysis').
         :param payload: The data needed to complete the task.
         """
-        self.task_id = str(uuid.uuid4())  # Unique ID for tracking
+        self.id = next_id()  # Unique ID for tracking
         self.task_type = task_type
         self.payload = payload
-        self.status = "pending"  # Status: pending, in_progress, completed
+        self.status = TaskStatus.PENDING
+
+    @property
+    def task_id(self) -> str:
+        """String form of the task id, built only when asked for."""
+        return str(self.id)
 
     def mark_in_progress(self):
         """Mark the task as in progress."""
-        self.status = "in_progress"
+        self.status = TaskStatus.IN_PROGRESS
 
     def mark_completed(self):
         """Mark the task as completed."""
-        self.status = "completed"
+        self.status = TaskStatus.COMPLETED
 
     def __repr__(self):
         return f"<Task {self.task_id} - {self.task_type} - {self.status}>"
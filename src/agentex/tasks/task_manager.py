@@ -1,46 +1,535 @@
 import asyncio
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from agentex.logger.logger import get_logger
+from agentex.metrics.registry import TaskMetrics, default_registry
+from .backlog import TaskBacklog
+from .retry import DelayQueue, RetryPolicy
+from .status import TaskStatus
 from .task import Task
+from .task_queue import TaskQueue
+
+logger = get_logger()
+
+_FINISHED = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
 
 class TaskManager:
-    def __init__(self):
+    def __init__(self, default_queue_options=None, retry_policy=None, dead_letter_limit: int = 10000,
+                 metrics=None):
         """
         Initialize the TaskManager with separate queues for different task types.
+        :param default_queue_options: BoundedQueue options (maxsize, overflow, watermarks...) applied to
+                                      every task queue not configured through configure_queue().
+        :param retry_policy: Default RetryPolicy for failed tasks that have retries left.
+        :param dead_letter_limit: Number of permanently failed tasks kept in dead_letters.
+        :param metrics: MetricsRegistry receiving queue depths and task latencies (default: the global one).
         """
-        self.task_queues = defaultdict(asyncio.Queue)  # Task queues per capability
+        self.task_queues = {}  # Task queues per capability
+        self.backlogs = {}  # Bulk-submitted tasks per capability, not materialized yet (see add_tasks)
         self.task_registry = {}  # Dynamically registered task types
+        self.default_queue_options = dict(default_queue_options or {})
+        self.queue_options = {}  # Per task type BoundedQueue options
+        self.task_weights = {}  # Share of an agent's attention per task type (default 1)
+        self.expired = 0  # Tasks failed because their deadline passed while queued
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_policies = {}  # Per task type RetryPolicy
+        self.result_caches = {}  # Per task type ResultCache, for memoized task types
+        self.timeouts = {}  # Per task type limit on one attempt, in seconds
+        self.hedge_quantiles = {}  # Per task type run-time quantile after which a task is hedged
+        self._attempts = {}  # task id -> (task, asyncio task awaiting the attempt, hedge timer or None, agent or None)
+        self._hedges = {}  # speculative copy id -> original task
+        self._hedge_copies = {}  # original task id -> its speculative copy
+        self._hedge_owners = {}  # speculative copy id -> agent running the original, which must not take the copy
+        self._hedge_failures = {}  # original task id -> error of its last attempt, failed while its copy runs on
+        self._inflight = {}  # (task_type, payload key) -> queued or running task of a memoized type
+        self._cache_keys = {}  # task id -> payload key, for tasks in _inflight
+        self._finish_waiters = {}  # task id -> future resolved when the task finishes (see wait())
+        self.dead_letters = deque(maxlen=dead_letter_limit)  # Tasks that failed after all retries
+        self._delayed = DelayQueue(self._requeue)  # Failed tasks waiting for their backoff to elapse
+        self.metrics = metrics or default_registry
+        self.task_metrics = TaskMetrics(self.metrics)
+        self.metrics.register_collector(self._collect_metrics, {
+            "agentex_task_queue_depth": "Tasks waiting per task type.",
+            "agentex_task_retries_pending": "Failed tasks waiting for their retry backoff.",
+        })
+        self._waiters = defaultdict(deque)  # Futures of consumers blocked on a capability
 
-    def register_task_type(self, task_type: str, task_class):
+    def register_task_type(self, task_type: str, task_class, weight: float = 1, retry_policy=None, cache=None,
+                           timeout: float = None, hedge: float = None):
         """
         Register a custom task type.
         :param task_type: The name of the task type.
         :param task_class: The class implementing the task logic.
+        :param weight: Relative share of an agent's attention this task type gets when the agent
+                       has several capabilities with queued work.
+        :param retry_policy: Optional RetryPolicy overriding the manager's default for this type.
+        :param cache: Optional ResultCache memoizing this (idempotent) task type by payload: add_task()
+                      returns the cached completed task, or the task already queued or running
+                      for an equal payload, instead of creating a new one.
+        :param timeout: Optional limit in seconds on each attempt; an attempt running longer is cancelled
+                        and fails with asyncio.TimeoutError, so it is retried like any other failure.
+                        Thread and process mode bodies cannot be interrupted and keep their worker busy.
+        :param hedge: Optional run-time quantile (e.g. 0.95) of this type: a task still running after that
+                      long gets a speculative copy queued ahead of equal-priority tasks, for another
+                      agent to pick up. The first of the two to finish wins and the other is cancelled;
+                      a failed copy is dropped, and the task only fails once neither attempt runs.
+                      Hedging starts once 20 attempts of the type have been timed.
         """
         if task_type in self.task_registry:
             raise ValueError(f"Task type '{task_type}' is already registered.")
+        if weight <= 0:
+            raise ValueError("Task type weight must be positive.")
         self.task_registry[task_type] = task_class
-        print(f"Task type '{task_type}' registered successfully.")
+        self.task_weights[task_type] = weight
+        if retry_policy is not None:
+            self.retry_policies[task_type] = retry_policy
+        if cache is not None:
+            self.result_caches[task_type] = cache
+        if timeout is not None:
+            if timeout <= 0:
+                raise ValueError("Task type timeout must be positive.")
+            self.timeouts[task_type] = timeout
+        if hedge is not None:
+            if not 0 < hedge < 1:
+                raise ValueError("Task type hedge quantile must be between 0 and 1.")
+            self.hedge_quantiles[task_type] = hedge
+        logger.info("Task type '%s' registered successfully.", task_type)
+
+    def configure_queue(self, task_type: str, **options):
+        """
+        Set the capacity, overflow policy and watermark callbacks of one task type's queue.
+        Accepts the keyword arguments of BoundedQueue: maxsize, overflow ("block", "reject" or
+        "drop_oldest"), high_watermark, low_watermark, on_high_watermark and on_low_watermark.
+        """
+        self.queue_options[task_type] = options
+        if task_type in self.task_queues:
+            self.task_queues[task_type].configure(**options, on_drop=self._on_drop)
+
+    def get_weight(self, task_type: str):
+        """Scheduling weight of a task type."""
+        return self.task_weights.get(task_type, 1)
+
+    def queue_depth(self, task_type: str) -> int:
+        """Number of tasks waiting for a task type, in its queue or its backlog."""
+        queue = self.task_queues.get(task_type)
+        backlog = self.backlogs.get(task_type)
+        return (queue.depth if queue is not None else 0) + (len(backlog) if backlog is not None else 0)
 
-    async def add_task(self, task_type: str, payload: dict, retries: int = 0):
+    def queue_depths(self) -> dict:
+        """Number of waiting tasks for every task type."""
+        return {task_type: self.queue_depth(task_type) for task_type in {*self.task_queues, *self.backlogs}}
+
+    def _collect_metrics(self):
+        for task_type, depth in self.queue_depths().items():
+            yield "agentex_task_queue_depth", {"task_type": task_type}, depth
+        yield "agentex_task_retries_pending", {}, len(self._delayed)
+
+    def _get_queue(self, task_type: str):
+        queue = self.task_queues.get(task_type)
+        if queue is None:
+            options = self.queue_options.get(task_type, self.default_queue_options)
+            queue = TaskQueue(**options, on_drop=self._on_drop, name=task_type)
+            self.task_queues[task_type] = queue
+        return queue
+
+    def _on_drop(self, task):
+        """A task was discarded by a drop_oldest queue to make room for a newer one."""
+        asyncio.ensure_future(self._fail(task, "Dropped: task queue is full."))
+
+    async def add_task(self, task_type: str, payload: dict, retries: int = 0, priority: int = 0,
+                       deadline: float = None):
         """
-        Create a task instance dynamically and add it to the appropriate queue.
+        Create a task instance dynamically and add it to the appropriate queue, and return it.
+        When the queue is full, this waits for space, raises asyncio.QueueFull or evicts the
+        least urgent task, depending on the queue's overflow policy.
+        For a memoized task type (see register_task_type), an equal payload that completed recently or
+        is still queued or running returns that task instead; wait() on it yields the shared result.
+        :param priority: Lower values are handed out first.
+        :param deadline: Seconds from now after which the task is failed instead of started.
+                         Among tasks of equal priority, the earliest deadline goes first.
         """
         task_class = self.task_registry.get(task_type)
         if task_class is None:
             raise ValueError(f"Unknown task type: {task_type}. Please register it first.")
 
+        cache = self.result_caches.get(task_type)
+        if cache is not None:
+            key = cache.key(payload)
+            task = cache.get(key)
+            if task is not None:
+                self.task_metrics.count_cache_hit(task_type, coalesced=False)
+                return task
+            task = self._inflight.get((task_type, key))
+            if task is not None:
+                self.task_metrics.count_cache_hit(task_type, coalesced=True)
+                return task
+
         task = task_class(task_type, payload, retries)
-        await self.task_queues[task_type].put(task)
-        print(f"Task '{task_type}' added to queue with payload: {payload}")
+        task.priority = priority
+        if deadline is not None:
+            task.deadline = time.monotonic() + deadline
+        if cache is not None:
+            self._inflight[(task_type, key)] = task
+            self._cache_keys[task.id] = key
+        try:
+            await self._enqueue(task)
+        except BaseException:
+            if cache is not None:
+                del self._inflight[(task_type, key)], self._cache_keys[task.id]
+            raise
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task '%s' added to queue with payload: %r", task_type, payload, extra=task.log_fields())
+        return task
+
+    async def add_tasks(self, task_type: str, payloads, retries: int = 0, priority: int = 0,
+                        deadline: float = None) -> int:
+        """
+        Submit many tasks of one type at once without creating task objects for them yet.
+        They are kept column-wise in a TaskBacklog and turned into tasks, oldest first, as agents
+        drain the queue, which keeps millions of pending tasks cheap. Queue capacity limits do not
+        apply to the backlog, and neither does result caching. Returns the number of tasks added.
+        """
+        if task_type not in self.task_registry:
+            raise ValueError(f"Unknown task type: {task_type}. Please register it first.")
+        now = time.monotonic()
+        backlog = self.backlogs.get(task_type)
+        if backlog is None:
+            backlog = self.backlogs[task_type] = TaskBacklog()
+        added = backlog.extend(payloads, retries, priority, None if deadline is None else now + deadline, now)
+        for _ in range(min(added, len(self._waiters.get(task_type, ())))):
+            self._wake_waiter(task_type)
+        logger.debug("%d '%s' tasks added to the backlog.", added, task_type)
+        return added
+
+    def _materialize(self, task_type: str, limit: int = 64):
+        """Turn up to `limit` backlog entries into tasks in the (empty) queue of their type."""
+        backlog = self.backlogs[task_type]
+        queue = self._get_queue(task_type)
+        task_class = self.task_registry[task_type]
+        if queue.maxsize:
+            limit = min(limit, queue.maxsize - queue.qsize())
+        for _ in range(min(limit, len(backlog))):
+            payload, retries, priority, deadline, enqueued_at = backlog.pop()
+            task = task_class(task_type, payload, retries)
+            task.priority = priority
+            task.deadline = deadline
+            task.enqueued_at = enqueued_at
+            queue.put_nowait(task)
+        if not backlog:
+            del self.backlogs[task_type]
+
+    async def retry_task(self, task, error):
+        """
+        Handle a failed attempt: re-enqueue the task after a backoff delay if it has retries left,
+        otherwise mark it failed and move it to the dead-letter queue.
+        Returns the backoff delay in seconds, or None if the task failed permanently.
+        A failed speculative copy is dropped without a retry, and a task whose copy is still queued or
+        running only fails if the copy fails too.
+        """
+        if task.id in self._hedges:
+            task.status = TaskStatus.FAILED
+            task.result = str(error)
+            self.task_done(task)
+            return None
+        copy = self._hedge_copies.get(task.id)
+        if task.retries <= 0 and copy is not None and copy.status in (TaskStatus.PENDING, TaskStatus.IN_PROGRESS):
+            self._hedge_failures[task.id] = str(error)  # The copy may still succeed
+            return None
+        if task.retries > 0:
+            task.retries -= 1
+            task.attempts += 1
+            task.status = TaskStatus.PENDING
+            delay = self.retry_policies.get(task.task_type, self.retry_policy).delay(task.attempts)
+            self._delayed.schedule(delay, task)
+            self.task_metrics.count_retry(task.task_type)
+            return delay
+        await self._fail(task, str(error), dead_letter=True)
+        return None
+
+    def task_done(self, task):
+        """
+        Record that a task finished, completed or failed for good: release callers blocked in wait()
+        and, for memoized task types, cache a successful result.
+        """
+        original = self._hedges.pop(task.id, None)
+        if original is not None:
+            del self._hedge_copies[original.id], self._hedge_owners[task.id]
+            error = self._hedge_failures.pop(original.id, None)
+            if task.status == TaskStatus.COMPLETED and original.status in (TaskStatus.PENDING, TaskStatus.IN_PROGRESS):
+                self._withdraw(original)  # The copy won the race
+                original.status = TaskStatus.COMPLETED
+                original.result = task.result
+                self.task_metrics.count_hedge(original.task_type, won=True)
+                self.task_done(original)
+            elif error is not None:
+                asyncio.ensure_future(self._fail(original, error, dead_letter=True))  # Both attempts failed
+            return
+        copy = self._hedge_copies.pop(task.id, None)
+        if copy is not None:
+            del self._hedges[copy.id], self._hedge_owners[copy.id]
+            self._hedge_failures.pop(task.id, None)
+            if copy.status in (TaskStatus.PENDING, TaskStatus.IN_PROGRESS):
+                self._withdraw(copy)  # The original won the race
+                copy.status = TaskStatus.CANCELLED
+        key = self._cache_keys.pop(task.id, None)
+        if key is not None:
+            del self._inflight[(task.task_type, key)]
+            if task.status == TaskStatus.COMPLETED:
+                self.result_caches[task.task_type].put(key, task)
+        waiter = self._finish_waiters.pop(task.id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(task)
+
+    async def wait(self, task):
+        """Wait until a task has completed or failed for good and return it; read its status and result."""
+        if task.status in _FINISHED and task.id not in self._cache_keys:
+            return task
+        waiter = self._finish_waiters.get(task.id)
+        if waiter is None:
+            waiter = self._finish_waiters[task.id] = asyncio.get_running_loop().create_future()
+        return await asyncio.shield(waiter)
+
+    async def run(self, task, attempt, agent=None):
+        """
+        Await one attempt of a task (the coroutine running its body) under the task type's timeout,
+        in a way cancel() and hedging can stop. When the attempt is stopped by cancel() or because a
+        speculative copy finished first, CancelledError is raised and the task's status is no longer
+        IN_PROGRESS; callers tell it apart from their own cancellation by that status.
+        :param agent: The agent running the attempt; a speculative copy of the task is not handed to it.
+        """
+        timeout = self.timeouts.get(task.task_type)
+        hedge_timer = None
+        quantile = self.hedge_quantiles.get(task.task_type)
+        if quantile is not None and task.id not in self._hedges and task.id not in self._hedge_copies:
+            delay = self.task_metrics.run_quantile(task.task_type, quantile)
+            if delay is not None:
+                hedge_timer = asyncio.get_running_loop().call_later(delay, self._hedge, task)
+        current = asyncio.current_task()
+        self._attempts[task.id] = (task, current, hedge_timer, agent)
+        try:
+            if timeout is None:
+                return await attempt
+            return await self._limit(task, attempt, timeout)
+        except asyncio.CancelledError:
+            if task.status != TaskStatus.IN_PROGRESS and hasattr(current, "uncancel"):
+                current.uncancel()  # Only the attempt was meant to stop, not the caller
+            raise
+        finally:
+            record = self._attempts.get(task.id)
+            if record is not None and record[1] is current:
+                del self._attempts[task.id]
+            if hedge_timer is not None:
+                hedge_timer.cancel()
+
+    async def _limit(self, task, attempt, timeout: float):
+        try:
+            return await asyncio.wait_for(attempt, timeout)
+        except asyncio.TimeoutError:
+            self.task_metrics.count_timeout(task.task_type)
+            raise asyncio.TimeoutError(f"Task timed out after {timeout}s.") from None
+
+    def _hedge(self, task):
+        """A task ran longer than its type's hedge quantile: queue a speculative copy of it."""
+        record = self._attempts.get(task.id)
+        if record is None or task.status != TaskStatus.IN_PROGRESS or task.id in self._hedge_copies:
+            return
+        copy = type(task)(task.task_type, task.payload, 0)
+        copy.priority = task.priority - 1  # Ahead of tasks of equal priority
+        copy.enqueued_at = time.monotonic()
+        try:
+            self._get_queue(task.task_type).put_nowait(copy)
+        except asyncio.QueueFull:
+            return  # No room for speculation
+        self._hedges[copy.id] = task
+        self._hedge_copies[task.id] = copy
+        self._hedge_owners[copy.id] = record[3]
+        self.task_metrics.count_hedge(task.task_type)
+        for _ in range(len(self._waiters.get(task.task_type, ()))):
+            self._wake_waiter(task.task_type)  # The agent running the original may be one of them and pass
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task %s is slow; hedging it with task %s.", task.task_id, copy.task_id,
+                         extra=task.log_fields())
+
+    def excluded_agent(self, task):
+        """The agent that must not run a task: for a speculative copy, the one running the original."""
+        return self._hedge_owners.get(task.id)
+
+    async def cancel(self, task_id) -> bool:
+        """
+        Cancel a queued, retry-waiting or running task by id (int or string form). A running attempt is
+        cancelled at its next await; callers blocked in wait() get the task back with status CANCELLED.
+        Tasks still in a bulk backlog (see add_tasks) have no id yet and cannot be cancelled.
+        Returns False if no unfinished task has this id.
+        """
+        task_id = int(task_id)
+        record = self._attempts.get(task_id)
+        task = record[0] if record is not None else self._find_waiting(task_id)
+        if task is None:
+            return False
+        self._withdraw(task)
+        await task.mark_cancelled()
+        self.task_done(task)
+        return True
+
+    def _find_waiting(self, task_id: int):
+        for queue in self.task_queues.values():
+            task = queue.find(task_id)
+            if task is not None:
+                return task
+        for task in self._delayed.items():
+            if task.id == task_id:
+                return task
+        return None
+
+    def _withdraw(self, task):
+        """Stop a task wherever it is: cancel its running attempt or take it out of its queue or the retry wait."""
+        record = self._attempts.pop(task.id, None)
+        if record is not None:
+            record[1].cancel()
+            return
+        queue = self.task_queues.get(task.task_type)
+        if queue is None or not queue.remove(task):
+            self._delayed.remove(task)
+
+    async def _fail(self, task, error_message: str, dead_letter: bool = False):
+        await task.mark_failed(error_message)
+        if dead_letter:
+            self.dead_letters.append(task)
+            self.task_metrics.count_dead_letter(task.task_type)
+        self.task_done(task)
+
+    async def requeue(self, task):
+        """
+        Put a task taken with next_task() back in its queue, e.g. when no agent can take it after all.
+        The task goes back even if the queue filled up meanwhile: waiting for room could wait forever
+        when the caller (like the dispatcher) is the queue's only consumer.
+        """
+        task.status = TaskStatus.PENDING
+        task.enqueued_at = time.monotonic()
+        self._get_queue(task.task_type)._unget([task])
+        self._wake_waiter(task.task_type)
+
+    def pending_retries(self):
+        """Tasks waiting for their retry backoff to elapse, soonest first."""
+        return self._delayed.items()
+
+    async def _enqueue(self, task):
+        task.enqueued_at = time.monotonic()
+        await self._get_queue(task.task_type).put(task)
+        self._wake_waiter(task.task_type)
+
+    def _requeue(self, task):
+        """A retry backoff elapsed: put the task back in its queue."""
+        async def requeue():
+            try:
+                await self._enqueue(task)
+            except asyncio.QueueFull:
+                await self._fail(task, "Dropped: task queue is full on retry.", dead_letter=True)
+
+        asyncio.ensure_future(requeue())
 
     async def get_task(self, capability: str):
         """
         Retrieve a task from the queue for a specific capability.
         """
-        if capability in self.task_queues and not self.task_queues[capability].empty():
-            task = await self.task_queues[capability].get()
-            await task.mark_in_progress()
-            print(f"Task {task.task_type} assigned to agent with capability '{capability}'.")
-            return task
-        else:
+        task = self._pop_task(capability)
+        if task is None:
             return None
+        await task.mark_in_progress()
+        if logger.is_enabled_for("debug"):
+            logger.debug("Task %s assigned to agent with capability '%s'.", task.task_type, capability,
+                         extra=task.log_fields())
+        return task
+
+    async def next_task(self, capabilities, scheduler=None, wait: bool = True, agent=None):
+        """
+        Wait until a task is available for any of the given capabilities and return it.
+        Unlike get_task(), this never returns None unless wait is False: the caller is suspended
+        (not polling) until add_task() enqueues work it can handle.
+        :param capabilities: Iterable of capabilities (task types) the caller can handle.
+        :param scheduler: Optional DeficitRoundRobin choosing between capabilities that have work.
+        :param wait: Return None instead of waiting when no task is queued.
+        :param agent: The agent asking; speculative copies of the tasks it runs are left for other agents.
+        """
+        capabilities = list(capabilities)
+        loop = asyncio.get_running_loop()
+        while True:
+            capability, task = self._pop_ready(capabilities, scheduler, agent)
+            if task is not None:
+                await task.mark_in_progress()
+                if logger.is_enabled_for("debug"):
+                    logger.debug("Task %s assigned to agent with capability '%s'.", task.task_type, capability,
+                                 extra=task.log_fields())
+                return task
+            if not wait:
+                return None
+
+            waiter = loop.create_future()
+            for capability in capabilities:
+                self._waiters[capability].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # We were woken for a task but cancelled before taking it; hand the wakeup on.
+                if waiter.done() and not waiter.cancelled():
+                    for capability in capabilities:
+                        if self.queue_depth(capability):
+                            self._wake_waiter(capability)
+                raise
+            finally:
+                for capability in capabilities:
+                    waiters = self._waiters.get(capability)
+                    if waiters is not None:
+                        try:
+                            waiters.remove(waiter)
+                        except ValueError:
+                            pass
+                        if not waiters:
+                            del self._waiters[capability]
+
+    def _pop_ready(self, capabilities, scheduler=None, agent=None):
+        """Take the next task for any of the capabilities, letting the scheduler pick between them."""
+        ready = [capability for capability in capabilities if self.queue_depth(capability)]
+        while ready:
+            capability = scheduler.pick(ready) if scheduler is not None else ready[0]
+            task = self._pop_task(capability, agent)
+            if task is not None:
+                return capability, task
+            ready.remove(capability)  # Only expired tasks, or copies of the agent's own tasks
+        return None, None
+
+    def _pop_task(self, capability: str, agent=None):
+        """Take the most urgent unexpired task for a capability without waiting, or return None."""
+        queue = self.task_queues.get(capability)
+        skipped = []  # Speculative copies of tasks the agent runs itself
+        try:
+            while True:
+                if queue is None or queue.empty():
+                    if capability not in self.backlogs:
+                        return None
+                    self._materialize(capability)
+                    queue = self.task_queues[capability]
+                task = queue.get_nowait()
+                if agent is not None and self._hedge_owners and self._hedge_owners.get(task.id) is agent:
+                    skipped.append(task)
+                    continue
+                now = time.monotonic()
+                if task.deadline is None or task.deadline > now:
+                    if task.enqueued_at is not None:
+                        self.task_metrics.observe_wait(task.task_type, now - task.enqueued_at)
+                    return task
+                self.expired += 1
+                self.task_metrics.count_expired(task.task_type)
+                asyncio.ensure_future(self._fail(task, "Deadline exceeded before the task was started."))
+        finally:
+            if skipped:
+                queue._unget(skipped)
+
+    def _wake_waiter(self, capability: str):
+        """Wake one consumer blocked in next_task() on this capability."""
+        waiters = self._waiters.get(capability)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
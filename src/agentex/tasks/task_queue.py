@@ -0,0 +1,78 @@
+import heapq
+import math
+from itertools import count
+from agentex.queues.bounded_queue import BoundedQueue
+
+
+class TaskQueue(BoundedQueue):
+    """
+    A BoundedQueue of tasks ordered by priority (lower value first), then earliest deadline,
+    then arrival order. The drop_oldest policy evicts the least urgent task, oldest first.
+    Entries are shared by a min-heap for get() and a max-heap for eviction; an entry taken out
+    through one of them is tombstoned (its task set to None) and skipped when the other reaches it.
+    """
+
+    def _init(self, maxsize):
+        self._queue = []  # [priority, deadline, arrival, task] entries, most urgent first
+        self._evictable = []  # (-priority, -deadline, arrival, entry), least urgent and oldest first
+        self._size = 0  # Live entries; both heaps may also hold tombstones
+        self._arrivals = count()
+
+    def qsize(self):
+        return self._size
+
+    def empty(self):
+        return not self._size
+
+    def _put(self, task):
+        deadline = task.deadline if task.deadline is not None else math.inf
+        entry = [task.priority, deadline, next(self._arrivals), task]
+        heapq.heappush(self._queue, entry)
+        heapq.heappush(self._evictable, (-entry[0], -deadline, entry[2], entry))
+        self._size += 1
+
+    def _get(self):
+        while True:
+            entry = heapq.heappop(self._queue)
+            if entry[-1] is not None:
+                return self._take(entry)
+
+    def _unget(self, tasks):
+        for task in tasks:
+            self._put(task)
+        self._wakeup_next(self._getters)
+
+    def _take(self, entry):
+        task, entry[-1] = entry[-1], None
+        self._size -= 1
+        # Drop tombstones once they outnumber live entries, so both heaps stay O(queued tasks).
+        if len(self._evictable) > 2 * self._size + 16:
+            self._evictable = [item for item in self._evictable if item[-1][-1] is not None]
+            heapq.heapify(self._evictable)
+        if len(self._queue) > 2 * self._size + 16:
+            self._queue = [entry for entry in self._queue if entry[-1] is not None]
+            heapq.heapify(self._queue)
+        return task
+
+    def find(self, task_id: int):
+        """The queued task with this id, or None."""
+        for entry in self._queue:
+            if entry[-1] is not None and entry[-1].id == task_id:
+                return entry[-1]
+        return None
+
+    def remove(self, task) -> bool:
+        """Take a queued task out of the queue, e.g. because it was cancelled. Returns False if it is not queued."""
+        for entry in self._queue:
+            if entry[-1] is task:
+                self._take(entry)
+                self.task_done()  # The removed task will never be processed
+                self._wakeup_next(self._putters)
+                return True
+        return False
+
+    def _evict(self):
+        while True:
+            entry = heapq.heappop(self._evictable)[-1]
+            if entry[-1] is not None:
+                return self._take(entry)
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from agentex.swarms.swarm import Swarm
+from agentex.agents.agent import Agent
+from agentex.tasks.base_task import BaseTask
+
+
+completed = []
+
+
+class SleepTask(BaseTask):
+    async def execute(self):
+        await asyncio.sleep(self.payload["delay"])
+        completed.append(self.payload["n"])
+        return self.payload["n"]
+
+
+@pytest.mark.asyncio
+async def test_workers_run_tasks_concurrently_and_drain():
+    completed.clear()
+    swarm = Swarm(name="WorkerSwarm", backend="local")
+    swarm.task_manager.register_task_type("sleep", SleepTask)
+    agent = Agent(name="Worker", swarm=swarm, capabilities=["sleep"])
+
+    await agent.start_workers(concurrency=4)
+    for n in range(8):
+        await swarm.task_manager.add_task("sleep", {"delay": 0.05, "n": n})
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    while swarm.task_manager.task_queues["sleep"].qsize():
+        await asyncio.sleep(0.01)
+    await agent.stop(drain=True)
+
+    # Eight 50ms tasks with four slots need two rounds, not eight.
+    assert loop.time() - started < 0.3
+    assert sorted(completed) == list(range(8))
+    assert not agent._running
+
+
+@pytest.mark.asyncio
+async def test_worker_blocks_until_task_is_added():
+    completed.clear()
+    swarm = Swarm(name="IdleSwarm", backend="local")
+    swarm.task_manager.register_task_type("sleep", SleepTask)
+    agent = Agent(name="Idle", swarm=swarm, capabilities=["sleep"])
+
+    runner = asyncio.ensure_future(agent.run(concurrency=1))
+    await asyncio.sleep(0.05)
+    assert not agent._running
+
+    await swarm.task_manager.add_task("sleep", {"delay": 0, "n": "late"})
+    await asyncio.sleep(0.01)
+    await agent.stop()
+    await runner
+    assert completed == ["late"]
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import pytest
+from agentex.backends import LocalMessageBackend, available_backends, register_backend
+from agentex.swarms.swarm import Swarm
+
+# Modules a local-only worker must not pay for at startup.
+HEAVY_MODULES = ("aio_pika", "aiohttp", "exlog", "textblob", "feedparser", "multiprocessing",
+                 "agentex.backends.rabbitmq_backend", "agentex.backends.multiprocess_backend")
+
+
+class ConfiguredBackend(LocalMessageBackend):
+    @classmethod
+    def from_config(cls, config=None, metrics=None, codec=None):
+        backend = cls(metrics=metrics, codec=codec)
+        backend.config = config
+        return backend
+
+
+def test_importing_agentex_does_not_load_optional_backends():
+    code = ("import sys, agentex; agentex.Swarm('startup'); "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == ""
+
+
+def test_backends_are_resolved_from_the_registry():
+    register_backend("configured", ConfiguredBackend)
+    swarm = Swarm(name="test", backend="configured", config={"shard": 3})
+    assert isinstance(swarm.backend, ConfiguredBackend) and swarm.backend.config == {"shard": 3}
+    assert swarm.backend.metrics is swarm.metrics
+    assert {"local", "rabbitmq", "multiprocess", "configured"} <= set(available_backends())
+
+    register_backend("lazy", "agentex.backends.local_backend:LocalMessageBackend")
+    assert isinstance(Swarm(name="lazy", backend="lazy").backend, LocalMessageBackend)
+    with pytest.raises(ValueError, match="Unknown backend: missing"):
+        Swarm(name="test", backend="missing")
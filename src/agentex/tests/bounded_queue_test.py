@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from agentex.queues.bounded_queue import BoundedQueue
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.task_manager import TaskManager
+
+
+class NoopTask(BaseTask):
+    async def execute(self):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_overflow_policies():
+    rejecting = BoundedQueue(maxsize=2, overflow="reject")
+    await rejecting.put(1)
+    await rejecting.put(2)
+    with pytest.raises(asyncio.QueueFull):
+        await rejecting.put(3)
+    assert rejecting.rejected == 1
+
+    dropped = []
+    dropping = BoundedQueue(maxsize=2, overflow="drop_oldest", on_drop=dropped.append)
+    for item in (1, 2, 3):
+        await dropping.put(item)
+    assert dropped == [1]
+    assert [dropping.get_nowait(), dropping.get_nowait()] == [2, 3]
+
+    with pytest.raises(ValueError):
+        BoundedQueue(overflow="spill")
+
+
+@pytest.mark.asyncio
+async def test_watermark_callbacks_fire_once_per_crossing():
+    events = []
+    queue = BoundedQueue(maxsize=10, high_watermark=4, low_watermark=1,
+                         on_high_watermark=lambda q: events.append(("high", q.depth)),
+                         on_low_watermark=lambda q: events.append(("low", q.depth)))
+    for item in range(6):
+        await queue.put(item)
+    while queue.depth:
+        queue.get_nowait()
+    assert events == [("high", 4), ("low", 1)]
+
+
+@pytest.mark.asyncio
+async def test_add_task_blocks_producer_when_queue_is_full():
+    manager = TaskManager()
+    manager.register_task_type("noop", NoopTask)
+    manager.configure_queue("noop", maxsize=1)
+
+    await manager.add_task("noop", {})
+    producer = asyncio.ensure_future(manager.add_task("noop", {}))
+    await asyncio.sleep(0.01)
+    assert not producer.done()
+    assert manager.queue_depths() == {"noop": 1}
+
+    taken = await manager.get_task("noop")
+    await asyncio.wait_for(producer, 1)
+    assert manager.queue_depth("noop") == 1
+
+    await asyncio.wait_for(manager.requeue(taken), 1)  # Never waits for room
+    assert manager.queue_depth("noop") == 2
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from agentex.backends.rabbitmq_backend import RabbitMQBackend
+from agentex.messages import Envelope, EnvelopeCodec, TextCodec
+from agentex.rabbitmq.inmemory import InMemoryBroker
+
+
+def test_bodies_round_trip_as_the_same_kind():
+    codec = EnvelopeCodec()
+    assert codec.decode(codec.encode("héllo")) == "héllo"
+    assert codec.decode(codec.encode({"n": [1, 2]})) == {"n": [1, 2]}
+    body = codec.decode(codec.encode(memoryview(b"\x00raw")))
+    assert isinstance(body, memoryview) and body == b"\x00raw"
+
+
+def test_envelope_headers_and_compression():
+    codec = EnvelopeCodec(compress_threshold=1024)
+    envelope = Envelope(b"x" * 100000, message_type="result", task_id=2 ** 62, headers={"agent": "A"})
+    data = codec.encode(envelope)
+    assert len(data) < 1000
+    assert codec.decode(data) == envelope
+
+
+def test_plain_text_frames_are_still_understood():
+    assert EnvelopeCodec().decode(TextCodec().encode("legacy")) == "legacy"
+    text = "AXE deployment report for the night shift"
+    assert EnvelopeCodec().decode(TextCodec().encode(text)) == text
+    with pytest.raises(ValueError):
+        EnvelopeCodec().decode(b"AX\x09" + b"\xff" * 30)
+
+
+@pytest.mark.asyncio
+async def test_rabbitmq_backend_delivers_envelopes():
+    broker = InMemoryBroker()
+    backend = RabbitMQBackend(config={"rabbitmq_url": "memory://", "connection_factory": broker.connect,
+                                      "codec": EnvelopeCodec()})
+    await backend.connect()
+    received = []
+
+    async def on_message(message):
+        received.append(message)
+
+    await backend.consume("agent.A", on_message)
+    await backend.publish("agent.A", Envelope({"op": "sum"}, message_type="task", task_id=7))
+    await asyncio.sleep(0)
+    assert received[0].message_type == "task" and received[0].task_id == 7
+    assert received[0].body == {"op": "sum"}
+    await backend.close()
+
+
+def test_rabbitmq_backend_sends_plain_text_by_default():
+    backend = RabbitMQBackend(config={"rabbitmq_url": "memory://"})
+    assert isinstance(backend.codec, TextCodec)
+    assert backend.codec.encode("hello") == b"hello"
@@ -0,0 +1,48 @@
+import asyncio
+import time
+import pytest
+from agentex.agents.agent import Agent
+from agentex.diagnostics import LoopLagMonitor, SlowCallbackDetector, current_task
+from agentex.metrics.registry import MetricsRegistry
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+
+
+class BlockingTask(BaseTask):
+    async def execute(self):
+        assert current_task() is self
+        time.sleep(self.payload["seconds"])  # Blocks the whole event loop
+        return None
+
+
+@pytest.mark.asyncio
+async def test_slow_callbacks_are_attributed_to_tasks_and_lag_is_measured():
+    swarm = Swarm(name="test", backend="local", metrics=MetricsRegistry())
+    swarm.task_manager.register_task_type("blocking", BlockingTask)
+    swarm.task_manager.register_task_type("quick", BlockingTask)
+    worker = Agent(name="worker", swarm=swarm, capabilities=["blocking", "quick"])
+    executions = []
+    swarm.hooks.add("after_execute", lambda agent, task, seconds: executions.append((task.task_type, seconds)))
+
+    monitor = LoopLagMonitor(interval=0.005, threshold=0.03, metrics=swarm.metrics)
+    detector = SlowCallbackDetector(swarm.hooks, threshold=0.03, metrics=swarm.metrics)
+    monitor.start()
+    detector.start()
+    try:
+        await swarm.task_manager.add_task("quick", {"seconds": 0})
+        await swarm.task_manager.add_task("blocking", {"seconds": 0.06})
+        await worker.start_workers()
+        await asyncio.sleep(0.05)
+        time.sleep(0.04)  # Blocking outside any task
+        await asyncio.sleep(0.01)
+    finally:
+        detector.stop()
+        monitor.stop()
+        await worker.stop()
+
+    assert [task_type for task_type, _, _ in detector.top()] == ["blocking", ""]
+    assert detector.top()[0][1] >= 0.06 and detector.counts["blocking"] == 1
+    assert monitor.stalls >= 2 and monitor.max_lag >= 0.05
+    assert sorted(task_type for task_type, _ in executions) == ["blocking", "quick"]
+    assert swarm.hooks.executing  # The test's own hook is left
+    assert asyncio.events.Handle._run.__name__ == "_run"  # Instrumentation removed
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from agentex.agents.agent import Agent
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+
+
+class RecordTask(BaseTask):
+    async def execute(self):
+        await asyncio.sleep(self.payload["delay"])
+        return self.payload["n"]
+
+
+async def wait_until(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_tasks_are_pushed_to_the_least_loaded_agent():
+    swarm = Swarm(name="push", backend="local")
+    swarm.task_manager.register_task_type("work", RecordTask)
+    agents = [Agent(name=f"a{n}", swarm=swarm, capabilities=["work"], capacity=2) for n in range(3)]
+    swarm.start_dispatching()
+
+    tasks = [await swarm.assign_task("work", {"delay": 0.05, "n": n}) for n in range(6)]
+    await asyncio.sleep(0.01)
+    # Six tasks over three agents with two slots each: all start at once, two per agent.
+    assert [agent.in_flight for agent in agents] == [2, 2, 2]
+    await wait_until(lambda: all(task.result is not None for task in tasks))
+    assert [task.result for task in tasks] == list(range(6))
+    await swarm.close()
+
+
+@pytest.mark.asyncio
+async def test_paused_agents_receive_nothing_until_resumed():
+    swarm = Swarm(name="push", backend="local")
+    swarm.task_manager.register_task_type("work", RecordTask)
+    agent = Agent(name="slow", swarm=swarm, capabilities=["work"])
+    agent.pause()
+    swarm.start_dispatching()
+
+    task = await swarm.assign_task("work", {"delay": 0, "n": 1}, priority=1)
+    await asyncio.sleep(0.01)
+    assert agent.in_flight == 0 and swarm.task_manager.queue_depth("work") == 1
+
+    agent.resume()
+    await wait_until(lambda: task.result == 1)
+    assert swarm.dispatcher.dispatched == 1
+    await swarm.close()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import time
+import pytest
+from abc import ABC, abstractmethod
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.executor import TaskExecutor
+
+
+class BlockingTask(BaseTask):
+    execution_mode = "thread"
+
+    @staticmethod
+    def compute(payload):
+        time.sleep(payload["seconds"])
+        return "slept"
+
+
+class PidTask(BaseTask):
+    execution_mode = "process"
+
+    @staticmethod
+    def compute(payload):
+        return os.getpid(), sum(payload)
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_keeps_the_loop_responsive():
+    executor = TaskExecutor()
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    beat = asyncio.ensure_future(heartbeat())
+    result = await executor.run(BlockingTask("block", {"seconds": 0.2}))
+    beat.cancel()
+    executor.shutdown()
+
+    assert result == "slept"
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_process_mode_runs_in_another_process():
+    executor = TaskExecutor(max_processes=1)
+    pid, total = await executor.run(PidTask("pid", list(range(10))))
+    executor.shutdown()
+
+    assert total == 45
+    assert pid != os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_unknown_mode_is_rejected():
+    task = PidTask("pid", [])
+    task.execution_mode = "gpu"
+    with pytest.raises(ValueError):
+        await TaskExecutor().run(task)
+
+
+def test_task_classes_without_a_body_are_rejected():
+    with pytest.raises(TypeError):
+        class EmptyTask(BaseTask):
+            pass
+
+    class AbstractTask(BaseTask, ABC):  # Abstract bases may leave the body to their subclasses
+        @abstractmethod
+        def describe(self):
+            pass
+
+    assert AbstractTask.__abstractmethods__ == {"describe"}
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from agentex.agents.agent import Agent
+from agentex.backends.local_backend import LocalMessageBackend
+from agentex.routing.topic_router import TopicRouter
+from agentex.swarms.swarm import Swarm
+
+
+def test_topic_router_wildcards():
+    router = TopicRouter()
+    router.bind("agent.*", "star")
+    router.bind("agent.#", "hash")
+    router.bind("#", "all")
+    router.bind("agent.A", "exact")
+
+    assert sorted(router.route("agent.A")) == ["all", "exact", "hash", "star"]
+    assert sorted(router.route("agent.A.inbox")) == ["all", "hash"]
+    assert sorted(router.route("agent")) == ["all", "hash"]
+    assert router.route("broadcast") == ["all"]
+
+    router.unbind("#", "all")
+    assert router.route("broadcast") == []
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_same_object_to_every_matching_queue():
+    backend = LocalMessageBackend()
+    received = {"agent.*": [], "audit": [], "agent.A": []}
+
+    def collect(name):
+        async def callback(message):
+            received[name].append(message)
+        return callback
+
+    consumers = [
+        asyncio.ensure_future(backend.consume("agent.*", collect("agent.*"))),
+        asyncio.ensure_future(backend.consume("audit", collect("audit"), bindings=["#"])),
+        asyncio.ensure_future(backend.consume("agent.A", collect("agent.A"))),
+    ]
+    await asyncio.sleep(0)
+
+    message = {"body": "hello"}
+    await backend.publish("agent.A", message)
+    await backend.publish("agent.B", "only wildcard")
+    await asyncio.sleep(0)
+
+    assert received["agent.A"] == [message]
+    assert received["agent.*"][0] is message
+    assert received["audit"][0] is message
+    assert received["agent.*"][1] == received["audit"][1] == "only wildcard"
+    for consumer in consumers:
+        consumer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_messages_published_before_consume_are_kept():
+    backend = LocalMessageBackend()
+    await backend.publish("agent.late", "early")
+    received = []
+
+    async def callback(message):
+        received.append(message)
+
+    consumer = asyncio.ensure_future(backend.consume("agent.late", callback))
+    await asyncio.sleep(0)
+    assert received == ["early"]
+    consumer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_batches_fill_up_or_flush_after_max_wait():
+    backend = LocalMessageBackend()
+    batches = []
+
+    async def handler(messages):
+        batches.append(messages)
+
+    consumer = asyncio.ensure_future(backend.consume_batch("agent.bulk", handler, max_batch=3, max_wait_ms=20))
+    await asyncio.sleep(0)
+    for n in range(4):
+        await backend.publish("agent.bulk", n)
+    await asyncio.sleep(0.01)
+    assert batches == [[0, 1, 2]]  # The last message waits for more
+    await asyncio.sleep(0.03)
+    assert batches == [[0, 1, 2], [3]]
+
+    await backend.publish("agent.bulk", 4)
+    await asyncio.sleep(0)
+    consumer.cancel()  # The message taken for an unfinished batch goes back to the queue
+    await asyncio.gather(consumer, return_exceptions=True)
+    assert backend.queue_depth("agent.bulk") == 1
+
+
+@pytest.mark.asyncio
+async def test_unrouted_messages_are_capped_until_a_consumer_binds():
+    backend = LocalMessageBackend(unrouted_limit=3)
+    for n in range(5):
+        await backend.publish("agent.late", n)
+    assert backend.queue_depth("agent.late") == 3  # The two oldest were dropped
+
+    backend.declare_queue("agent.late")  # A consumer arrives: the queue is no longer capped
+    for n in range(5, 10):
+        await backend.publish("agent.late", n)
+    assert backend.queue_depth("agent.late") == 8
+
+    dropping = LocalMessageBackend(unrouted_limit=0)
+    await dropping.publish("nobody", "lost")
+    assert dropping.queue_depths() == {} and dropping.unrouted_dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_broadcast_is_published_once_to_consuming_agents():
+    swarm = Swarm(name="test", backend="local")
+    received = {"a": [], "b": []}
+
+    def collect(name):
+        async def on_message(message):
+            received[name].append(message)
+        return on_message
+
+    agents = [Agent(name=name, swarm=swarm, on_message=collect(name)) for name in received]
+    Agent(name="idle", swarm=swarm)  # Not consuming: broadcasts are not kept for it
+    await swarm.broadcast("early")
+    assert swarm.backend.queue_depths() == {}
+
+    ready = [asyncio.Event() for _ in agents]
+    consumers = [asyncio.ensure_future(agent.consume_messages(ready=event)) for agent, event in zip(agents, ready)]
+    for event in ready:
+        await event.wait()
+    for n in range(3):
+        await swarm.broadcast(str(n))
+    await asyncio.sleep(0.01)
+
+    assert received == {"a": ["0", "1", "2"], "b": ["0", "1", "2"]}
+    assert set(swarm.backend.queue_depths()) == {"agent.a", "agent.b"}
+    for consumer in consumers:
+        consumer.cancel()
@@ -0,0 +1,85 @@
+import logging
+from agentex.logger.logger import BackgroundQueueHandler, LoggerWrapper
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class Expensive:
+    formatted = 0
+
+    def __str__(self):
+        Expensive.formatted += 1
+        return "expensive"
+
+    __repr__ = __str__
+
+
+def test_disabled_debug_messages_are_not_formatted():
+    logger = LoggerWrapper(log_level="info", use_exlog=False, name="agentex.test.disabled")
+    capture = CaptureHandler()
+    logger.logger.addHandler(capture)
+
+    logger.debug("Value: %s %r", Expensive(), Expensive())
+    assert Expensive.formatted == 0
+    assert capture.records == []
+    assert not logger.is_enabled_for("debug")
+
+
+def test_extra_fields_reach_the_record():
+    logger = LoggerWrapper(log_level="info", use_exlog=False, name="agentex.test.extra")
+    capture = CaptureHandler()
+    logger.logger.addHandler(capture)
+
+    logger.warning("Task %s failed.", "7", extra={"task_id": "7", "task_type": "summarize"})
+    record, = capture.records
+    assert (record.task_id, record.task_type) == ("7", "summarize")
+    assert record.getMessage() == "Task 7 failed."
+
+
+def test_background_handler_delivers_records_as_logged():
+    capture = CaptureHandler()
+    handler = BackgroundQueueHandler(capture)
+    logger = logging.getLogger("agentex.test.background")
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    items = ["first"]
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.error("Items: %s", items, exc_info=True, extra={"task_id": "3"})
+    items.append("second")  # Changed after the call returned
+    handler.stop()  # Drains the queue
+    logger.removeHandler(handler)
+
+    record, = capture.records
+    assert record.getMessage().startswith("Items: ['first']")
+    assert "RuntimeError: boom" in record.getMessage()
+    assert record.args is None and record.exc_info is None
+    assert record.task_id == "3"
+
+
+def test_background_logger_ignores_root_handlers_configured_first():
+    root_capture = CaptureHandler()
+    root = logging.getLogger()
+    root.addHandler(root_capture)
+    try:
+        logger = LoggerWrapper(log_level="info", use_exlog=False, name="agentex.test.root_first", background=True)
+        handler, = logger.logger.handlers
+        assert isinstance(handler, BackgroundQueueHandler) and not logger.logger.propagate
+        capture = CaptureHandler()
+        handler.listener.handlers = (capture,)
+
+        logger.info("Queued %d.", 1)
+        handler.stop()
+        assert [record.getMessage() for record in capture.records] == ["Queued 1."]
+        assert root_capture.records == []  # Not also written synchronously through the root logger
+    finally:
+        root.removeHandler(root_capture)
@@ -0,0 +1,82 @@
+import pytest
+from agentex.agents.agent import Agent
+from agentex.metrics.exporter import render_prometheus
+from agentex.metrics.registry import Histogram, MetricsRegistry
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.task_manager import TaskManager
+
+
+class EchoTask(BaseTask):
+    async def execute(self):
+        if self.payload == "boom":
+            raise RuntimeError("boom")
+        return self.payload
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.4))
+    for value in (0.05, 0.15, 0.15, 0.3):
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == pytest.approx(0.15)
+    assert histogram.quantile(1.0) == pytest.approx(0.4)
+    assert Histogram().quantile(0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_swarm_records_task_and_queue_metrics():
+    swarm = Swarm(name="MetricsSwarm", backend="local")
+    swarm.task_manager.register_task_type("echo", EchoTask)
+    agent = Agent(name="Measured", swarm=swarm, capabilities=["echo"])
+
+    await swarm.task_manager.add_task("echo", "hi")
+    await swarm.task_manager.add_task("echo", "boom")
+    await swarm.task_manager.add_task("echo", "queued")
+    await agent.request_task()
+    await agent.request_task()
+    await swarm.send_to_agent("Measured", "ping")
+
+    metrics = swarm.metrics.snapshot()["metrics"]
+    assert metrics["agentex_task_wait_seconds"][0]["count"] == 2
+    assert metrics["agentex_task_run_seconds"][0]["labels"] == {"task_type": "echo"}
+    assert metrics["agentex_tasks_completed_total"][0]["value"] == 1
+    assert metrics["agentex_task_failures_total"][0]["value"] == 1
+    assert {"labels": {"task_type": "echo"}, "value": 1} in metrics["agentex_task_queue_depth"]
+    assert {"labels": {"queue": "agent.Measured"}, "value": 1} in metrics["agentex_message_queue_depth"]
+
+    text = render_prometheus(swarm.metrics)
+    assert "# TYPE agentex_task_run_seconds histogram" in text
+    assert 'agentex_task_run_seconds_bucket{task_type="echo",le="+Inf"} 2' in text
+    assert 'agentex_messages_published_total{backend="local"} 1' in text
+
+
+def test_counter_rates_between_snapshots():
+    registry = MetricsRegistry()
+    published = registry.counter("published_total", backend="local")
+    before = registry.snapshot()
+    published.inc(50)
+    after = registry.snapshot()
+    after["time"] = before["time"] + 2.0
+    assert registry.rates(before, after) == {"published_total": [{"labels": {"backend": "local"}, "rate": 25.0}]}
+
+
+@pytest.mark.asyncio
+async def test_task_managers_sharing_a_registry_render_one_series_per_label_set():
+    registry = MetricsRegistry()
+    managers = [TaskManager(metrics=registry), TaskManager(metrics=registry)]
+    for manager in managers:
+        manager.register_task_type("echo", EchoTask)
+    await managers[0].add_task("echo", "a")
+    await managers[1].add_task("echo", "b")
+    await managers[1].add_task("echo", "c")
+
+    lines = render_prometheus(registry).splitlines()
+    assert lines.count("# TYPE agentex_task_queue_depth gauge") == 1
+    assert [line for line in lines if line.startswith("agentex_task_queue_depth")] == \
+        ['agentex_task_queue_depth{task_type="echo"} 3']
+    assert [line for line in lines if line.startswith("agentex_task_retries_pending")] == \
+        ["agentex_task_retries_pending 0"]
+    # Each family is one contiguous block following its HELP and TYPE lines.
+    families = [line.split("{")[0].split(" ")[0] for line in lines if not line.startswith("#")]
+    assert all(families[i] == families[i - 1] or families[i] not in families[:i] for i in range(1, len(families)))
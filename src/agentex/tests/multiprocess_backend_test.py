@@ -0,0 +1,78 @@
+import asyncio
+import multiprocessing
+import pickle
+import pytest
+from agentex.agents.agent import Agent
+from agentex.backends.multiprocess_backend import MultiprocessBackend
+from agentex.swarms.swarm import Swarm
+
+
+async def echo_worker(swarm, name):
+    done = asyncio.Event()
+
+    async def on_message(message):
+        await swarm.send_to_agent("hub", {"from": name, "echo": message})
+        if message == "stop":
+            done.set()
+
+    agent = Agent(name=name, swarm=swarm, on_message=on_message, capabilities=["echo"])
+    consumer = asyncio.ensure_future(agent.consume_messages())
+    await swarm.send_to_agent("hub", {"from": name, "echo": "ready"})
+    await done.wait()
+    consumer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_capability_messages_reach_agents_in_worker_processes():
+    swarm = Swarm(name="mp", backend="multiprocess")
+    await swarm.connect()
+    replies = asyncio.Queue()
+    hub = Agent(name="hub", swarm=swarm, on_message=replies.put)
+    consumer = asyncio.ensure_future(hub.consume_messages())
+
+    for name in ("w1", "w2"):
+        swarm.spawn(echo_worker, name)
+    ready = [await asyncio.wait_for(replies.get(), 60) for _ in range(2)]
+    assert sorted(reply["from"] for reply in ready) == ["w1", "w2"]
+    assert swarm.registry.members("capability", "echo") == {"w1", "w2"}
+
+    await swarm.send_to_capability("echo", "ping")
+    echoes = [await asyncio.wait_for(replies.get(), 10) for _ in range(2)]
+    assert sorted((reply["from"], reply["echo"]) for reply in echoes) == [("w1", "ping"), ("w2", "ping")]
+
+    await swarm.send_to_capability("echo", "stop")
+    await swarm.backend.join(timeout=10)
+    assert all(process.exitcode == 0 for process in swarm.backend.processes)
+    consumer.cancel()
+    await swarm.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queues_stop_reading_from_the_pipe():
+    backend = MultiprocessBackend(inbox_size=4)
+    ours, peer = multiprocessing.Pipe()
+    backend._attach(ours)
+    backend.configure_queue("jobs", maxsize=2)  # The "block" policy
+    backend.local.declare_queue("jobs")
+    await backend.connect()
+
+    for n in range(20):
+        peer.send_bytes(pickle.dumps([("deliver", "jobs", backend.codec.encode(n))]))
+    await asyncio.sleep(0.1)
+    assert not backend._reading
+    assert backend._inbox.qsize() <= 4
+    assert ours.poll()  # The remaining frames wait in the pipe
+
+    received = []
+
+    async def on_message(message):
+        received.append(message)
+
+    consumer = asyncio.ensure_future(backend.consume("jobs", on_message))
+    deadline = asyncio.get_running_loop().time() + 5
+    while len(received) < 20 and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    assert received == list(range(20))
+    consumer.cancel()
+    peer.close()
+    await backend.close()
@@ -0,0 +1,258 @@
+import asyncio
+import pytest
+from agentex.agents.agent import Agent
+from agentex.backends.rabbitmq_backend import RabbitMQBackend
+from agentex.rabbitmq.inmemory import InMemoryBroker
+from agentex.swarms.swarm import Swarm
+
+
+def make_backend(broker, **config):
+    return RabbitMQBackend(config={"rabbitmq_url": "memory://", "connection_factory": broker.connect, **config})
+
+
+@pytest.mark.asyncio
+async def test_publish_and_consume_through_channel_pool():
+    broker = InMemoryBroker()
+    backend = make_backend(broker, channel_pool_size=2)
+    await backend.connect()
+
+    received = []
+
+    async def on_message(message):
+        received.append(message)
+
+    await backend.consume("agent.A", on_message)
+    await backend.publish("agent.A", "hello")
+    await backend.publish_many([("agent.A", "one"), ("agent.B", "dropped"), ("agent.A", "two")])
+    await asyncio.sleep(0)
+
+    assert received == ["hello", "one", "two"]
+    # Exchanges are declared once per channel, not once per publish.
+    publisher_channels = [channel for channel in broker.connections[0].channels
+                          if channel not in backend.broker.consumer_channels]
+    assert [channel.declared_exchanges for channel in publisher_channels] == [1]
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_consumers_get_their_own_channel_and_prefetch():
+    broker = InMemoryBroker()
+    backend = make_backend(broker, prefetch_count=2)
+    await backend.connect()
+
+    release = asyncio.Event()
+    in_flight = []
+
+    async def slow_handler(message):
+        in_flight.append(message)
+        await release.wait()
+
+    await backend.consume("agent.slow", slow_handler)
+    await backend.consume("agent.fast", slow_handler, prefetch_count=5)
+    await backend.publish_many([("agent.slow", str(n)) for n in range(5)])
+    await backend.publish_many([("agent.fast", str(n)) for n in range(5)])
+    await asyncio.sleep(0)
+
+    # Only two unacknowledged deliveries are allowed on the default-prefetch consumer.
+    assert len(in_flight) == 7
+    release.set()
+    await asyncio.sleep(0.01)
+    assert len(in_flight) == 10
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_batches_are_acked_with_multiple_ack_and_failures_rejected():
+    broker = InMemoryBroker()
+    backend = make_backend(broker)
+    await backend.connect()
+    batches = []
+
+    async def handler(messages):
+        batches.append(messages)
+        if "bad" in messages:
+            raise ValueError("bulk insert failed")
+
+    consumer = asyncio.ensure_future(backend.consume_batch("agent.bulk", handler, max_batch=4, max_wait_ms=20,
+                                                           concurrency=2))
+    await asyncio.sleep(0)
+    await backend.publish_many([("agent.bulk", str(n)) for n in range(8)] + [("agent.bulk", "bad")])
+    await asyncio.sleep(0.1)
+
+    assert [len(batch) for batch in batches] == [4, 4, 1]
+    channel = backend.broker.consumer_channels[0]
+    assert channel.prefetch_count == 8
+    assert not channel.unacked and not broker.queues["agent.bulk"].messages  # All acked or rejected
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+    await backend.close()
+
+
+async def restore_channel(channel):
+    """Reopen a consumer channel as connect_robust does after a reconnect: delivery tags restart at 1."""
+    restored = await channel.connection.channel()
+    restored.prefetch_count = channel.prefetch_count
+    consumers = list(channel.consumers)
+    await channel.close()  # Unacknowledged messages go back to the queue
+    for consumer in consumers:
+        consumer.channel = restored
+        consumer.unacked = 0
+        restored.consumers.append(consumer)
+        consumer.queue.consumers.append(consumer)
+        consumer.queue.dispatch()
+    return restored
+
+
+@pytest.mark.asyncio
+async def test_batch_acks_follow_a_restored_channel():
+    broker = InMemoryBroker()
+    backend = make_backend(broker)
+    await backend.connect()
+    handled = []
+    release = asyncio.Event()
+
+    async def handler(messages):
+        handled.extend(messages)
+        await release.wait()
+
+    consumer = asyncio.ensure_future(backend.consume_batch("agent.bulk", handler, max_batch=2, max_wait_ms=5))
+    await asyncio.sleep(0)
+    await backend.publish_many([("agent.bulk", str(n)) for n in range(4)])
+    await asyncio.sleep(0.05)
+    assert handled == ["0", "1"]
+
+    # The first batch is still in the handler when the channel is restored with fresh delivery tags.
+    restored = await restore_channel(backend.broker.consumer_channels[0])
+    release.set()
+    await asyncio.sleep(0.1)
+
+    assert handled == ["0", "1", "0", "1", "2", "3"]  # The unacked batch is redelivered on the new channel
+    assert not restored.unacked and not broker.queues["agent.bulk"].messages
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+    await backend.close()
+
+
+def make_sharded_backend(urls, **config):
+    brokers = {url: InMemoryBroker() for url in urls}
+
+    async def connect(url, **kwargs):
+        return await brokers.setdefault(url, InMemoryBroker()).connect(url, **kwargs)
+
+    backend = RabbitMQBackend(urls, config={"connection_factory": connect, **config})
+    return backend, brokers
+
+
+def test_hash_ring_moves_few_keys_when_a_node_joins():
+    from agentex.routing import HashRing
+    ring = HashRing(["amqp://a", "amqp://b", "amqp://c"])
+    keys = [f"agent.{n}" for n in range(5000)]
+    before = {key: ring.node_for(key) for key in keys}
+    assert all(list(before.values()).count(node) > 1200 for node in ring.nodes)
+
+    ring.add("amqp://d")
+    moved = [key for key in keys if ring.node_for(key) != before[key]]
+    assert all(ring.node_for(key) == "amqp://d" for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+@pytest.mark.asyncio
+async def test_sharded_backend_routes_keys_and_rebalances():
+    backend, brokers = make_sharded_backend(["amqp://a", "amqp://b", "amqp://c"])
+    await backend.connect()
+    received = {}
+
+    def collect(name):
+        async def on_message(message):
+            received.setdefault(name, []).append(message)
+        return on_message
+
+    names = [f"agent.{n}" for n in range(30)]
+    for name in names:
+        await backend.consume(name, collect(name))
+    await backend.consume("agent.*", collect("all"))
+    await backend.publish_many([(name, "hello") for name in names])
+    await asyncio.sleep(0.01)
+
+    assert all(received[name] == ["hello"] for name in names)
+    assert len(received["all"]) == 30
+    assert all(broker.published > 0 for broker in brokers.values())  # Spread over every shard
+
+    moved = await backend.add_broker("amqp://d")
+    assert "agent.*" in moved and 0 < len(moved) < len(names)
+    await backend.publish_many([(name, "again") for name in names])
+    await asyncio.sleep(0.01)
+    assert all(received[name] == ["hello", "again"] for name in names)
+    assert len(received["all"]) == 60
+
+    await backend.remove_broker("amqp://a")
+    await backend.publish_many([(name, "third") for name in names])
+    await asyncio.sleep(0.01)
+    assert all(received[name][-1] == "third" for name in names)
+    with pytest.raises(ValueError):
+        await backend.add_broker("amqp://b")
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_competing_consumers_share_a_sharded_queue():
+    backend, _ = make_sharded_backend(["amqp://a", "amqp://b"], prefetch_count=1)
+    await backend.connect()
+    release = asyncio.Event()
+    received = {"first": [], "second": []}
+
+    def consumer(name):
+        async def on_message(message):
+            received[name].append(message)
+            await release.wait()
+        return on_message
+
+    await backend.consume("work", consumer("first"))
+    await backend.consume("work", consumer("second"))
+    await backend.publish_many([("work", str(n)) for n in range(6)])
+    await asyncio.sleep(0.01)
+    assert len(received["first"]) == len(received["second"]) == 1  # One unacked delivery each
+
+    await backend.add_broker("amqp://c")
+    assert len(backend._subscriptions["work"]) == 2
+    release.set()
+    await asyncio.sleep(0.01)
+    assert sorted(received["first"] + received["second"], key=int) == [str(n) for n in range(6)]
+    await backend.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("urls", [["amqp://a"], ["amqp://a", "amqp://b", "amqp://c"]])
+async def test_broadcast_reaches_agents_of_every_swarm_on_the_broker(urls):
+    brokers = {url: InMemoryBroker() for url in urls}
+
+    async def connect(url, **kwargs):
+        return await brokers[url].connect(url, **kwargs)
+
+    swarms = [Swarm(name=f"s{n}", backend="rabbitmq", config={"rabbitmq_urls": urls, "connection_factory": connect})
+              for n in range(2)]
+    received = {}
+
+    def collect(name):
+        async def on_message(message):
+            received.setdefault(name, []).append(message)
+        return on_message
+
+    consumers = []
+    for n, swarm in enumerate(swarms):
+        await swarm.connect()
+        for index in range(5):
+            name = f"{n}-{index}"
+            ready = asyncio.Event()
+            consumers.append(asyncio.ensure_future(Agent(name=name, swarm=swarm, on_message=collect(name))
+                                                   .consume_messages(ready=ready)))
+            await ready.wait()
+
+    await swarms[0].broadcast("hello")
+    await asyncio.sleep(0.01)
+    assert received == {f"{n}-{index}": ["hello"] for n in range(2) for index in range(5)}
+    assert sum(broker.published for broker in brokers.values()) == len(urls)  # Once per broker
+    for consumer in consumers:
+        consumer.cancel()
+    for swarm in swarms:
+        await swarm.close()
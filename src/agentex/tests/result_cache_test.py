@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.result_cache import ResultCache
+from agentex.tasks.task_manager import TaskManager
+
+
+class CountingTask(BaseTask):
+    runs = 0
+
+    async def execute(self):
+        CountingTask.runs += 1
+        return sum(self.payload["values"])
+
+
+async def run_next(manager):
+    task = await manager.get_task("sum")
+    await task.mark_completed(await task.execute())
+    manager.task_done(task)
+
+
+def test_cache_is_lru_with_ttl(monkeypatch):
+    cache = ResultCache(maxsize=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr("agentex.tasks.result_cache.time.monotonic", lambda: now[0])
+    assert cache.key({"a": 1, "b": 2}) == cache.key({"b": 2, "a": 1})
+    cache.put(b"x", "X")
+    cache.put(b"y", "Y")
+    assert cache.get(b"x") == "X"
+    cache.put(b"z", "Z")  # Evicts y, the least recently used
+    assert cache.get(b"y") is None and len(cache) == 2
+    now[0] += 11
+    assert cache.get(b"x") is None
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submissions_are_coalesced_then_cached():
+    CountingTask.runs = 0
+    manager = TaskManager()
+    manager.register_task_type("sum", CountingTask, cache=ResultCache())
+
+    first = await manager.add_task("sum", {"values": [1, 2]})
+    second = await manager.add_task("sum", {"values": [1, 2]})
+    assert second is first and manager.queue_depth("sum") == 1
+
+    waiters = [asyncio.ensure_future(manager.wait(task)) for task in (first, second)]
+    await run_next(manager)
+    assert [task.result for task in await asyncio.gather(*waiters)] == [3, 3]
+
+    third = await manager.add_task("sum", {"values": [1, 2]})
+    assert third is first and manager.queue_depth("sum") == 0
+    assert (await manager.wait(third)).result == 3
+    assert CountingTask.runs == 1
+
+    await manager.add_task("sum", {"values": [2, 2]})
+    assert manager.queue_depth("sum") == 1
+
+
+def test_cache_keys_keep_types_and_ignore_order():
+    key = ResultCache.key
+    assert key({1: "x"}) != key({"1": "x"})
+    assert key((1, 2)) != key([1, 2])
+    assert key({"a": [1, 2]}) != key({"a": "[1, 2]"})
+    assert key(1) != key(True) != key(1.0)
+    assert key({"a": 1, "b": {"c": None}}) == key({"b": {"c": None}, "a": 1})
+    assert key({"tags": {"x", "y", "z"}}) == key({"tags": {"z", "y", "x"}})
+    assert key({("a", 1): b"raw"}) == key({("a", 1): b"raw"})
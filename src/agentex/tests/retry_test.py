@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from agentex.agents.agent import Agent
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.retry import RetryPolicy
+
+attempts = {}
+
+
+class FlakyTask(BaseTask):
+    async def execute(self):
+        key = self.payload["key"]
+        attempts[key] = attempts.get(key, 0) + 1
+        if attempts[key] <= self.payload["failures"]:
+            raise RuntimeError("downstream unavailable")
+        return "ok"
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+    jittered = RetryPolicy(base_delay=1, max_delay=5)
+    assert all(2 <= jittered.delay(3) <= 4 for _ in range(100))
+
+
+@pytest.mark.asyncio
+async def test_failed_tasks_are_requeued_with_backoff_then_dead_lettered():
+    attempts.clear()
+    swarm = Swarm(name="RetrySwarm", backend="local")
+    manager = swarm.task_manager
+    manager.register_task_type("flaky", FlakyTask, retry_policy=RetryPolicy(base_delay=0.02, jitter=False))
+    agent = Agent(name="Retrier", swarm=swarm, capabilities=["flaky"])
+
+    await agent.start_workers(concurrency=1)
+    await manager.add_task("flaky", {"key": "recovers", "failures": 2}, retries=2)
+    await manager.add_task("flaky", {"key": "broken", "failures": 99}, retries=1)
+
+    await asyncio.sleep(0.01)
+    # Both first attempts already ran: a failing task does not hold the agent while it backs off.
+    assert attempts == {"recovers": 1, "broken": 1}
+    assert len(manager.pending_retries()) == 2
+
+    await asyncio.sleep(0.2)
+    await agent.stop()
+    assert attempts == {"recovers": 3, "broken": 2}
+    assert [task.payload["key"] for task in manager.dead_letters] == ["broken"]
+    assert manager.dead_letters[0].status == "failed"
@@ -0,0 +1,182 @@
+import asyncio
+import pytest
+from agentex.agents.agent import Agent
+from agentex.metrics.registry import MetricsRegistry
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.retry import RetryPolicy
+from agentex.tasks.status import TaskStatus
+
+
+class SleepTask(BaseTask):
+    async def execute(self):
+        await asyncio.sleep(self.payload["seconds"])
+        return self.payload["seconds"]
+
+
+class StragglerTask(BaseTask):
+    runs = 0
+
+    async def execute(self):
+        StragglerTask.runs += 1
+        # Every fast run takes 1ms; the first slow one hangs until it is hedged away.
+        await asyncio.sleep(10 if self.payload.get("slow") and StragglerTask.runs == 21 else 0.001)
+        return "done"
+
+
+def make_swarm():
+    return Swarm(name="test", backend="local", metrics=MetricsRegistry())
+
+
+@pytest.mark.asyncio
+async def test_timeouts_fail_the_attempt_and_retry():
+    swarm = make_swarm()
+    manager = swarm.task_manager
+    manager.register_task_type("sleep", SleepTask, timeout=0.02,
+                               retry_policy=RetryPolicy(base_delay=0.001, jitter=False))
+    worker = Agent(name="worker", swarm=swarm, capabilities=["sleep"])
+    await worker.start_workers(concurrency=2)
+
+    hung = await manager.add_task("sleep", {"seconds": 10}, retries=1)
+    quick = await manager.add_task("sleep", {"seconds": 0.001})
+    assert (await manager.wait(quick)).result == 0.001
+    hung = await manager.wait(hung)
+    assert hung.status == TaskStatus.FAILED and hung.attempts == 1
+    assert "timed out" in hung.result
+    assert swarm.metrics.counter("agentex_task_timeouts_total", task_type="sleep").value == 2
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_and_running_tasks():
+    swarm = make_swarm()
+    manager = swarm.task_manager
+    manager.register_task_type("sleep", SleepTask)
+    worker = Agent(name="worker", swarm=swarm, capabilities=["sleep"])
+
+    running = await manager.add_task("sleep", {"seconds": 10})
+    queued = await manager.add_task("sleep", {"seconds": 10})
+    await worker.start_workers(concurrency=1)
+    await asyncio.sleep(0.01)
+    assert running.status == TaskStatus.IN_PROGRESS
+
+    assert await manager.cancel(queued.task_id)
+    assert queued.status == TaskStatus.CANCELLED and manager.queue_depth("sleep") == 0
+    assert await manager.cancel(running.id)
+    assert (await manager.wait(running)).status == TaskStatus.CANCELLED
+    assert not await manager.cancel(running.id)
+
+    # The worker is free again after the cancellation.
+    follow_up = await manager.add_task("sleep", {"seconds": 0.001})
+    assert (await asyncio.wait_for(manager.wait(follow_up), 1)).status == TaskStatus.COMPLETED
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_stragglers_are_hedged_on_another_worker():
+    StragglerTask.runs = 0
+    swarm = make_swarm()
+    manager = swarm.task_manager
+    manager.register_task_type("io", StragglerTask, hedge=0.95)
+    workers = [Agent(name=f"w{n}", swarm=swarm, capabilities=["io"]) for n in range(2)]
+    for worker in workers:
+        await worker.start_workers()
+
+    for _ in range(20):  # Timings for the p95
+        await manager.wait(await manager.add_task("io", {}))
+    straggler = await manager.add_task("io", {"slow": True})
+    finished = await asyncio.wait_for(manager.wait(straggler), 1)
+
+    assert finished.status == TaskStatus.COMPLETED and finished.result == "done"
+    assert StragglerTask.runs == 22
+    assert swarm.metrics.counter("agentex_task_hedges_won_total", task_type="io").value == 1
+    await asyncio.sleep(0)
+    assert not manager._attempts and not manager._hedges
+    for worker in workers:
+        await worker.stop(drain=False)
+
+
+class ScriptedTask(BaseTask):
+    """Run n (from 1) sleeps script[n][0] seconds, then fails if script[n][1], else returns n; others take 1ms."""
+    runs = 0
+    script = {}
+
+    async def execute(self):
+        ScriptedTask.runs += 1
+        run = ScriptedTask.runs
+        seconds, fails = ScriptedTask.script.get(run, (0.001, False))
+        await asyncio.sleep(seconds)
+        if fails:
+            raise RuntimeError(f"run {run} failed")
+        return run
+
+
+async def hedged_swarm(script, dispatch=False, agents=2, concurrency=2):
+    ScriptedTask.runs = 0
+    ScriptedTask.script = script
+    swarm = make_swarm()
+    swarm.task_manager.register_task_type("io", ScriptedTask, hedge=0.95)
+    ran_on = []
+    swarm.hooks.add("before_execute", lambda agent, task: ran_on.append(agent.name))
+    workers = [Agent(name=f"w{n}", swarm=swarm, capabilities=["io"], capacity=concurrency) for n in range(agents)]
+    if dispatch:
+        swarm.start_dispatching()
+    else:
+        for worker in workers:
+            await worker.start_workers(concurrency=concurrency)
+    for _ in range(20):  # Timings for the p95
+        await swarm.task_manager.wait(await swarm.task_manager.add_task("io", {}))
+    return swarm, workers, ran_on
+
+
+async def stop(swarm, workers):
+    if swarm.dispatcher.running:
+        await swarm.dispatcher.stop(drain=False)
+    for worker in workers:
+        await worker.stop(drain=False)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dispatch", [False, True])
+async def test_speculative_copies_run_on_another_agent(dispatch):
+    swarm, workers, ran_on = await hedged_swarm({21: (10, False)}, dispatch)
+    manager = swarm.task_manager
+
+    straggler = await manager.add_task("io", {})
+    finished = await asyncio.wait_for(manager.wait(straggler), 1)
+    assert finished.status == TaskStatus.COMPLETED and finished.result == 22
+    assert ran_on[20] != ran_on[21]  # The original and its copy
+    await stop(swarm, workers)
+
+
+@pytest.mark.asyncio
+async def test_a_failed_copy_is_dropped_quietly():
+    swarm, workers, _ = await hedged_swarm({21: (0.05, False), 22: (0, True)})
+    manager = swarm.task_manager
+
+    task = await manager.add_task("io", {})
+    finished = await asyncio.wait_for(manager.wait(task), 1)
+    assert finished.status == TaskStatus.COMPLETED and finished.result == 21
+    assert swarm.metrics.counter("agentex_task_hedges_total", task_type="io").value == 1
+    assert not manager.dead_letters
+    assert swarm.metrics.counter("agentex_tasks_dead_lettered_total", task_type="io").value == 0
+    assert not manager._hedges and not manager._hedge_copies and not manager._hedge_owners
+    await stop(swarm, workers)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("copy_fails", [False, True])
+async def test_a_task_only_fails_once_its_copy_failed_too(copy_fails):
+    swarm, workers, _ = await hedged_swarm({21: (0.02, True), 22: (0.05, copy_fails)})
+    manager = swarm.task_manager
+
+    task = await manager.add_task("io", {})
+    finished = await asyncio.wait_for(manager.wait(task), 1)
+    assert swarm.metrics.counter("agentex_task_hedges_total", task_type="io").value == 1
+    if copy_fails:
+        assert finished.status == TaskStatus.FAILED and finished.result == "run 21 failed"
+        assert list(manager.dead_letters) == [task]
+    else:
+        assert finished.status == TaskStatus.COMPLETED and finished.result == 22
+        assert not manager.dead_letters
+    await stop(swarm, workers)
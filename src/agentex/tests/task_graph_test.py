@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from agentex.agents.agent import Agent
+from agentex.swarms.swarm import Swarm
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.graph import TaskGraph
+
+
+class SplitTask(BaseTask):
+    async def execute(self):
+        return list(range(self.payload["n"]))
+
+
+class SquareTask(BaseTask):
+    async def execute(self):
+        await asyncio.sleep(0.01 * (3 - self.payload["item"] % 3))
+        return self.payload["item"] ** 2
+
+
+class SumTask(BaseTask):
+    async def execute(self):
+        return sum(self.payload["inputs"]["square"]) + len(self.payload["inputs"]["offset"])
+
+
+def make_swarm():
+    swarm = Swarm(name="graph", backend="local")
+    for task_type, task_class in (("split", SplitTask), ("square", SquareTask), ("sum", SumTask),
+                                  ("offset", SplitTask)):
+        swarm.task_manager.register_task_type(task_type, task_class)
+    Agent(name="worker", swarm=swarm, capabilities=["split", "square", "sum", "offset"], capacity=16)
+    swarm.start_dispatching()
+    return swarm
+
+
+@pytest.mark.asyncio
+async def test_fan_out_fan_in_with_streaming():
+    swarm = make_swarm()
+    graph = TaskGraph()
+    graph.add("split", "split", {"n": 6})
+    graph.add("offset", "offset", {"n": 2})
+    graph.map("square", "square", over="split", max_parallel=3)
+    graph.add("sum", "sum", depends_on=["square", "offset"])
+    run = swarm.submit_graph(graph)
+
+    streamed = [item async for item in run.stream("square")]
+    results = await run.wait()
+    assert sorted(streamed) == [(n, n * n) for n in range(6)]
+    assert results["square"] == [n * n for n in range(6)]
+    assert results["sum"] == 57
+    await swarm.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_node_fails_the_run_and_cycles_are_rejected():
+    swarm = make_swarm()
+    graph = TaskGraph()
+    graph.add("sum", "sum", {"inputs": {}})
+    run = swarm.submit_graph(graph)
+    with pytest.raises(RuntimeError, match="'sum' failed"):
+        await run.wait()
+
+    cyclic = TaskGraph()
+    cyclic.add("a", "sum", depends_on=["b"])
+    cyclic.add("b", "sum", depends_on=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        swarm.submit_graph(cyclic)
+    await swarm.close()
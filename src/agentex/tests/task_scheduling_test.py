@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from agentex.tasks.base_task import BaseTask
+from agentex.tasks.scheduler import DeficitRoundRobin
+from agentex.tasks.task_manager import TaskManager
+from agentex.tasks.task_queue import TaskQueue
+
+
+class NoopTask(BaseTask):
+    async def execute(self):
+        return self.payload
+
+
+@pytest.mark.asyncio
+async def test_priority_then_deadline_order():
+    manager = TaskManager()
+    manager.register_task_type("job", NoopTask)
+    await manager.add_task("job", "bulk", priority=5)
+    await manager.add_task("job", "late", priority=0, deadline=60)
+    await manager.add_task("job", "soon", priority=0, deadline=1)
+    await manager.add_task("job", "no-deadline", priority=0)
+
+    order = [(await manager.get_task("job")).payload for _ in range(4)]
+    assert order == ["soon", "late", "no-deadline", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_expired_tasks_are_failed_not_started():
+    manager = TaskManager()
+    manager.register_task_type("job", NoopTask)
+    await manager.add_task("job", "stale", deadline=0)
+    await manager.add_task("job", "fresh")
+
+    task = await manager.get_task("job")
+    await asyncio.sleep(0)
+    assert task.payload == "fresh"
+    assert manager.expired == 1
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_selection_across_capabilities():
+    manager = TaskManager()
+    manager.register_task_type("batch", NoopTask, weight=1)
+    manager.register_task_type("interactive", NoopTask, weight=3)
+    for n in range(20):
+        await manager.add_task("batch", n)
+        await manager.add_task("interactive", n)
+
+    scheduler = DeficitRoundRobin(manager.get_weight)
+    served = [(await manager.next_task({"batch", "interactive"}, scheduler)).task_type for _ in range(12)]
+    assert served.count("interactive") == 9
+    assert served.count("batch") == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_tasks_are_materialized_in_order():
+    manager = TaskManager()
+    manager.register_task_type("job", NoopTask)
+    assert await manager.add_tasks("job", range(10000), retries=2) == 10000
+    assert manager.queue_depth("job") == 10000
+
+    tasks = [await manager.get_task("job") for _ in range(10000)]
+    assert [task.payload for task in tasks] == list(range(10000))
+    assert tasks[0].retries == 2 and tasks[0].deadline is None
+    assert len({task.id for task in tasks}) == 10000
+    assert manager.queue_depth("job") == 0 and not manager.backlogs
+
+
+@pytest.mark.asyncio
+async def test_bulk_tasks_wake_blocked_consumers():
+    manager = TaskManager()
+    manager.register_task_type("job", NoopTask)
+    consumer = asyncio.ensure_future(manager.next_task(["job"]))
+    await asyncio.sleep(0)
+    await manager.add_tasks("job", ["a", "b"])
+    task = await asyncio.wait_for(consumer, 1)
+    assert task.payload == "a"
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_evicts_the_least_urgent_task_oldest_first():
+    dropped = []
+    queue = TaskQueue(maxsize=3, overflow="drop_oldest", on_drop=lambda task: dropped.append(task.payload))
+    tasks = {name: NoopTask("job", name) for name in "abcdef"}
+    tasks["a"].priority = tasks["b"].priority = 5
+    for name in "abc":
+        queue.put_nowait(tasks[name])
+    queue.put_nowait(tasks["d"])  # Evicts a, the older of the two priority 5 tasks
+    assert queue.remove(tasks["b"])
+    queue.put_nowait(tasks["e"])
+    queue.put_nowait(tasks["f"])  # Evicts c, the oldest of the equally urgent ones
+    assert dropped == ["a", "c"]
+    assert queue.qsize() == 3
+    assert [queue.get_nowait().payload for _ in range(3)] == ["d", "e", "f"]
+    assert queue.empty()